@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Utilidades de audio para Fast PyTranscriptor
+Decodificación con ffmpeg a float32 mono 16 kHz y división en ventanas
+"""
+
+import math
+import subprocess
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Whisper trabaja a 16 kHz con ventanas de 30 segundos
+SAMPLE_RATE = 16000
+DURACION_VENTANA = 30.0
+# Solape a cada lado de un corte entre ventanas (como stride_length_s del pipeline de HF):
+# ventanas consecutivas comparten 2 * SOLAPE_VENTANA segundos
+SOLAPE_VENTANA = 5.0
+
+def decodificar_audio(archivo_path, sampling_rate=SAMPLE_RATE, duracion_s=None):
+    """Decodifica cualquier archivo soportado por ffmpeg a un array float32 mono (opcional: solo los primeros duracion_s)"""
+    comando = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", str(archivo_path),
+    ]
+    if duracion_s is not None:
+        comando += ["-t", str(duracion_s)]
+    comando += [
+        "-ac", "1",
+        "-ar", str(sampling_rate),
+        "-f", "f32le",
+        "pipe:1",
+    ]
+    try:
+        proceso = subprocess.run(comando, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg no encontrado en PATH, es necesario para decodificar audio")
+
+    if proceso.returncode != 0:
+        error = proceso.stderr.decode("utf-8", errors="ignore").strip()
+        raise RuntimeError(f"ffmpeg no pudo decodificar {archivo_path}: {error[-300:]}")
+
+    audio = np.frombuffer(proceso.stdout, dtype=np.float32)
+    if audio.size == 0:
+        raise ValueError(f"El archivo no contiene audio: {archivo_path}")
+    return audio
+
+def _paso_muestras(max_muestras, solape_muestras):
+    """(avance, solape) entre ventanas; el solape se limita para avanzar al menos media ventana"""
+    solape = max(0, min(solape_muestras, max_muestras // 4))
+    return max_muestras - 2 * solape, solape
+
+def _cortes_con_solape(inicio, fin, max_muestras, solape_muestras):
+    """
+    Cortes [(a, b, propia_inicio, propia_fin)] en muestras que cubren [inicio, fin).
+    Ventanas consecutivas se solapan en 2 * solape; cada una es "dueña" del
+    tramo hasta la mitad del solape, así cada instante pertenece a una sola.
+    """
+    paso, solape = _paso_muestras(max_muestras, solape_muestras)
+    cortes = []
+    pos = inicio
+    while True:
+        b = min(fin, pos + max_muestras)
+        cortes.append([pos, b, pos + solape if cortes else -math.inf, b - solape])
+        if b >= fin:
+            cortes[-1][3] = math.inf
+            return cortes
+        pos += paso
+
+def dividir_en_ventanas(audio, duracion_s=DURACION_VENTANA, sampling_rate=SAMPLE_RATE, offset_s=0.0,
+                        solape_s=SOLAPE_VENTANA):
+    """
+    Divide el audio en ventanas de duracion_s que se solapan solape_s a cada
+    lado del corte. Devuelve [(offset_s, array, (propia_inicio_s, propia_fin_s)), ...]:
+    de cada ventana solo se conservan los chunks cuyo punto medio cae en su
+    tramo propio (ver chunks_absolutos), así las palabras del borde no se
+    cortan ni se duplican.
+    """
+    ventanas = []
+    for a, b, propia_a, propia_b in _cortes_con_solape(0, len(audio), int(duracion_s * sampling_rate),
+                                                        int(solape_s * sampling_rate)):
+        # Las vistas de numpy evitan copiar el audio
+        ventanas.append((offset_s + a / sampling_rate, audio[a:b],
+                         (offset_s + propia_a / sampling_rate, offset_s + propia_b / sampling_rate)))
+    return ventanas
+
+def ventanas_por_bloques(bloques, duracion_s=DURACION_VENTANA, sampling_rate=SAMPLE_RATE, solape_s=SOLAPE_VENTANA):
+    """
+    dividir_en_ventanas sobre un audio que llega por bloques (offset_s, array):
+    mismos cortes y tramos propios, reteniendo solo la ventana en curso (la cola
+    de 2 * solape de la anterior más lo que falta leer). Una ventana se entrega
+    en cuanto hay al menos una muestra después de ella (si no, es la última).
+    """
+    max_muestras = int(duracion_s * sampling_rate)
+    paso, solape = _paso_muestras(max_muestras, int(solape_s * sampling_rate))
+    pendiente = np.zeros(0, dtype=np.float32)
+    inicio = 0  # muestra del archivo donde empieza pendiente
+    for _, bloque in bloques:
+        pendiente = np.concatenate([pendiente, bloque])
+        while len(pendiente) > max_muestras:
+            propia_inicio = (inicio + solape) / sampling_rate if inicio else -math.inf
+            yield (inicio / sampling_rate, pendiente[:max_muestras],
+                   (propia_inicio, (inicio + max_muestras - solape) / sampling_rate))
+            pendiente = pendiente[paso:]
+            inicio += paso
+    if len(pendiente):
+        propia_inicio = (inicio + solape) / sampling_rate if inicio else -math.inf
+        yield inicio / sampling_rate, pendiente, (propia_inicio, math.inf)
+
+def ventanas_desde_regiones(audio, regiones, duracion_s=DURACION_VENTANA, sampling_rate=SAMPLE_RATE, separacion_s=0.2,
+                            solape_s=SOLAPE_VENTANA):
+    """
+    Concatena regiones con voz en ventanas de hasta duracion_s, separadas por un
+    silencio corto. Devuelve [(mapa, array, propias), ...] donde mapa es una lista
+    de (inicio_en_ventana_s, inicio_original_s) para remapear timestamps y
+    propias, alineada con mapa, el tramo propio (tiempo original) de cada pieza.
+    Las regiones más largas que una ventana se parten con solape.
+    """
+    max_muestras = int(duracion_s * sampling_rate)
+    separacion = np.zeros(int(separacion_s * sampling_rate), dtype=np.float32)
+
+    # Partir regiones más largas que una ventana
+    piezas = []
+    for inicio, fin in regiones:
+        a, b = int(inicio * sampling_rate), min(len(audio), int(fin * sampling_rate))
+        if b <= a:
+            continue
+        for pos, fin_pieza, propia_a, propia_b in _cortes_con_solape(a, b, max_muestras, int(solape_s * sampling_rate)):
+            piezas.append((pos, audio[pos:fin_pieza], (propia_a / sampling_rate, propia_b / sampling_rate)))
+
+    ventanas = []
+    partes, mapa, propias, usadas = [], [], [], 0
+    for pos, pieza, propia in piezas:
+        extra = len(pieza) + (len(separacion) if partes else 0)
+        if partes and usadas + extra > max_muestras:
+            ventanas.append((mapa, np.concatenate(partes), propias))
+            partes, mapa, propias, usadas = [], [], [], 0
+        if partes:
+            partes.append(separacion)
+            usadas += len(separacion)
+        mapa.append((usadas / sampling_rate, pos / sampling_rate))
+        propias.append(propia)
+        partes.append(pieza)
+        usadas += len(pieza)
+    if partes:
+        ventanas.append((mapa, np.concatenate(partes), propias))
+    return ventanas
+
+def _tramo(mapa, t):
+    """Índice del tramo del mapa que contiene el tiempo t relativo a la ventana"""
+    indice = 0
+    for i, tramo in enumerate(mapa):
+        if tramo[0] > t:
+            break
+        indice = i
+    return indice
+
+def remapear_tiempo(mapa, t):
+    """Convierte un tiempo relativo a la ventana en tiempo del archivo original"""
+    inicio_ventana, inicio_original = mapa[_tramo(mapa, t)]
+    return inicio_original + (t - inicio_ventana)
+
+def chunks_absolutos(salida, mapa, propias, duracion):
+    """
+    Chunks de la salida de una ventana con timestamps absolutos, solo los que
+    pertenecen al tramo propio de su pieza (el solape lo cubre otra ventana).
+    Devuelve (texto, chunks); sin chunks en la salida se conserva el texto entero.
+    """
+    if "chunks" not in salida:
+        return salida.get("text", "").strip(), []
+
+    chunks = []
+    for chunk in salida["chunks"]:
+        inicio, fin = chunk["timestamp"]
+        inicio = inicio or 0.0
+        fin = fin if fin is not None else duracion
+        medio = (inicio + fin) / 2
+        propia_inicio, propia_fin = propias[_tramo(mapa, medio)]
+        if not propia_inicio <= remapear_tiempo(mapa, medio) < propia_fin:
+            continue
+        # Timestamps relativos a la ventana -> absolutos en el archivo original
+        chunks.append({"timestamp": (remapear_tiempo(mapa, inicio), remapear_tiempo(mapa, fin)), "text": chunk["text"]})
+    return "".join(c["text"] for c in chunks).strip(), chunks
+
+def leer_audio_por_bloques(archivo_path, duracion_bloque=DURACION_VENTANA, sampling_rate=SAMPLE_RATE):
+    """Decodifica con ffmpeg de forma incremental. Genera (offset_s, array) sin cargar el archivo completo"""
+    comando = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", str(archivo_path),
+        "-ac", "1",
+        "-ar", str(sampling_rate),
+        "-f", "f32le",
+        "pipe:1",
+    ]
+    try:
+        proceso = subprocess.Popen(comando, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg no encontrado en PATH, es necesario para decodificar audio")
+
+    bytes_bloque = int(duracion_bloque * sampling_rate) * 4  # float32
+    muestras_leidas = 0
+    try:
+        while True:
+            datos = proceso.stdout.read(bytes_bloque)
+            if not datos:
+                break
+            bloque = np.frombuffer(datos[:len(datos) - len(datos) % 4], dtype=np.float32)
+            yield muestras_leidas / sampling_rate, bloque
+            muestras_leidas += len(bloque)
+    finally:
+        proceso.stdout.close()
+        error = proceso.stderr.read().decode("utf-8", errors="ignore").strip()
+        proceso.stderr.close()
+        codigo = proceso.wait()
+
+    if codigo != 0:
+        raise RuntimeError(f"ffmpeg no pudo decodificar {archivo_path}: {error[-300:]}")
+    if muestras_leidas == 0:
+        raise ValueError(f"El archivo no contiene audio: {archivo_path}")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Backends de inferencia alternativos para TranscriptorGPU
+- torch: PyTorch eager/compilado (default, FP16 en GPU)
+- int8: cuantización dinámica int8 de las capas Linear (solo CPU)
+- onnx: export a ONNX Runtime vía optimum (se cachea el export)
+- ctranslate2: motor CTranslate2 vía faster-whisper (int8 en CPU, float16 en GPU)
+"""
+
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "int8", "onnx", "ctranslate2")
+DIRECTORIO_ONNX_DEFAULT = Path.home() / ".cache" / "fast-pycaptioner" / "onnx"
+
+# Nombres de faster-whisper para los modelos de Hugging Face que usamos
+MODELOS_CTRANSLATE2 = {
+    "openai/whisper-large-v3-turbo": "large-v3-turbo",
+    "openai/whisper-large-v3": "large-v3",
+}
+
+def cargar_modelo_int8(model_id):
+    """Carga el modelo en float32 y cuantiza dinámicamente las capas Linear a int8"""
+    import torch
+    from transformers import AutoModelForSpeechSeq2Seq
+
+    modelo = AutoModelForSpeechSeq2Seq.from_pretrained(
+        model_id,
+        dtype=torch.float32,
+        low_cpu_mem_usage=True,
+        use_safetensors=True,
+        attn_implementation="eager"
+    )
+    modelo.eval()
+    logger.info("🔢 Cuantizando capas Linear a int8 (dinámico)...")
+    return torch.ao.quantization.quantize_dynamic(modelo, {torch.nn.Linear}, dtype=torch.qint8)
+
+def cargar_modelo_onnx(model_id, device="cpu", directorio=None):
+    """Exporta (una vez) y carga el modelo con ONNX Runtime"""
+    try:
+        from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+    except ImportError:
+        raise RuntimeError("El backend onnx requiere optimum[onnxruntime]: uv pip install 'optimum[onnxruntime]'")
+
+    proveedor = "CUDAExecutionProvider" if device.startswith("cuda") else "CPUExecutionProvider"
+    directorio = Path(directorio or DIRECTORIO_ONNX_DEFAULT) / model_id.replace("/", "--")
+
+    if (directorio / "config.json").exists():
+        return ORTModelForSpeechSeq2Seq.from_pretrained(directorio, provider=proveedor)
+
+    logger.info(f"📦 Exportando {model_id} a ONNX en {directorio} (solo la primera vez)...")
+    modelo = ORTModelForSpeechSeq2Seq.from_pretrained(model_id, export=True, provider=proveedor)
+    modelo.save_pretrained(directorio)
+    return modelo
+
+class PipeCTranslate2:
+    def __init__(self, model_id, device="cpu", beam_size=1, cpu_threads=0, batch_size=8):
+        """
+        Adaptador de faster-whisper con la misma interfaz de llamada que el pipeline de transformers.
+
+        Con BatchedInferencePipeline (faster-whisper >= 1.1) los tramos de voz de
+        un mismo audio se decodifican en lotes de batch_size. Las entradas de una
+        lista NO se juntan en un lote: se transcriben una por una, así que con las
+        ventanas de 30 s del planificador por lotes cada ventana es su propio lote.
+        """
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError("El backend ctranslate2 requiere faster-whisper: uv pip install faster-whisper")
+
+        en_gpu = device.startswith("cuda")
+        self.beam_size = beam_size
+        self.modelo = WhisperModel(
+            MODELOS_CTRANSLATE2.get(model_id, model_id),
+            device="cuda" if en_gpu else "cpu",
+            device_index=int(device.split(":")[1]) if en_gpu and ":" in device else 0,
+            compute_type="float16" if en_gpu else "int8",
+            cpu_threads=cpu_threads
+        )
+        self.batch_size = batch_size
+        try:
+            from faster_whisper import BatchedInferencePipeline
+            self.lotes = BatchedInferencePipeline(model=self.modelo)
+            self.modo_lotes = f"tramos de cada audio en lotes de {batch_size}; audios uno por uno"
+        except ImportError:
+            self.lotes = None
+            self.modo_lotes = "sin lotes (faster-whisper < 1.1): audios y tramos uno por uno"
+            logger.warning("⚠️  faster-whisper sin BatchedInferencePipeline: se decodifica sin lotes")
+
+    def _transcribir(self, entrada, generate_kwargs, palabras=False):
+        audio = entrada["raw"] if isinstance(entrada, dict) else str(entrada)
+        opciones = dict(
+            language=generate_kwargs.get("language"),
+            task=generate_kwargs.get("task", "transcribe"),
+            beam_size=self.beam_size,
+            condition_on_previous_text=False,
+            word_timestamps=palabras
+        )
+        if self.lotes is not None:
+            # El VAD de faster-whisper corta el audio en tramos que se decodifican juntos
+            segmentos, _ = self.lotes.transcribe(audio, batch_size=self.batch_size, **opciones)
+        else:
+            segmentos, _ = self.modelo.transcribe(audio, **opciones)
+        segmentos = list(segmentos)
+        texto = "".join(s.text for s in segmentos)
+        if palabras:
+            chunks = [{"timestamp": (p.start, p.end), "text": p.word} for s in segmentos for p in s.words]
+        else:
+            chunks = [{"timestamp": (s.start, s.end), "text": s.text} for s in segmentos]
+        return {"text": texto, "chunks": chunks}
+
+    def __call__(self, entradas, generate_kwargs=None, return_timestamps=True, **kwargs):
+        # chunk_length_s no aplica (CTranslate2 segmenta internamente) y cada entrada
+        # de la lista va por separado: el lote se arma con los tramos de una entrada
+        generate_kwargs = generate_kwargs or {}
+        palabras = return_timestamps == "word"
+        if isinstance(entradas, list):
+            return [self._transcribir(e, generate_kwargs, palabras) for e in entradas]
+        return self._transcribir(entradas, generate_kwargs, palabras)
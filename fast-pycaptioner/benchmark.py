@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Benchmark de Fast PyTranscriptor
+Corre un corpus fijo por una grilla de configuraciones (batch_size,
+chunk_length_s, workers de decodificación, dtype) con el planificador por
+lotes y reporta por configuración: RTF, latencia al primer archivo terminado,
+RSS pico (proceso y sus hijos, p. ej. los decodificadores) y WER contra las
+referencias (.txt con el mismo nombre que cada audio).
+El modelo se carga una sola vez por dtype.
+
+Ejemplos:
+  python benchmark.py ./corpus --batch-sizes 4 8 16 --workers 0 2 4 --json reporte.json
+  python benchmark.py --corpus-sintetico ./corpus-sintetico --dtypes float32 bfloat16
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import platform
+import argparse
+import itertools
+import logging
+import threading
+import subprocess
+from pathlib import Path
+
+from main import TranscriptorGPU
+from comparar_backends import cargar_corpus
+from backends import BACKENDS
+from planificador_lotes import PlanificadorLotes
+from decodificacion_paralela import DecodificadorParalelo
+from metricas import calcular_wer
+
+logger = logging.getLogger(__name__)
+
+# Frases para el corpus sintético (espeak-ng): la referencia es el texto exacto
+FRASES_SINTETICAS = [
+    "Hola a todos, bienvenidos a una nueva clase del curso.",
+    "Hoy vamos a revisar los resultados del trimestre y los próximos pasos del proyecto.",
+    "La reunión empieza a las diez de la mañana y dura aproximadamente una hora.",
+    "Por favor, envíen sus comentarios antes del viernes para incluirlos en el reporte.",
+    "El modelo transcribe el audio en ventanas de treinta segundos y luego une los resultados.",
+    "Gracias por su atención, nos vemos la próxima semana.",
+]
+
+def generar_corpus_sintetico(directorio, voz="es", repeticiones=3):
+    """Genera audios con espeak-ng y su referencia .txt (corpus reproducible sin datos externos)"""
+    if shutil.which("espeak-ng") is None:
+        raise RuntimeError("El corpus sintético requiere espeak-ng en PATH")
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    for i in range(repeticiones):
+        # Cada archivo junta varias frases para que haya más de una ventana en los largos
+        frases = FRASES_SINTETICAS[:(i + 1) * 2] * (i + 1)
+        texto = " ".join(frases)
+        ruta = directorio / f"sintetico_{i:02d}.wav"
+        if not ruta.exists():
+            subprocess.run(["espeak-ng", "-v", voz, "-w", str(ruta), texto], check=True, capture_output=True)
+        ruta.with_suffix(".txt").write_text(texto, encoding="utf-8")
+    return directorio
+
+def _rss_proc(pid):
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+def _descendientes(pid):
+    """PIDs de los procesos hijos (y nietos) de pid según /proc"""
+    hijos = {}
+    for entrada in os.listdir("/proc"):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entrada}/stat") as f:
+                # El nombre va entre paréntesis y puede tener espacios: el ppid es el 2º campo tras ")"
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        hijos.setdefault(ppid, []).append(int(entrada))
+    pendientes, encontrados = [pid], []
+    while pendientes:
+        for hijo in hijos.get(pendientes.pop(), []):
+            encontrados.append(hijo)
+            pendientes.append(hijo)
+    return encontrados
+
+class MonitorMemoria:
+    def __init__(self, intervalo_s=0.05):
+        """
+        Muestrea en un hilo el RSS del proceso más el de sus hijos (decodificadores,
+        réplicas) y guarda el pico (ru_maxrss no se puede reiniciar)
+        """
+        self.intervalo_s = intervalo_s
+        self.pico = 0
+        self._detener = threading.Event()
+        self._hilo = None
+
+    @staticmethod
+    def rss_actual():
+        try:
+            total = _rss_proc(os.getpid())
+        except (OSError, ValueError):
+            # Sin /proc (macOS): máximos históricos del proceso y del mayor hijo terminado
+            import resource
+            maximo = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                      + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+            return maximo if sys.platform == "darwin" else maximo * 1024
+        for pid in _descendientes(os.getpid()):
+            try:
+                total += _rss_proc(pid)
+            except (OSError, ValueError):
+                # El hijo terminó entre el listado y la lectura
+                pass
+        return total
+
+    def _bucle(self):
+        while not self._detener.wait(self.intervalo_s):
+            self.pico = max(self.pico, self.rss_actual())
+
+    def __enter__(self):
+        self.pico = self.rss_actual()
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._detener.set()
+        self._hilo.join()
+        self.pico = max(self.pico, self.rss_actual())
+
+def medir_configuracion(transcriptor, corpus, batch_size, chunk_length_s, workers, idioma=None):
+    """Transcribe el corpus con una configuración y devuelve sus métricas"""
+    decodificador = DecodificadorParalelo(workers) if workers else None
+    planificador = PlanificadorLotes(transcriptor, batch_size=batch_size, duracion_ventana=chunk_length_s,
+                                     decodificador=decodificador)
+    referencias = {str(archivo): referencia for archivo, referencia, _ in corpus}
+    wers = []
+    # El planificador entrega archivos completos: se mide hasta el primero con texto
+    latencia = None
+
+    with MonitorMemoria() as memoria:
+        inicio = time.perf_counter()
+        for resultado in planificador.iterar([archivo for archivo, _, _ in corpus], idioma):
+            if "error" in resultado:
+                raise RuntimeError(f"{resultado['archivo']}: {resultado['error']}")
+            if latencia is None and resultado["chunks"]:
+                latencia = time.perf_counter() - inicio
+            referencia = referencias[resultado["archivo"]]
+            if referencia is not None:
+                wers.append(calcular_wer(referencia, resultado["texto"]))
+        tiempo = time.perf_counter() - inicio
+
+    duracion = sum(d for _, _, d in corpus)
+    return {
+        "proceso_s": tiempo,
+        "rtf": tiempo / duracion if duracion else None,
+        "latencia_primer_archivo_s": latencia,
+        "rss_pico_mb": memoria.pico / 1024 ** 2,
+        "wer": sum(wers) / len(wers) if wers else None,
+    }
+
+def entorno():
+    """Datos de la máquina para que los reportes sean comparables"""
+    import torch
+    import transformers
+    return {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "transformers": transformers.__version__,
+        "cpu": platform.processor() or platform.machine(),
+        "nucleos": os.cpu_count(),
+        "gpu": torch.cuda.get_device_name(0) if torch.cuda.is_available() else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de configuraciones sobre un corpus fijo')
+    parser.add_argument('corpus', nargs='?', default=str(Path(__file__).parent / "audio-samples"),
+                        help='Directorio con audios y sus referencias .txt (default: audio-samples)')
+    parser.add_argument('--corpus-sintetico', metavar='DIR',
+                        help='Generar (una vez) un corpus sintético con espeak-ng en DIR y usarlo')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[8],
+                        help='Tamaños de lote a probar (default: 8)')
+    parser.add_argument('--chunk-lengths', type=float, nargs='+', default=[30.0],
+                        help='Duración de ventana en segundos, máx. 30 (default: 30)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[0],
+                        help='Procesos de decodificación, 0 = en línea (default: 0)')
+    parser.add_argument('--dtypes', nargs='+', default=['float32'], choices=['float32', 'float16', 'bfloat16'],
+                        help='Precisión del modelo (default: float32)')
+    parser.add_argument('--backend', choices=BACKENDS, default='torch',
+                        help='Motor de inferencia (default: torch)')
+    parser.add_argument('--idioma', help='Código de idioma del corpus')
+    parser.add_argument('--repeticiones', type=int, default=1,
+                        help='Corridas por configuración; se reporta la más rápida (default: 1)')
+    parser.add_argument('--gpu', type=int, default=0, help='ID de GPU a usar (default: 0)')
+    parser.add_argument('--json', help='Guardar el reporte en este archivo JSON')
+    args = parser.parse_args()
+
+    if any(c <= 0 or c > 30 for c in args.chunk_lengths):
+        parser.error("--chunk-lengths debe estar entre 0 y 30 segundos (ventana de Whisper)")
+
+    directorio = generar_corpus_sintetico(args.corpus_sintetico) if args.corpus_sintetico else args.corpus
+    corpus = cargar_corpus(directorio)
+    if not corpus:
+        logger.error("❌ No se encontraron archivos de audio")
+        sys.exit(1)
+    duracion = sum(d for _, _, d in corpus)
+    logger.info(f"📁 Corpus: {len(corpus)} archivo(s), {duracion:.1f}s de audio")
+
+    reporte = {
+        "entorno": entorno(),
+        "corpus": {"directorio": str(directorio), "archivos": len(corpus), "duracion_s": duracion},
+        "resultados": [],
+    }
+
+    for dtype in args.dtypes:
+        grilla = list(itertools.product(args.batch_sizes, args.chunk_lengths, args.workers))
+        # El modelo se carga una vez por dtype; el resto de la grilla lo reutiliza
+        try:
+            inicio = time.perf_counter()
+            transcriptor = TranscriptorGPU(device_id=args.gpu, backend=args.backend, dtype=dtype)
+            tiempo_carga = time.perf_counter() - inicio
+            # Calentamiento: la primera llamada incluye compilación/asignación de buffers
+            PlanificadorLotes(transcriptor).transcribir([corpus[0][0]], args.idioma)
+        except Exception as e:
+            # p. ej. float16 sin GPU: cada configuración de este dtype queda como fila de error
+            logger.error(f"❌ No se pudo cargar el modelo en {dtype}: {e}")
+            for batch_size, chunk_length_s, workers in grilla:
+                reporte["resultados"].append({"dtype": dtype, "backend": args.backend, "batch_size": batch_size,
+                                              "chunk_length_s": chunk_length_s, "workers": workers,
+                                              "carga_s": None, "error": str(e)})
+            gc.collect()
+            continue
+
+        for batch_size, chunk_length_s, workers in grilla:
+            configuracion = {"dtype": dtype, "backend": args.backend, "batch_size": batch_size,
+                             "chunk_length_s": chunk_length_s, "workers": workers, "carga_s": tiempo_carga}
+            logger.info(f"⏱️  {configuracion}")
+            try:
+                corridas = [medir_configuracion(transcriptor, corpus, batch_size, chunk_length_s, workers, args.idioma)
+                            for _ in range(args.repeticiones)]
+                metricas = min(corridas, key=lambda m: m["proceso_s"])
+                reporte["resultados"].append({**configuracion, **metricas})
+            except Exception as e:
+                logger.error(f"❌ Configuración falló: {e}")
+                reporte["resultados"].append({**configuracion, "error": str(e)})
+
+        del transcriptor
+        gc.collect()
+
+    print(f"\n{'dtype':<9} {'lote':>5} {'ventana':>8} {'workers':>8} {'RTF':>7} {'1er arch (s)':>12} {'RSS (MB)':>9} {'WER':>7}")
+    for r in reporte["resultados"]:
+        prefijo = f"{r['dtype']:<9} {r['batch_size']:>5} {r['chunk_length_s']:>8g} {r['workers']:>8}"
+        if "error" in r:
+            print(f"{prefijo} error: {r['error']}")
+            continue
+        latencia = f"{r['latencia_primer_archivo_s']:.2f}" if r["latencia_primer_archivo_s"] is not None else "-"
+        wer = f"{r['wer'] * 100:.1f}%" if r["wer"] is not None else "-"
+        print(f"{prefijo} {r['rtf']:>7.3f} {latencia:>12} {r['rss_pico_mb']:>9.0f} {wer:>7}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, indent=2, ensure_ascii=False)
+        logger.info(f"💾 Reporte: {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Caché de transcripciones para Fast PyTranscriptor
+La clave combina una huella del contenido del archivo con el modelo, idioma
+(forzado o detectado), cómo se detectó el idioma, tarea y segmentación usados. Se guarda el resultado completo (texto + chunks
+con timestamps) para poder regenerar cualquier formato de salida sin inferencia.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_CACHE_DEFAULT = Path.home() / ".cache" / "fast-pycaptioner" / "transcripciones"
+VERSION_CACHE = 1
+TAMANO_BLOQUE = 1024 * 1024
+
+def huella_contenido(archivo_path):
+    """BLAKE2b del contenido completo del archivo"""
+    h = hashlib.blake2b(digest_size=20)
+    with open(archivo_path, 'rb') as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+class CacheTranscripciones:
+    def __init__(self, directorio=None, firmas=None):
+        """
+        firmas: {ruta absoluta: (tamaño, mtime_ns)} ya conocidas (p. ej. del
+        EscanerArchivos) para no repetir el stat de cada archivo
+        """
+        self.firmas = firmas or {}
+        self.directorio = Path(directorio) if directorio else DIRECTORIO_CACHE_DEFAULT
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        # Índice (ruta -> tamaño, mtime, huella) para no re-leer archivos sin cambios
+        self.ruta_indice = self.directorio / "huellas.json"
+        self._lock = threading.Lock()
+        self._indice = self._cargar_indice()
+        self._indice_modificado = False
+        # Idiomas detectados por archivo (clave: huella + modelo + segundos analizados)
+        self.ruta_idiomas = self.directorio / "idiomas.json"
+        self._idiomas = None
+        self._idiomas_modificados = False
+        self.aciertos = 0
+        self.fallos = 0
+
+    def _cargar_indice(self, ruta=None):
+        try:
+            with open(ruta or self.ruta_indice, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    @staticmethod
+    def _escribir_json(ruta, datos):
+        temporal = ruta.with_suffix('.tmp')
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(datos, f)
+        os.replace(temporal, ruta)
+
+    def guardar_indice(self):
+        """Persiste el índice de huellas y los idiomas detectados (escritura atómica)"""
+        with self._lock:
+            if self._indice_modificado:
+                self._escribir_json(self.ruta_indice, self._indice)
+                self._indice_modificado = False
+            if self._idiomas_modificados:
+                self._escribir_json(self.ruta_idiomas, self._idiomas)
+                self._idiomas_modificados = False
+
+    def _clave_idioma(self, archivo_path, model_id, segundos):
+        return f"{self.huella(archivo_path)}:{model_id}:{segundos:g}"
+
+    def obtener_idioma(self, archivo_path, model_id, segundos):
+        """Idioma detectado antes para este contenido, o None (también si el archivo no se puede leer)"""
+        try:
+            clave = self._clave_idioma(archivo_path, model_id, segundos)
+        except OSError:
+            return None
+        with self._lock:
+            if self._idiomas is None:
+                self._idiomas = self._cargar_indice(self.ruta_idiomas)
+            return self._idiomas.get(clave)
+
+    def guardar_idioma(self, archivo_path, model_id, segundos, idioma):
+        try:
+            clave = self._clave_idioma(archivo_path, model_id, segundos)
+        except OSError as e:
+            logger.warning(f"⚠️  No se pudo guardar el idioma de {archivo_path}: {e}")
+            return
+        with self._lock:
+            if self._idiomas is None:
+                self._idiomas = self._cargar_indice(self.ruta_idiomas)
+            self._idiomas[clave] = idioma
+            self._idiomas_modificados = True
+
+    def huella(self, archivo_path):
+        """Huella del contenido, reutilizada si tamaño y mtime no cambiaron"""
+        ruta = os.path.abspath(archivo_path)
+        firma = self.firmas.get(ruta)
+        if firma is None:
+            st = os.stat(ruta)
+            firma = (st.st_size, st.st_mtime_ns)
+        firma = list(firma)
+        with self._lock:
+            entrada = self._indice.get(ruta)
+        if entrada and entrada[:2] == firma:
+            return entrada[2]
+
+        huella = huella_contenido(ruta)
+        with self._lock:
+            self._indice[ruta] = firma + [huella]
+            self._indice_modificado = True
+        return huella
+
+    @staticmethod
+    def opciones(model_id, idioma=None, traducir=False, chunk_length_s=30, segmentacion="pipeline", vad=None, backend="torch",
+                 bilingue=False, timestamps="segmento", deteccion_idioma="por_ventana"):
+        """
+        Opciones que cambian el resultado de la transcripción y forman parte de la clave.
+        deteccion_idioma: sin idioma forzado, cómo se eligió ("previa" = pre-paso por
+        archivo, con idioma = el detectado; "por_archivo"; "por_ventana" = Whisper en cada ventana)
+        """
+        if bilingue:
+            tarea = "transcribe+translate"
+        else:
+            tarea = "translate" if traducir else "transcribe"
+        return {
+            "model_id": model_id,
+            "idioma": idioma or "auto",
+            "task": tarea,
+            "chunk_length_s": chunk_length_s,
+            "segmentacion": segmentacion,
+            "vad": vad,
+            "backend": backend,
+            "timestamps": timestamps,
+            "deteccion_idioma": deteccion_idioma,
+        }
+
+    def clave(self, archivo_path, opciones):
+        texto = json.dumps({"huella": self.huella(archivo_path), **opciones}, sort_keys=True)
+        return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+    def _ruta_entrada(self, clave):
+        # Dos niveles para no acumular miles de archivos en un solo directorio
+        return self.directorio / clave[:2] / f"{clave}.json"
+
+    def obtener(self, archivo_path, opciones):
+        """Devuelve el resultado guardado o None si no está en caché"""
+        try:
+            ruta = self._ruta_entrada(self.clave(archivo_path, opciones))
+            with open(ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.fallos += 1
+            return None
+
+        if datos.get("version") != VERSION_CACHE:
+            self.fallos += 1
+            return None
+
+        resultado = datos["resultado"]
+        # El archivo pudo moverse: la ruta actual manda
+        resultado["archivo"] = str(archivo_path)
+        # JSON convierte las tuplas de timestamps en listas
+        for chunk in resultado.get("chunks", []):
+            chunk["timestamp"] = tuple(chunk["timestamp"])
+        resultado["desde_cache"] = True
+        self.aciertos += 1
+        return resultado
+
+    def guardar(self, archivo_path, opciones, resultado):
+        """Guarda un resultado exitoso en la caché"""
+        if "error" in resultado:
+            return
+        try:
+            ruta = self._ruta_entrada(self.clave(archivo_path, opciones))
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            datos = {
+                "version": VERSION_CACHE,
+                "opciones": opciones,
+                "resultado": {k: v for k, v in resultado.items() if k not in ("desde_cache", "guardado")},
+            }
+            temporal = ruta.with_suffix('.tmp')
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(datos, f, ensure_ascii=False)
+            os.replace(temporal, ruta)
+        except OSError as e:
+            logger.warning(f"⚠️  No se pudo guardar en caché {archivo_path}: {e}")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Cliente ligero para el demonio de Fast PyTranscriptor
+No importa torch ni transformers: solo envía rutas al demonio y espera el resultado.
+"""
+
+import sys
+import json
+import socket
+import argparse
+import http.client
+from pathlib import Path
+
+from subtitulos import FORMATOS
+
+PUERTO_DEFAULT = 8765
+
+class ConexionUnix(http.client.HTTPConnection):
+    def __init__(self, ruta_socket, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.ruta_socket = ruta_socket
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.ruta_socket)
+
+def enviar_trabajo(datos, puerto=PUERTO_DEFAULT, ruta_socket=None):
+    """Envía un trabajo al demonio y devuelve la respuesta JSON"""
+    conexion = ConexionUnix(ruta_socket) if ruta_socket else http.client.HTTPConnection("127.0.0.1", puerto)
+    try:
+        cuerpo = json.dumps(datos).encode("utf-8")
+        conexion.request("POST", "/trabajos", body=cuerpo, headers={"Content-Type": "application/json"})
+        respuesta = conexion.getresponse()
+        contenido = json.loads(respuesta.read() or b"{}")
+        if respuesta.status != 200:
+            raise RuntimeError(contenido.get("error", f"HTTP {respuesta.status}"))
+        return contenido
+    finally:
+        conexion.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Envía archivos al demonio de transcripción')
+    parser.add_argument('archivos', nargs='+', help='Archivos de audio/video')
+    parser.add_argument('-o', '--salida', default='./transcripciones',
+                        help='Directorio de salida (default: ./transcripciones)')
+    parser.add_argument('--idioma', help='Código de idioma. Auto-detecta si no se especifica')
+    parser.add_argument('--traducir', action='store_true', help='Traducir al inglés')
+    parser.add_argument('--formato', choices=FORMATOS, nargs='+', default=['txt'],
+                        help='Uno o más formatos de salida (default: txt)')
+    parser.add_argument('--prioridad', type=int, default=10,
+                        help='Prioridad del trabajo, menor = más urgente (default: 10)')
+    parser.add_argument('--no-esperar', action='store_true',
+                        help='Encolar y salir sin esperar el resultado')
+    parser.add_argument('--puerto', type=int, default=PUERTO_DEFAULT,
+                        help=f'Puerto del demonio (default: {PUERTO_DEFAULT})')
+    parser.add_argument('--socket', help='Socket Unix del demonio')
+    args = parser.parse_args()
+
+    try:
+        respuesta = enviar_trabajo({
+            # El demonio corre en el mismo host: rutas absolutas
+            "archivos": [str(Path(a).resolve()) for a in args.archivos],
+            "salida": str(Path(args.salida).resolve()),
+            "idioma": args.idioma,
+            "traducir": args.traducir,
+            "formato": args.formato,
+            "prioridad": args.prioridad,
+            "esperar": not args.no_esperar,
+        }, puerto=args.puerto, ruta_socket=args.socket)
+    except (OSError, RuntimeError) as e:
+        print(f"❌ Error comunicando con el demonio: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.no_esperar:
+        print(f"📥 Trabajo encolado: {respuesta['id']}")
+        return
+
+    errores = [r for r in respuesta.get("resultados") or [] if "error" in r]
+    print(f"✅ Trabajo {respuesta['id']}: {len(args.archivos) - len(errores)}/{len(args.archivos)} "
+          f"en {respuesta['segundos']:.1f}s")
+    for error in errores:
+        print(f"  - {error['archivo']}: {error['error']}", file=sys.stderr)
+    if errores:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
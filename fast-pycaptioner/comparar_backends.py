@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Comparación de backends de inferencia (precisión vs velocidad)
+Transcribe un corpus pequeño con cada backend y reporta tiempo de carga,
+RTF (tiempo de proceso / duración del audio) y WER contra transcripciones de
+referencia (archivo .txt con el mismo nombre que cada audio).
+
+Ejemplo:
+  python comparar_backends.py ./corpus --backends torch int8 onnx --idioma es
+"""
+
+import gc
+import sys
+import json
+import time
+import argparse
+import logging
+
+from main import TranscriptorGPU, obtener_archivos_audio
+from backends import BACKENDS
+from audio_utils import SAMPLE_RATE, decodificar_audio
+from metricas import calcular_wer
+
+logger = logging.getLogger(__name__)
+
+def cargar_corpus(directorio):
+    """Devuelve [(archivo, referencia o None, duracion_s), ...]"""
+    corpus = []
+    for archivo in obtener_archivos_audio(directorio):
+        ruta_referencia = archivo.with_suffix(".txt")
+        referencia = ruta_referencia.read_text(encoding="utf-8") if ruta_referencia.exists() else None
+        duracion = len(decodificar_audio(archivo)) / SAMPLE_RATE
+        corpus.append((archivo, referencia, duracion))
+    return corpus
+
+def evaluar_backend(backend, corpus, idioma=None, device_id=0):
+    """Carga el backend, transcribe el corpus y devuelve las métricas"""
+    inicio = time.perf_counter()
+    transcriptor = TranscriptorGPU(device_id=device_id, backend=backend)
+    tiempo_carga = time.perf_counter() - inicio
+
+    # Calentamiento: la primera llamada incluye compilación/asignación de buffers
+    transcriptor.transcribir_archivo(corpus[0][0], idioma)
+
+    tiempo_total = 0.0
+    wers = []
+    for archivo, referencia, _ in corpus:
+        inicio = time.perf_counter()
+        resultado = transcriptor.transcribir_archivo(archivo, idioma)
+        tiempo_total += time.perf_counter() - inicio
+        if "error" in resultado:
+            raise RuntimeError(resultado["error"])
+        if referencia is not None:
+            wers.append(calcular_wer(referencia, resultado["texto"]))
+
+    duracion_total = sum(d for _, _, d in corpus)
+    # Cómo agrupa cada backend: el pipeline de transformers arma lotes de ventanas,
+    # faster-whisper solo con los tramos de cada audio
+    lotes = getattr(transcriptor.pipe, "modo_lotes", f"ventanas en lotes de {transcriptor.batch_size}")
+    del transcriptor
+    gc.collect()
+
+    return {
+        "backend": backend,
+        "carga_s": tiempo_carga,
+        "proceso_s": tiempo_total,
+        "rtf": tiempo_total / duracion_total if duracion_total else None,
+        "wer": sum(wers) / len(wers) if wers else None,
+        "lotes": lotes,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara backends de inferencia en un corpus con referencias')
+    parser.add_argument('corpus', help='Directorio con audios y sus referencias .txt')
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS),
+                        help='Backends a comparar (default: todos)')
+    parser.add_argument('--idioma', help='Código de idioma del corpus')
+    parser.add_argument('--gpu', type=int, default=0, help='ID de GPU a usar (default: 0)')
+    parser.add_argument('--json', help='Guardar el reporte en este archivo JSON')
+    args = parser.parse_args()
+
+    corpus = cargar_corpus(args.corpus)
+    if not corpus:
+        logger.error("❌ No se encontraron archivos de audio")
+        sys.exit(1)
+    logger.info(f"📁 Corpus: {len(corpus)} archivo(s), {sum(d for _, _, d in corpus):.1f}s de audio")
+
+    reporte = []
+    for backend in args.backends:
+        try:
+            reporte.append(evaluar_backend(backend, corpus, args.idioma, args.gpu))
+        except Exception as e:
+            logger.error(f"❌ Backend {backend} falló: {e}")
+            reporte.append({"backend": backend, "error": str(e)})
+
+    base = next((r for r in reporte if r["backend"] == "torch" and "error" not in r), None)
+    print(f"\n{'backend':<12} {'carga (s)':>10} {'RTF':>8} {'speedup':>8} {'WER':>8}")
+    for r in reporte:
+        if "error" in r:
+            print(f"{r['backend']:<12} error: {r['error']}")
+            continue
+        speedup = f"{base['rtf'] / r['rtf']:.2f}x" if base and r["rtf"] else "-"
+        wer = f"{r['wer'] * 100:.1f}%" if r["wer"] is not None else "-"
+        print(f"{r['backend']:<12} {r['carga_s']:>10.1f} {r['rtf']:>8.3f} {speedup:>8} {wer:>8}")
+    print("\nLotes por backend:")
+    for r in reporte:
+        if "error" not in r:
+            print(f"  {r['backend']:<12} {r['lotes']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Decodificación de audio en paralelo para Fast PyTranscriptor
+Un pool de procesos decodifica y re-muestrea a float32 16 kHz mientras la
+inferencia consume los resultados desde una cola acotada (productor/consumidor).
+
+Los procesos se crean con "spawn" (no heredan hilos, locks ni CUDA del proceso
+que tiene el modelo cargado) y cada audio vuelve como un .npy temporal: el
+proceso principal lo mapea en memoria en vez de recibir el array serializado.
+"""
+
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+from audio_utils import SAMPLE_RATE, decodificar_audio
+
+logger = logging.getLogger(__name__)
+
+# Marca de fin de la cola
+_FIN = object()
+
+def _decodificar_a_npy(archivo, sampling_rate, directorio, idx):
+    """Decodifica en el proceso hijo y deja el audio en un .npy; devuelve su ruta"""
+    ruta = os.path.join(directorio, f"{idx}.npy")
+    np.save(ruta, decodificar_audio(archivo, sampling_rate))
+    return ruta
+
+def _cargar_npy(ruta):
+    """Mapea el .npy y lo borra: el mapeo sigue válido hasta que se libera el array"""
+    try:
+        return np.load(ruta, mmap_mode='r')
+    finally:
+        os.remove(ruta)
+
+class DecodificadorParalelo:
+    def __init__(self, num_procesos=None, max_en_cola=4, sampling_rate=SAMPLE_RATE):
+        """
+        num_procesos: procesos decodificadores (default: min(4, nproc))
+        max_en_cola: archivos decodificados que pueden esperar a la inferencia.
+                     Acota la memoria: con la cola llena los decodificadores esperan.
+        """
+        self.num_procesos = num_procesos or min(4, os.cpu_count() or 1)
+        self.max_en_cola = max_en_cola
+        self.sampling_rate = sampling_rate
+
+    def _poner(self, cola, item, detener):
+        """put() bloqueante que se puede cancelar si el consumidor terminó"""
+        while not detener.is_set():
+            try:
+                cola.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _productor(self, archivos, cola, detener, directorio):
+        # Archivos en vuelo = procesos ocupados + los que esperan sitio en la cola
+        limite = self.num_procesos + self.max_en_cola
+        try:
+            with ProcessPoolExecutor(max_workers=self.num_procesos,
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                en_vuelo = {}
+
+                def entregar(futuros):
+                    for futuro in futuros:
+                        idx, archivo = en_vuelo.pop(futuro)
+                        try:
+                            item = (idx, archivo, _cargar_npy(futuro.result()), None)
+                        except Exception as e:
+                            item = (idx, archivo, None, e)
+                        if not self._poner(cola, item, detener):
+                            return False
+                    return True
+
+                for idx, archivo in enumerate(archivos):
+                    if detener.is_set():
+                        break
+                    while len(en_vuelo) >= limite:
+                        listos, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                        if not entregar(listos):
+                            break
+                    futuro = pool.submit(_decodificar_a_npy, archivo, self.sampling_rate, directorio, idx)
+                    en_vuelo[futuro] = (idx, archivo)
+
+                while en_vuelo and not detener.is_set():
+                    listos, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                    entregar(listos)
+
+                if detener.is_set():
+                    for futuro in en_vuelo:
+                        futuro.cancel()
+        except Exception as e:
+            logger.error(f"❌ Error en el pool de decodificación: {e}")
+        finally:
+            self._poner(cola, _FIN, detener)
+
+    def iterar(self, archivos):
+        """Genera (idx, archivo, audio, error) en orden de finalización de la decodificación"""
+        cola = queue.Queue(maxsize=self.max_en_cola)
+        detener = threading.Event()
+        directorio = tempfile.mkdtemp(prefix="fast-pycaptioner-audio-")
+        # archivos puede ser un generador (p. ej. EscanerArchivos): se consume a medida que se decodifica
+        hilo = threading.Thread(target=self._productor, args=(archivos, cola, detener, directorio), daemon=True)
+        hilo.start()
+        try:
+            while True:
+                item = cola.get()
+                if item is _FIN:
+                    break
+                yield item
+        finally:
+            # Si el consumidor se detiene antes de tiempo, liberar al productor
+            detener.set()
+            hilo.join()
+            # .npy de archivos cancelados o que nadie llegó a consumir
+            shutil.rmtree(directorio, ignore_errors=True)
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Demonio de transcripción para Fast PyTranscriptor
+Mantiene el modelo cargado y acepta trabajos por HTTP local o socket Unix.
+Los trabajos entran a una cola con prioridad; el worker junta los trabajos
+compatibles (mismo idioma/tarea) que estén listos y los transcribe juntos con
+el planificador por lotes, así muchos clips cortos comparten lotes llenos.
+Un trabajo terminado se descarta en cuanto se entrega su resultado, y los que
+nadie consulta expiran por tiempo o por cantidad. Las salidas solo se escriben
+dentro de los directorios permitidos (--salida-permitida).
+
+Uso:
+  python demonio.py --puerto 8765
+  python demonio.py --socket /tmp/fast-pycaptioner.sock
+  python cliente.py audio1.mp3 audio2.mp3 -o ./salida --prioridad 0
+"""
+
+import os
+import json
+import time
+import heapq
+import uuid
+import argparse
+import threading
+import itertools
+import logging
+import socketserver
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from main import TranscriptorGPU, MODEL_ID, guardar_resultados
+from backends import BACKENDS
+from planificador_lotes import PlanificadorLotes
+from decodificacion_paralela import DecodificadorParalelo
+from cache_transcripciones import CacheTranscripciones
+from cliente import PUERTO_DEFAULT
+
+logger = logging.getLogger(__name__)
+
+ESTADOS_FINALES = ("terminado", "error")
+
+class Trabajo:
+    def __init__(self, archivos, idioma=None, traducir=False, formato='txt', salida=None, prioridad=10):
+        self.id = uuid.uuid4().hex[:12]
+        self.archivos = [str(a) for a in archivos]
+        self.idioma = idioma
+        self.traducir = bool(traducir)
+        self.formato = formato
+        self.salida = salida
+        self.prioridad = prioridad
+        self.estado = "en_cola"
+        self.resultados = None
+        self.creado = time.time()
+        self.terminado = None
+        self.evento = threading.Event()
+
+    @property
+    def configuracion(self):
+        """Trabajos con la misma configuración pueden compartir lotes"""
+        return (self.idioma, self.traducir)
+
+    @property
+    def finalizado(self):
+        return self.estado in ESTADOS_FINALES
+
+    def a_dict(self):
+        return {
+            "id": self.id,
+            "estado": self.estado,
+            "prioridad": self.prioridad,
+            "archivos": self.archivos,
+            "resultados": self.resultados,
+            "segundos": (self.terminado or time.time()) - self.creado,
+        }
+
+class ColaPrioridad:
+    def __init__(self):
+        """Cola con prioridad (menor número = más urgente, FIFO dentro de la misma prioridad)"""
+        self._heap = []
+        self._orden = itertools.count()
+        self._condicion = threading.Condition()
+
+    def __len__(self):
+        with self._condicion:
+            return len(self._heap)
+
+    def poner(self, trabajo):
+        with self._condicion:
+            heapq.heappush(self._heap, (trabajo.prioridad, next(self._orden), trabajo))
+            self._condicion.notify()
+
+    def tomar_lote(self, max_archivos, espera_s=0.05, timeout=None):
+        """
+        Bloquea hasta que haya trabajo. Toma el más urgente y le suma los trabajos
+        compatibles en cola, hasta max_archivos. Espera espera_s para que una ráfaga
+        de peticiones alcance a entrar en el mismo lote.
+        """
+        with self._condicion:
+            if not self._condicion.wait_for(lambda: self._heap, timeout=timeout):
+                return []
+        time.sleep(espera_s)
+
+        with self._condicion:
+            if not self._heap:
+                return []
+            _, _, primero = heapq.heappop(self._heap)
+            lote = [primero]
+            total = len(primero.archivos)
+            restantes = []
+            while self._heap:
+                item = heapq.heappop(self._heap)
+                trabajo = item[2]
+                if trabajo.configuracion == primero.configuracion and total + len(trabajo.archivos) <= max_archivos:
+                    lote.append(trabajo)
+                    total += len(trabajo.archivos)
+                else:
+                    restantes.append(item)
+            for item in restantes:
+                heapq.heappush(self._heap, item)
+            return lote
+
+class ServicioTranscripcion:
+    def __init__(self, transcriptor, max_archivos_lote=64, procesos_decodificacion=None, cache=None,
+                 ttl_trabajos_s=3600.0, max_trabajos_terminados=1000, salidas_permitidas=None):
+        """
+        ttl_trabajos_s / max_trabajos_terminados: los terminados que nadie consulta
+        se descartan pasado ese tiempo o, los más viejos, al superar esa cantidad.
+        salidas_permitidas: directorios donde los clientes pueden pedir que se
+        escriba la salida (default: el directorio de trabajo del demonio).
+        """
+        self.transcriptor = transcriptor
+        self.max_archivos_lote = max_archivos_lote
+        self.cola = ColaPrioridad()
+        self.trabajos = {}
+        self.ttl_trabajos_s = ttl_trabajos_s
+        self.max_trabajos_terminados = max_trabajos_terminados
+        self.salidas_permitidas = [Path(d).resolve() for d in (salidas_permitidas or [os.getcwd()])]
+        self._lock_trabajos = threading.Lock()
+        self.cache = cache
+        decodificador = DecodificadorParalelo(procesos_decodificacion) if procesos_decodificacion != 0 else None
+        self.planificador = PlanificadorLotes(transcriptor, decodificador=decodificador)
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join(timeout=5)
+
+    def validar_salida(self, salida):
+        """Ruta de salida resuelta si está dentro de un directorio permitido; si no, ValueError"""
+        ruta = Path(salida).resolve()
+        if not any(ruta == base or base in ruta.parents for base in self.salidas_permitidas):
+            raise ValueError(f"salida fuera de los directorios permitidos: {salida}")
+        return str(ruta)
+
+    def enviar(self, trabajo):
+        with self._lock_trabajos:
+            self._purgar()
+            self.trabajos[trabajo.id] = trabajo
+        self.cola.poner(trabajo)
+        logger.info(f"📥 Trabajo {trabajo.id}: {len(trabajo.archivos)} archivo(s), prioridad {trabajo.prioridad}")
+        return trabajo
+
+    def consultar(self, id_trabajo):
+        """Estado del trabajo; si ya terminó, se entrega una sola vez y se descarta"""
+        with self._lock_trabajos:
+            trabajo = self.trabajos.get(id_trabajo)
+            if trabajo is not None and trabajo.finalizado:
+                del self.trabajos[id_trabajo]
+        return trabajo
+
+    def retirar(self, trabajo):
+        """Descarta un trabajo terminado cuyo resultado ya se entregó"""
+        with self._lock_trabajos:
+            self.trabajos.pop(trabajo.id, None)
+
+    def _purgar(self):
+        """Descarta terminados vencidos y, si sobran, los más viejos (con _lock_trabajos tomado)"""
+        ahora = time.time()
+        terminados = sorted((t for t in self.trabajos.values() if t.finalizado), key=lambda t: t.terminado)
+        vencidos = [t for t in terminados if ahora - t.terminado > self.ttl_trabajos_s]
+        sobrantes = terminados[len(vencidos):][:max(0, len(terminados) - len(vencidos) - self.max_trabajos_terminados)]
+        for trabajo in vencidos + sobrantes:
+            del self.trabajos[trabajo.id]
+
+    def _opciones_cache(self, trabajo):
+        # Misma clave que main.py: con idioma forzado no hay detección; sin él, Whisper detecta en cada ventana
+        return CacheTranscripciones.opciones(MODEL_ID, trabajo.idioma, trabajo.traducir, segmentacion="ventanas",
+                                             backend=self.transcriptor.backend,
+                                             deteccion_idioma=None if trabajo.idioma else "por_ventana")
+
+    def _procesar_lote(self, lote):
+        idioma, traducir = lote[0].configuracion
+        por_archivo = {}
+        pendientes = []
+        for trabajo in lote:
+            trabajo.estado = "procesando"
+            for archivo in trabajo.archivos:
+                if archivo in por_archivo or archivo in pendientes:
+                    continue
+                resultado = self.cache.obtener(archivo, self._opciones_cache(trabajo)) if self.cache else None
+                if resultado is not None:
+                    por_archivo[archivo] = resultado
+                else:
+                    pendientes.append(archivo)
+
+        if pendientes:
+            logger.info(f"🔄 Lote de {len(lote)} trabajo(s), {len(pendientes)} archivo(s) por transcribir")
+            for resultado in self.planificador.iterar(pendientes, idioma, traducir):
+                por_archivo[resultado["archivo"]] = resultado
+                if self.cache:
+                    self.cache.guardar(resultado["archivo"], self._opciones_cache(lote[0]), resultado)
+            if self.cache:
+                self.cache.guardar_indice()
+
+        for trabajo in lote:
+            trabajo.resultados = [por_archivo[a] for a in trabajo.archivos]
+            if trabajo.salida:
+                guardar_resultados(trabajo.resultados, trabajo.salida, trabajo.formato)
+            trabajo.estado = "terminado"
+            trabajo.terminado = time.time()
+            trabajo.evento.set()
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            lote = self.cola.tomar_lote(self.max_archivos_lote, timeout=0.5)
+            if not lote:
+                continue
+            try:
+                self._procesar_lote(lote)
+            except Exception as e:
+                logger.error(f"❌ Error procesando lote: {e}")
+                for trabajo in lote:
+                    trabajo.estado = "error"
+                    trabajo.resultados = [{"archivo": a, "error": str(e)} for a in trabajo.archivos]
+                    trabajo.terminado = time.time()
+                    trabajo.evento.set()
+            with self._lock_trabajos:
+                self._purgar()
+
+def crear_manejador(servicio):
+    class Manejador(BaseHTTPRequestHandler):
+        def address_string(self):
+            # En socket Unix client_address es una cadena vacía
+            return self.client_address[0] if self.client_address else "unix"
+
+        def log_message(self, formato, *args):
+            logger.debug(formato % args)
+
+        def _responder(self, codigo, datos):
+            cuerpo = json.dumps(datos, ensure_ascii=False, default=list).encode("utf-8")
+            self.send_response(codigo)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def do_GET(self):
+            if self.path == "/estado":
+                self._responder(200, {
+                    "modelo": MODEL_ID,
+                    "en_cola": len(servicio.cola),
+                    "trabajos": len(servicio.trabajos),
+                })
+            elif self.path.startswith("/trabajos/"):
+                trabajo = servicio.consultar(self.path.rsplit("/", 1)[-1])
+                if trabajo is None:
+                    self._responder(404, {"error": "Trabajo no encontrado"})
+                else:
+                    self._responder(200, trabajo.a_dict())
+            else:
+                self._responder(404, {"error": "Ruta no encontrada"})
+
+        def do_POST(self):
+            if self.path != "/trabajos":
+                self._responder(404, {"error": "Ruta no encontrada"})
+                return
+            try:
+                longitud = int(self.headers.get("Content-Length", 0))
+                datos = json.loads(self.rfile.read(longitud) or b"{}")
+                archivos = datos["archivos"]
+                faltantes = [a for a in archivos if not os.path.isfile(a)]
+                if faltantes:
+                    self._responder(400, {"error": f"No existen: {faltantes}"})
+                    return
+                trabajo = servicio.enviar(Trabajo(
+                    archivos,
+                    idioma=datos.get("idioma"),
+                    traducir=datos.get("traducir", False),
+                    formato=datos.get("formato", "txt"),
+                    salida=servicio.validar_salida(datos["salida"]) if datos.get("salida") else None,
+                    prioridad=int(datos.get("prioridad", 10)),
+                ))
+            except (KeyError, ValueError, TypeError) as e:
+                self._responder(400, {"error": f"Petición inválida: {e}"})
+                return
+
+            if datos.get("esperar", False):
+                trabajo.evento.wait()
+                # El resultado se entrega en esta respuesta: no hace falta retenerlo
+                servicio.retirar(trabajo)
+            self._responder(200, trabajo.a_dict())
+
+    return Manejador
+
+class ServidorUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def main():
+    parser = argparse.ArgumentParser(description='Demonio de transcripción con el modelo siempre cargado')
+    parser.add_argument('--puerto', type=int, default=PUERTO_DEFAULT,
+                        help=f'Puerto HTTP en 127.0.0.1 (default: {PUERTO_DEFAULT})')
+    parser.add_argument('--socket',
+                        help='Escuchar en un socket Unix en lugar de HTTP por TCP')
+    parser.add_argument('--max-archivos-lote', type=int, default=64,
+                        help='Máximo de archivos que se agrupan en un mismo lote (default: 64)')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help='Tamaño de lote para inferencia (default: 16 en GPU, 8 en CPU)')
+    parser.add_argument('--procesos-decodificacion', type=int, default=None,
+                        help='Procesos que decodifican audio, 0 = en línea (default: min(4, nproc))')
+    parser.add_argument('--salida-permitida', action='append', metavar='DIR',
+                        help='Directorio donde los clientes pueden escribir salidas; repetible (default: directorio actual)')
+    parser.add_argument('--ttl-trabajos', type=float, default=3600.0,
+                        help='Segundos que se retiene un trabajo terminado sin consultar (default: 3600)')
+    parser.add_argument('--max-trabajos-terminados', type=int, default=1000,
+                        help='Máximo de trabajos terminados retenidos sin consultar (default: 1000)')
+    parser.add_argument('--sin-cache', action='store_true',
+                        help='No usar la caché de transcripciones')
+    parser.add_argument('--backend', choices=BACKENDS, default='torch',
+                        help='Motor de inferencia (default: torch)')
+    parser.add_argument('--no-flash-attention', action='store_true',
+                        help='Desactivar Flash Attention 2')
+    parser.add_argument('--gpu', type=int, default=0,
+                        help='ID de GPU a usar (default: 0)')
+    args = parser.parse_args()
+
+    # La carga del modelo se paga una sola vez al arrancar el demonio
+    transcriptor = TranscriptorGPU(
+        device_id=args.gpu,
+        enable_flash_attention=not args.no_flash_attention,
+        batch_size=args.batch_size,
+        backend=args.backend
+    )
+    servicio = ServicioTranscripcion(
+        transcriptor,
+        max_archivos_lote=args.max_archivos_lote,
+        procesos_decodificacion=args.procesos_decodificacion,
+        cache=None if args.sin_cache else CacheTranscripciones(),
+        ttl_trabajos_s=args.ttl_trabajos,
+        max_trabajos_terminados=args.max_trabajos_terminados,
+        salidas_permitidas=args.salida_permitida
+    )
+    servicio.iniciar()
+
+    manejador = crear_manejador(servicio)
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        servidor = ServidorUnix(args.socket, manejador)
+        logger.info(f"🟢 Demonio escuchando en {args.socket}")
+    else:
+        servidor = ThreadingHTTPServer(("127.0.0.1", args.puerto), manejador)
+        logger.info(f"🟢 Demonio escuchando en http://127.0.0.1:{args.puerto}")
+
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Deteniendo demonio...")
+    finally:
+        servidor.server_close()
+        servicio.detener()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Detección de idioma previa para Fast PyTranscriptor
+Sin --idioma, Whisper detecta el idioma por separado en cada ventana y un lote
+mezcla ventanas de idiomas distintos. Este pre-paso decodifica solo los
+primeros N segundos de cada archivo, detecta el idioma en lotes (encoder más
+un paso de decoder por clip, leyendo los logits de los tokens de idioma) y
+cachea el resultado por archivo. Después los archivos se
+agrupan por idioma para que cada lote corra con generate_kwargs fijos.
+"""
+
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from audio_utils import SAMPLE_RATE, decodificar_audio
+
+logger = logging.getLogger(__name__)
+
+SEGUNDOS_DETECCION = 30.0
+
+def idiomas_encoder(modelo, extractor, clips, device="cpu"):
+    """
+    Código de idioma por clip: features + encoder + un paso de decoder desde
+    <|startoftranscript|>, eligiendo el token de idioma con mayor logit. No
+    depende de que generate() llegue a emitir el token de idioma.
+    """
+    import torch
+
+    modelo = getattr(modelo, "_orig_mod", modelo)
+    dtype = next(modelo.parameters()).dtype if isinstance(modelo, torch.nn.Module) else torch.float32
+    features = extractor(clips, sampling_rate=SAMPLE_RATE, return_tensors="pt").input_features
+    features = features.to(device, dtype=dtype)
+    config = modelo.generation_config
+    codigos = {token_id: token.strip("<|>") for token, token_id in config.lang_to_id.items()}
+
+    with torch.inference_mode():
+        if hasattr(modelo, "detect_language"):
+            tokens = modelo.detect_language(features).view(-1).tolist()
+        else:
+            # ONNX Runtime no trae detect_language: el mismo cálculo sobre los logits
+            ids = torch.tensor(sorted(codigos))
+            inicio = torch.full((features.shape[0], 1), config.decoder_start_token_id, dtype=torch.long, device=features.device)
+            logits = modelo(input_features=features, decoder_input_ids=inicio).logits[:, -1].float().cpu()
+            tokens = ids[logits[:, ids].argmax(-1)].tolist()
+    return [codigos.get(t) for t in tokens]
+
+def _idiomas_whisper(transcriptor, clips):
+    """Modelo en este proceso (torch, int8, onnx)"""
+    return idiomas_encoder(transcriptor.model, transcriptor.processor.feature_extractor, clips, transcriptor.device)
+
+def _idiomas_replicas(transcriptor, clips):
+    """PoolTranscriptores: cada réplica corre idiomas_encoder con su modelo"""
+    return transcriptor.detectar_idiomas(clips)
+
+def _idiomas_ctranslate2(transcriptor, clips):
+    """faster-whisper detecta el idioma al iniciar transcribe (los segmentos son perezosos)"""
+    idiomas = []
+    for clip in clips:
+        _, info = transcriptor.pipe.modelo.transcribe(clip, beam_size=1)
+        idiomas.append(info.language)
+    return idiomas
+
+def _detector(transcriptor):
+    if getattr(transcriptor, "backend", None) == "ctranslate2":
+        return _idiomas_ctranslate2
+    if hasattr(transcriptor, "detectar_idiomas"):
+        return _idiomas_replicas
+    return _idiomas_whisper
+
+def idiomas_de_clips(transcriptor, clips):
+    """Código de idioma (o None) por clip ya decodificado, con el detector del backend"""
+    return _detector(transcriptor)(transcriptor, clips)
+
+def detectar_idiomas(transcriptor, archivos, segundos=SEGUNDOS_DETECCION, cache=None, batch_size=None, hilos=4):
+    """
+    Devuelve {str(archivo): código de idioma o None}. Los archivos con idioma
+    en caché no se decodifican; el resto se decodifica (solo los primeros
+    `segundos`) en hilos y se detecta en lotes.
+    """
+    batch_size = batch_size or transcriptor.batch_size
+    idiomas = {}
+    pendientes = []
+    for archivo in archivos:
+        idioma = cache.obtener_idioma(archivo, transcriptor.model_id, segundos) if cache else None
+        if idioma:
+            idiomas[str(archivo)] = idioma
+        else:
+            pendientes.append(archivo)
+    if not pendientes:
+        return idiomas
+
+    logger.info(f"🌐 Detectando idioma de {len(pendientes)} archivo(s) ({segundos:g}s de cada uno)...")
+    detector = _detector(transcriptor)
+
+    def decodificar(archivo):
+        try:
+            return archivo, decodificar_audio(archivo, duracion_s=segundos)
+        except Exception as e:
+            logger.warning(f"⚠️  No se pudo decodificar {archivo} para detectar el idioma: {e}")
+            return archivo, None
+
+    lote = []
+
+    def procesar(lote):
+        try:
+            detectados = detector(transcriptor, [clip for _, clip in lote])
+        except Exception as e:
+            logger.warning(f"⚠️  Falló la detección de idioma de {len(lote)} archivo(s): {e}")
+            detectados = [None] * len(lote)
+        for (archivo, _), idioma in zip(lote, detectados):
+            idiomas[str(archivo)] = idioma
+            if idioma and cache:
+                cache.guardar_idioma(archivo, transcriptor.model_id, segundos, idioma)
+
+    # ffmpeg corre como subproceso: los hilos solapan la decodificación con la detección
+    with ThreadPoolExecutor(max_workers=hilos) as executor:
+        for archivo, clip in executor.map(decodificar, pendientes):
+            if clip is None:
+                idiomas[str(archivo)] = None
+                continue
+            lote.append((archivo, clip))
+            if len(lote) >= batch_size:
+                procesar(lote)
+                lote = []
+    if lote:
+        procesar(lote)
+    return idiomas
+
+def agrupar_por_idioma(archivos, idiomas):
+    """OrderedDict idioma -> [archivos], el grupo más grande primero (None = no detectado)"""
+    grupos = OrderedDict()
+    for archivo in archivos:
+        grupos.setdefault(idiomas.get(str(archivo)), []).append(archivo)
+    return OrderedDict(sorted(grupos.items(), key=lambda g: -len(g[1])))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Diario de reintentos para Fast PyTranscriptor
+Registra el estado de cada archivo (ok / error) en un JSONL dentro del
+directorio de salida, una línea por resultado con flush inmediato. Si el
+proceso se cae a mitad de un lote grande, lo ya escrito sigue ahí y
+`--resume` procesa solo los archivos fallidos o que nunca terminaron.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+NOMBRE_DIARIO = ".fast-pycaptioner-diario.jsonl"
+
+class DiarioReintentos:
+    def __init__(self, directorio_salida):
+        self.ruta = Path(directorio_salida) / NOMBRE_DIARIO
+        self._lock = threading.Lock()
+        self._f = None
+
+    def estados(self):
+        """{archivo: entrada} con el último estado registrado de cada archivo"""
+        estados = {}
+        try:
+            with open(self.ruta, 'r', encoding='utf-8') as f:
+                for linea in f:
+                    try:
+                        entrada = json.loads(linea)
+                    except json.JSONDecodeError:
+                        # Última línea a medio escribir si el proceso se cayó
+                        continue
+                    estados[entrada["archivo"]] = entrada
+        except OSError:
+            pass
+        return estados
+
+    def completados(self):
+        return {archivo for archivo, e in self.estados().items() if e["estado"] == "ok"}
+
+    def fallidos(self):
+        return {archivo: e.get("error") for archivo, e in self.estados().items() if e["estado"] == "error"}
+
+    def pendientes(self, archivos):
+        """Archivos que fallaron o que no tienen registro (faltantes)"""
+        completados = self.completados()
+        return [a for a in archivos if str(a) not in completados]
+
+    def reiniciar(self):
+        """Empieza un diario nuevo (una corrida sin --resume)"""
+        with self._lock:
+            self._cerrar()
+            if self.ruta.exists():
+                os.remove(self.ruta)
+
+    def registrar(self, resultado):
+        entrada = {
+            "archivo": resultado["archivo"],
+            "estado": "error" if "error" in resultado else "ok",
+            "t": time.time(),
+        }
+        if "error" in resultado:
+            entrada["error"] = resultado["error"]
+        with self._lock:
+            if self._f is None:
+                self.ruta.parent.mkdir(parents=True, exist_ok=True)
+                self._f = open(self.ruta, 'a', encoding='utf-8')
+                if self._f.tell() > 0 and not self._termina_en_linea():
+                    # Cerrar la línea incompleta que dejó una corrida interrumpida
+                    self._f.write("\n")
+            self._f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+            self._f.flush()
+
+    def _termina_en_linea(self):
+        with open(self.ruta, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _cerrar(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def cerrar(self):
+        with self._lock:
+            self._cerrar()
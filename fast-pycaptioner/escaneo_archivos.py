@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Búsqueda de archivos de audio para Fast PyTranscriptor
+Un solo recorrido con os.scandir (en lugar de un rglob por extensión), con
+los subdirectorios de cada nivel listados en paralelo: en un NAS la latencia
+de cada listado domina y los hilos la solapan.
+
+Un índice persistente guarda, por directorio, su mtime y su contenido
+(subdirectorios y archivos de audio con tamaño y mtime). En las corridas
+siguientes solo se vuelven a listar los directorios cuyo mtime cambió (se
+agregó, borró o renombró algo dentro). Editar un archivo en su lugar no cambia
+el mtime del directorio, así que al reutilizar un listado se hace stat de cada
+archivo para que tamaño y mtime estén al día (sigue sin hacer falta el scandir).
+Esos tamaños y mtimes se entregan como firmas a la caché de transcripciones,
+que así no vuelve a hacer stat de cada archivo: un stat por archivo en total.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONES_AUDIO = frozenset({'.mp3', '.wav', '.m4a', '.flac', '.ogg', '.opus', '.webm', '.mp4', '.avi', '.mkv'})
+DIRECTORIO_INDICE_DEFAULT = Path.home() / ".cache" / "fast-pycaptioner" / "indice_archivos"
+VERSION_INDICE = 1
+
+def _listar_directorio(directorio, extensiones):
+    """Un scandir: (subdirectorios, [(nombre, tamaño, mtime_ns), ...]) usando el stat que trae cada entrada"""
+    subdirectorios = []
+    archivos = []
+    try:
+        with os.scandir(directorio) as entradas:
+            for entrada in entradas:
+                try:
+                    if entrada.is_dir(follow_symlinks=False):
+                        subdirectorios.append(entrada.name)
+                    elif os.path.splitext(entrada.name)[1].lower() in extensiones and entrada.is_file():
+                        info = entrada.stat()
+                        archivos.append((entrada.name, info.st_size, info.st_mtime_ns))
+                except OSError:
+                    continue
+    except OSError as e:
+        logger.warning(f"⚠️  No se pudo listar {directorio}: {e}")
+    return subdirectorios, archivos
+
+def _restat(directorio, archivos):
+    """Tamaño y mtime actuales de los archivos de un listado reutilizado; None si alguno ya no está"""
+    actuales = []
+    for nombre, _, _ in archivos:
+        try:
+            info = os.stat(os.path.join(directorio, nombre))
+        except OSError:
+            # Borrado sin que cambie el mtime del directorio (p. ej. granularidad gruesa): listar de nuevo
+            return None
+        actuales.append((nombre, info.st_size, info.st_mtime_ns))
+    return actuales
+
+class EscanerArchivos:
+    def __init__(self, extensiones=EXTENSIONES_AUDIO, hilos=8, directorio_indice=None, usar_indice=True):
+        """
+        hilos: directorios listados en paralelo (1 = secuencial)
+        usar_indice: guardar/usar el índice persistente por directorio
+        """
+        self.extensiones = frozenset(e.lower() for e in extensiones)
+        self.hilos = max(1, hilos)
+        self.directorio_indice = Path(directorio_indice or DIRECTORIO_INDICE_DEFAULT)
+        self.usar_indice = usar_indice
+        self.listados = 0
+        self.reutilizados = 0
+
+    def _ruta_indice(self, raiz):
+        clave = hashlib.sha256(f"{raiz}|{sorted(self.extensiones)}".encode('utf-8')).hexdigest()[:32]
+        return self.directorio_indice / f"{clave}.json"
+
+    def _cargar_indice(self, raiz):
+        if not self.usar_indice:
+            return {}
+        try:
+            with open(self._ruta_indice(raiz), 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            return datos["directorios"] if datos.get("version") == VERSION_INDICE else {}
+        except (OSError, json.JSONDecodeError, KeyError):
+            return {}
+
+    def _guardar_indice(self, raiz, directorios):
+        if not self.usar_indice:
+            return
+        ruta = self._ruta_indice(raiz)
+        try:
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            temporal = ruta.with_suffix('.tmp')
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump({"version": VERSION_INDICE, "raiz": raiz, "directorios": directorios}, f)
+            os.replace(temporal, ruta)
+        except OSError as e:
+            logger.warning(f"⚠️  No se pudo guardar el índice de archivos: {e}")
+
+    def _visitar(self, directorio, indice):
+        """Contenido de un directorio: del índice si su mtime no cambió, si no un scandir nuevo"""
+        try:
+            mtime_ns = os.stat(directorio).st_mtime_ns
+        except OSError:
+            return directorio, None
+        previo = indice.get(directorio)
+        if previo is not None and previo["mtime_ns"] == mtime_ns:
+            archivos = _restat(directorio, previo["archivos"])
+            if archivos is not None:
+                return directorio, dict(previo, archivos=archivos, reutilizado=True)
+        subdirectorios, archivos = _listar_directorio(directorio, self.extensiones)
+        return directorio, {"mtime_ns": mtime_ns, "subdirectorios": subdirectorios, "archivos": archivos}
+
+    def iterar(self, raiz):
+        """
+        Genera (ruta, tamaño, mtime_ns) de cada archivo de audio bajo raiz, nivel
+        por nivel, a medida que se listan los directorios (sin esperar el árbol entero)
+        """
+        raiz = os.path.abspath(raiz)
+        indice = self._cargar_indice(raiz)
+        nuevo_indice = {}
+        nivel = [raiz]
+        with ThreadPoolExecutor(max_workers=self.hilos) as executor:
+            while nivel:
+                siguiente = []
+                for directorio, contenido in executor.map(lambda d: self._visitar(d, indice), nivel):
+                    if contenido is None:
+                        continue
+                    if contenido.pop("reutilizado", False):
+                        self.reutilizados += 1
+                    else:
+                        self.listados += 1
+                    nuevo_indice[directorio] = contenido
+                    siguiente.extend(os.path.join(directorio, d) for d in contenido["subdirectorios"])
+                    for nombre, tamano, mtime_ns in contenido["archivos"]:
+                        yield Path(directorio, nombre), tamano, mtime_ns
+                nivel = siguiente
+        # Solo se guarda tras un recorrido completo (los directorios borrados desaparecen del índice)
+        self._guardar_indice(raiz, nuevo_indice)
+        logger.debug(f"Escaneo de {raiz}: {self.listados} directorio(s) listados, {self.reutilizados} desde el índice")
+
+    def archivos(self, raiz, firmas=None):
+        """
+        Lista ordenada de rutas de audio bajo raiz. Si se pasa firmas (dict), se
+        llena con {ruta: (tamaño, mtime_ns)} para CacheTranscripciones.
+        """
+        rutas = []
+        for ruta, tamano, mtime_ns in self.iterar(raiz):
+            rutas.append(ruta)
+            if firmas is not None:
+                firmas[str(ruta)] = (tamano, mtime_ns)
+        return sorted(rutas)
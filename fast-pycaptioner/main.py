@@ -8,50 +8,98 @@ Fast PyTranscriptor - Utilidad de Transcripción de Audio MVP
 """
 
 import argparse
-import torch
 from pathlib import Path
-from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import multiprocessing as mp
 from tqdm import tqdm
 import os
 import sys
 import logging
-from traductor_bidireccional import agregar_traduccion_bidireccional
+from planificador_lotes import PlanificadorLotes
+from decodificacion_paralela import DecodificadorParalelo
+from cache_transcripciones import CacheTranscripciones
+from vad import crear_detector, DETECTORES
+from subtitulos import FORMATOS, RestriccionesSubtitulos, guardar_subtitulos
+from transcripcion_streaming import transcribir_archivo_streaming
+from transcripcion_dual import transcribir_y_traducir
+from diario_reintentos import DiarioReintentos
+from escaneo_archivos import EXTENSIONES_AUDIO, EscanerArchivos
+from deteccion_idioma import SEGUNDOS_DETECCION, detectar_idiomas, agrupar_por_idioma
+from pool_modelos import PoolTranscriptores
+from backends import BACKENDS, cargar_modelo_int8, cargar_modelo_onnx, PipeCTranslate2
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# torch, transformers y MarianMT se importan solo cuando hace falta un modelo:
+# `--help` o una corrida sin archivos pendientes no pagan su carga
+
+# Modelo optimizado
+MODEL_ID = "openai/whisper-large-v3-turbo"
+
 class TranscriptorGPU:
-    def __init__(self, device_id=0, enable_flash_attention=True, ignore_warning=True):
+    def __init__(self, device_id=0, enable_flash_attention=True, ignore_warning=True, batch_size=None, backend="torch", dtype=None):
         """Inicializa el transcriptor con optimizaciones para RTX 3060"""
+        import torch
+        from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline
+        
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
+        self.backend = backend
         self.device = f"cuda:{device_id}" if torch.cuda.is_available() else "cpu"
-        self.dtype = torch.float16 if torch.cuda.is_available() else torch.float32
+        if backend == "int8" and self.device != "cpu":
+            # La cuantización dinámica de PyTorch solo tiene kernels de CPU
+            logger.warning("⚠️  El backend int8 solo corre en CPU, ignorando la GPU")
+            self.device = "cpu"
+        if dtype is not None:
+            # p. ej. "float32", "float16", "bfloat16"
+            self.dtype = getattr(torch, dtype) if isinstance(dtype, str) else dtype
+        else:
+            self.dtype = torch.float16 if self.device != "cpu" else torch.float32
+        # Mayor batch para GPU; en CPU el planificador por lotes también se beneficia de lotes llenos
+        self.batch_size = batch_size or (16 if self.device != "cpu" else 8)
         
         # Verificar GPU
-        if torch.cuda.is_available():
+        if self.device != "cpu":
+            # Configurar para mejor rendimiento en GPU
+            torch.backends.cudnn.benchmark = True
+            torch.backends.cuda.matmul.allow_tf32 = True
             gpu_name = torch.cuda.get_device_name(device_id)
             logger.info(f"🎮 GPU detectada: {gpu_name}")
             logger.info(f"💾 VRAM disponible: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.2f} GB")
         else:
             logger.warning("⚠️  No se detectó GPU, usando CPU")
         
-        # Modelo optimizado
-        self.model_id = "openai/whisper-large-v3-turbo"
+        self.model_id = MODEL_ID
         
-        # Cargar modelo con optimizaciones
-        logger.info("📥 Cargando modelo Whisper Large v3 Turbo...")
-        self.model = AutoModelForSpeechSeq2Seq.from_pretrained(
-            self.model_id,
-            dtype=self.dtype,
-            low_cpu_mem_usage=True,
-            use_safetensors=True,
-            attn_implementation="flash_attention_2" if enable_flash_attention and self.device != "cpu" else "eager"
-        )
+        logger.info(f"📥 Cargando modelo Whisper Large v3 Turbo (backend {backend})...")
+        if backend == "ctranslate2":
+            # CTranslate2 trae su propio pipeline (segmentación y timestamps)
+            self.pipe = PipeCTranslate2(self.model_id, self.device, batch_size=self.batch_size)
+            self.model = self.pipe.modelo
+            self.processor = None
+            logger.info("✅ Modelo cargado y optimizado")
+            return
+        elif backend == "int8":
+            self.model = cargar_modelo_int8(self.model_id)
+        elif backend == "onnx":
+            self.model = cargar_modelo_onnx(self.model_id, self.device)
+        else:
+            # Cargar modelo con optimizaciones
+            self.model = AutoModelForSpeechSeq2Seq.from_pretrained(
+                self.model_id,
+                dtype=self.dtype,
+                low_cpu_mem_usage=True,
+                use_safetensors=True,
+                # Flash Attention 2 solo soporta fp16/bf16
+                attn_implementation="flash_attention_2"
+                if enable_flash_attention and self.device != "cpu" and self.dtype in (torch.float16, torch.bfloat16)
+                else "eager"
+            )
         
         # Optimizaciones adicionales
-        if self.device != "cpu":
+        if backend == "torch" and self.device != "cpu":
             self.model = self.model.to(self.device)
             # Compilar modelo para mayor velocidad (PyTorch 2.0+)
             if hasattr(torch, 'compile'):
@@ -61,6 +109,10 @@ class TranscriptorGPU:
         self.processor = AutoProcessor.from_pretrained(self.model_id)
         
         # Pipeline optimizado
+        opciones_pipe = {}
+        if backend != "onnx":
+            # ONNX Runtime gestiona su propio dispositivo (provider) y precisión
+            opciones_pipe = {"dtype": self.dtype, "device": self.device}
         self.pipe = pipeline(
             "automatic-speech-recognition",
             model=self.model,
@@ -68,9 +120,8 @@ class TranscriptorGPU:
             feature_extractor=self.processor.feature_extractor,
             max_new_tokens=128,
             chunk_length_s=30,
-            batch_size=16 if self.device != "cpu" else 1,  # Mayor batch para GPU
-            dtype=self.dtype,
-            device=self.device,
+            batch_size=self.batch_size,
+            **opciones_pipe
         )
         
         logger.info("✅ Modelo cargado y optimizado")
@@ -116,23 +167,60 @@ class TranscriptorGPU:
                 "error": str(e)
             }
 
-def obtener_archivos_audio(ruta):
-    """Obtiene todos los archivos de audio de una ruta"""
-    extensiones_audio = {'.mp3', '.wav', '.m4a', '.flac', '.ogg', '.opus', '.webm', '.mp4', '.avi', '.mkv'}
+    def transcribir_y_traducir(self, archivo_path, idioma_origen=None):
+        """Texto nativo y traducción al inglés con una sola extracción de features por ventana"""
+        try:
+            logger.info(f"🎤 Procesando (nativo + inglés): {archivo_path}")
+            return transcribir_y_traducir(self, archivo_path, idioma_origen)
+        except Exception as e:
+            logger.error(f"❌ Error procesando {archivo_path}: {e}")
+            return {
+                "archivo": str(archivo_path),
+                "error": str(e)
+            }
+
+def cuda_disponible():
+    import torch
+    return torch.cuda.is_available()
+
+def obtener_archivos_audio(ruta, hilos=8, usar_indice=True, firmas=None):
+    """
+    Obtiene todos los archivos de audio de una ruta (un solo recorrido, con índice persistente).
+    firmas (dict): se llena con {ruta: (tamaño, mtime_ns)} de cada archivo encontrado
+    """
     ruta = Path(ruta)
     
     if ruta.is_file():
-        return [ruta] if ruta.suffix.lower() in extensiones_audio else []
+        return [ruta] if ruta.suffix.lower() in EXTENSIONES_AUDIO else []
     elif ruta.is_dir():
-        archivos = []
-        for ext in extensiones_audio:
-            archivos.extend(ruta.rglob(f"*{ext}"))
-        return sorted(archivos)
+        return EscanerArchivos(hilos=hilos, usar_indice=usar_indice).archivos(ruta, firmas)
     return []
 
-def procesar_archivos_paralelo(transcriptor, archivos, idioma, traducir, num_workers=2):
-    """Procesa múltiples archivos en paralelo usando threads"""
-    resultados = []
+def recoger_en_orden(archivos, resultados, al_completar=None):
+    """
+    Resultados en el orden de archivos. Un archivo sin resultado (p. ej. el pool
+    de decodificación se cayó antes de entregarlo) cuenta como error y se
+    entrega a al_completar, así queda en el diario para --resume.
+    """
+    ordenados = []
+    for archivo in archivos:
+        resultado = resultados.get(str(archivo))
+        if resultado is None:
+            logger.error(f"❌ Sin resultado para {archivo}")
+            resultado = {"archivo": str(archivo), "error": "no procesado"}
+            resultados[str(archivo)] = resultado
+            if al_completar:
+                al_completar(resultado)
+        ordenados.append(resultado)
+    return ordenados
+
+def procesar_archivos_paralelo(transcriptor, archivos, idioma, traducir, num_workers=2, al_completar=None):
+    """
+    Procesa múltiples archivos en paralelo usando threads. Cada resultado se
+    entrega a al_completar en cuanto termina (en orden de finalización); un
+    archivo que falla no detiene al resto.
+    """
+    resultados = {}
     
     with ThreadPoolExecutor(max_workers=num_workers) as executor:
         # Crear tareas
@@ -145,56 +233,52 @@ def procesar_archivos_paralelo(transcriptor, archivos, idioma, traducir, num_wor
             ): archivo for archivo in archivos
         }
         
-        # Procesar con barra de progreso
+        # Procesar con barra de progreso a medida que terminan
         with tqdm(total=len(archivos), desc="🔄 Transcribiendo") as pbar:
-            for futuro in futuros:
-                resultado = futuro.result()
-                resultados.append(resultado)
+            for futuro in as_completed(futuros):
+                archivo = futuros[futuro]
+                try:
+                    resultado = futuro.result()
+                except Exception as e:
+                    logger.error(f"❌ Error procesando {archivo}: {e}")
+                    resultado = {"archivo": str(archivo), "error": str(e)}
+                resultados[str(archivo)] = resultado
+                if al_completar:
+                    al_completar(resultado)
                 pbar.update(1)
     
-    return resultados
+    return recoger_en_orden(archivos, resultados, al_completar)
+
+def procesar_archivos_lotes(transcriptor, archivos, idioma, traducir, batch_size=None, procesos_decodificacion=None, vad=None,
+                            timestamps_palabra=False, al_completar=None):
+    """Procesa múltiples archivos empaquetando ventanas de 30 s de todos ellos en lotes llenos"""
+    # Decodificar en procesos aparte para que ffmpeg no deje al modelo ocioso
+    decodificador = DecodificadorParalelo(procesos_decodificacion) if procesos_decodificacion != 0 else None
+    detector = crear_detector(vad) if vad else None
+    planificador = PlanificadorLotes(transcriptor, batch_size=batch_size, decodificador=decodificador, vad=detector,
+                                     timestamps_palabra=timestamps_palabra)
+    resultados = {}
+    
+    with tqdm(total=len(archivos), desc="🔄 Transcribiendo (lotes)") as pbar:
+        for resultado in planificador.iterar(archivos, idioma, traducir):
+            resultados[resultado["archivo"]] = resultado
+            if al_completar:
+                al_completar(resultado)
+            pbar.update(1)
+    
+    return recoger_en_orden(archivos, resultados, al_completar)
 
-def guardar_resultados(resultados, directorio_salida, formato='txt'):
-    """Guarda los resultados en archivos"""
-    directorio_salida = Path(directorio_salida)
-    directorio_salida.mkdir(parents=True, exist_ok=True)
+def guardar_resultados(resultados, directorio_salida, formato='txt', restricciones=None):
+    """Guarda los resultados en uno o varios formatos (todos desde el mismo resultado, sin inferencia)"""
+    formatos = [formato] if isinstance(formato, str) else list(formato)
     
     for resultado in resultados:
-        if "error" in resultado:
+        if "error" in resultado or resultado.get("guardado"):
+            # Los resultados en streaming ya se escribieron de forma incremental
             continue
         
-        archivo_original = Path(resultado["archivo"])
-        nombre_salida = archivo_original.stem
-        
-        if formato == 'txt':
-            archivo_salida = directorio_salida / f"{nombre_salida}_transcripcion.txt"
-            with open(archivo_salida, 'w', encoding='utf-8') as f:
-                f.write(f"Archivo: {resultado['archivo']}\n")
-                f.write(f"Idioma: {resultado['idioma']}\n")
-                f.write(f"Traducido: {'Sí' if resultado['traducido'] else 'No'}\n")
-                f.write("-" * 50 + "\n")
-                f.write(resultado['texto'])
-        
-        elif formato == 'srt':
-            archivo_salida = directorio_salida / f"{nombre_salida}.srt"
-            with open(archivo_salida, 'w', encoding='utf-8') as f:
-                for i, chunk in enumerate(resultado.get('chunks', []), 1):
-                    inicio = chunk['timestamp'][0]
-                    fin = chunk['timestamp'][1]
-                    f.write(f"{i}\n")
-                    f.write(f"{formato_tiempo_srt(inicio)} --> {formato_tiempo_srt(fin)}\n")
-                    f.write(f"{chunk['text'].strip()}\n\n")
-        
-        logger.info(f"💾 Guardado: {archivo_salida}")
-
-def formato_tiempo_srt(segundos):
-    """Convierte segundos a formato SRT (HH:MM:SS,mmm)"""
-    if segundos is None:
-        return "00:00:00,000"
-    horas = int(segundos // 3600)
-    minutos = int((segundos % 3600) // 60)
-    secs = segundos % 60
-    return f"{horas:02d}:{minutos:02d}:{secs:06.3f}".replace('.', ',')
+        for archivo_salida in guardar_subtitulos(resultado, directorio_salida, formatos, restricciones):
+            logger.info(f"💾 Guardado: {archivo_salida}")
 
 def main():
     parser = argparse.ArgumentParser(
@@ -213,6 +297,9 @@ Ejemplos:
   
   # Generar subtítulos SRT
   python transcriptor_mvp.py video.mp4 -o ./salida --formato srt
+  
+  # Todos los formatos de subtítulos, con tiempos por palabra
+  python transcriptor_mvp.py video.mp4 -o ./salida --formato srt vtt ass json --timestamps palabra
         """
     )
     
@@ -226,17 +313,73 @@ Ejemplos:
     parser.add_argument('--traducir', 
                        action='store_true',
                        help='Activar traducción')
+    parser.add_argument('--sin-deteccion-idioma', 
+                       action='store_true',
+                       help='Sin --idioma: dejar que Whisper detecte el idioma en cada ventana en lugar de '
+                            'detectarlo una vez por archivo y agrupar los lotes por idioma')
+    parser.add_argument('--segundos-deteccion', 
+                       type=float, 
+                       default=SEGUNDOS_DETECCION,
+                       help=f'Segundos del inicio de cada archivo usados para detectar el idioma (default: {SEGUNDOS_DETECCION:g})')
+    parser.add_argument('--bilingue', 
+                       action='store_true',
+                       help='Texto nativo y traducción al inglés en una sola pasada (features/encoder compartidos)')
     parser.add_argument('--idioma-destino', 
                        default='en',
-                       help='Idioma destino para traducción (default: en). Whisper solo soporta traducción a inglés')
+                       help='Idioma destino para traducción (default: en). Whisper traduce a inglés; '
+                            'otros idiomas se traducen después con MarianMT')
     parser.add_argument('--formato', 
-                       choices=['txt', 'srt'],
-                       default='txt',
-                       help='Formato de salida (default: txt)')
+                       choices=FORMATOS,
+                       nargs='+',
+                       default=['txt'],
+                       help='Uno o más formatos de salida, generados en una sola pasada (default: txt)')
+    parser.add_argument('--timestamps', 
+                       choices=['segmento', 'palabra'],
+                       default='segmento',
+                       help='Granularidad de los timestamps; palabra da tiempos exactos por palabra '
+                            'en JSON/subtítulos (solo planificador lotes) (default: segmento)')
+    parser.add_argument('--max-caracteres-linea', 
+                       type=int, 
+                       default=42,
+                       help='Máximo de caracteres por línea de subtítulo (default: 42)')
+    parser.add_argument('--caracteres-por-segundo', 
+                       type=float, 
+                       default=17.0,
+                       help='Velocidad de lectura máxima de los subtítulos (default: 17)')
     parser.add_argument('--workers', 
                        type=int, 
                        default=2,
-                       help='Número de workers paralelos (default: 2)')
+                       help='Número de workers paralelos en modo archivos (default: 2)')
+    parser.add_argument('--planificador', 
+                       choices=['lotes', 'archivos'],
+                       default='lotes',
+                       help='lotes: empaqueta ventanas de 30 s de varios archivos en lotes llenos; '
+                            'archivos: un hilo por archivo (default: lotes)')
+    parser.add_argument('--batch-size', 
+                       type=int, 
+                       default=None,
+                       help='Tamaño de lote para inferencia (default: 16 en GPU, 8 en CPU)')
+    parser.add_argument('--procesos-decodificacion', 
+                       type=int, 
+                       default=None,
+                       help='Procesos que decodifican audio en paralelo a la inferencia, 0 = en línea (default: min(4, nproc))')
+    parser.add_argument('--vad', 
+                       choices=sorted(DETECTORES),
+                       default=None,
+                       help='Descartar silencio antes de la inferencia con un detector de voz (solo planificador lotes)')
+    parser.add_argument('--streaming', 
+                       action='store_true',
+                       help='Escribir TXT/SRT a medida que se transcribe cada ventana (memoria constante)')
+    parser.add_argument('--procesos-modelo', 
+                       type=int, 
+                       default=None,
+                       help='Solo CPU: N réplicas del modelo en procesos separados, cada una fijada a una '
+                            'porción de los núcleos (--batch-size pasa a ser el lote por réplica)')
+    parser.add_argument('--backend', 
+                       choices=BACKENDS,
+                       default='torch',
+                       help='Motor de inferencia: torch, int8 (cuantización dinámica, CPU), onnx (ONNX Runtime) '
+                            'o ctranslate2 (faster-whisper) (default: torch)')
     parser.add_argument('--no-flash-attention', 
                        action='store_true',
                        help='Desactivar Flash Attention 2')
@@ -244,9 +387,51 @@ Ejemplos:
                        type=int, 
                        default=0,
                        help='ID de GPU a usar (default: 0)')
+    parser.add_argument('--hilos-escaneo', 
+                       type=int, 
+                       default=8,
+                       help='Directorios listados en paralelo al buscar archivos (default: 8)')
+    parser.add_argument('--resume', 
+                       action='store_true',
+                       help='Procesar solo los archivos que fallaron o no terminaron en la corrida anterior '
+                            '(según el diario del directorio de salida)')
+    parser.add_argument('--sin-cache', 
+                       action='store_true',
+                       help='No usar la caché de transcripciones (re-transcribe todo)')
+    parser.add_argument('--directorio-cache', 
+                       default=None,
+                       help='Directorio de la caché de transcripciones (default: ~/.cache/fast-pycaptioner/transcripciones)')
     
     args = parser.parse_args()
     
+    if args.vad and args.planificador != 'lotes' and not args.streaming:
+        parser.error("--vad requiere --planificador lotes o --streaming")
+    if args.procesos_modelo and args.backend != 'torch':
+        parser.error("--procesos-modelo solo está disponible con --backend torch")
+    if args.procesos_modelo and args.planificador != 'lotes' and not args.streaming:
+        parser.error("--procesos-modelo requiere --planificador lotes o --streaming")
+    if args.streaming and (len(args.formato) > 1 or args.formato[0] not in ('txt', 'srt')):
+        parser.error("--streaming escribe un solo formato: txt o srt")
+    if args.timestamps == 'palabra' and (args.planificador != 'lotes' or args.streaming or args.bilingue):
+        parser.error("--timestamps palabra requiere --planificador lotes (sin --streaming ni --bilingue)")
+    if args.traducir and args.idioma_destino != 'en' and (args.streaming or args.timestamps == 'palabra'):
+        parser.error("--idioma-destino distinto de en no está disponible con --streaming ni --timestamps palabra")
+    if args.bilingue and (args.traducir or args.streaming or args.procesos_modelo or args.vad):
+        parser.error("--bilingue no se combina con --traducir, --streaming, --procesos-modelo ni --vad")
+    
+    # Whisper solo traduce a inglés; a otros idiomas se transcribe en el idioma
+    # original y se traduce después con MarianMT (el stack de traducción solo se
+    # importa en ese caso). MarianMT necesita el idioma de origen: sin --idioma
+    # ni detección previa se mantiene la traducción al inglés de Whisper
+    idioma_marian = args.idioma_destino if args.traducir and args.idioma_destino != 'en' else None
+    deteccion_previa = (args.planificador == 'lotes' and not args.streaming and not args.bilingue
+                        and not args.sin_deteccion_idioma)
+    if idioma_marian and not args.idioma and not deteccion_previa:
+        logger.warning(f"⚠️  Sin --idioma no se conoce el idioma de origen para traducir a {idioma_marian}; "
+                       "se traduce al inglés con Whisper")
+        idioma_marian = None
+    traducir_whisper = args.traducir and idioma_marian is None
+    
     # Verificar entrada
     entrada = Path(args.entrada)
     if not entrada.exists():
@@ -254,55 +439,203 @@ Ejemplos:
         sys.exit(1)
     
     # Obtener archivos
-    archivos = obtener_archivos_audio(entrada)
+    # Tamaño y mtime del escaneo: la caché no vuelve a hacer stat de cada archivo
+    firmas = {}
+    archivos = obtener_archivos_audio(entrada, hilos=args.hilos_escaneo, usar_indice=not args.sin_cache, firmas=firmas)
     if not archivos:
         logger.error("❌ No se encontraron archivos de audio")
         sys.exit(1)
     
     logger.info(f"📁 Encontrados {len(archivos)} archivo(s)")
     
-    # Inicializar transcriptor
-    transcriptor = TranscriptorGPU(
-        device_id=args.gpu,
-        enable_flash_attention=not args.no_flash_attention
+    # Diario de reintentos: estado de cada archivo, escrito en cuanto termina
+    diario = DiarioReintentos(args.salida)
+    if args.resume:
+        fallidos = diario.fallidos()
+        archivos = diario.pendientes(archivos)
+        logger.info(f"⏯️  Reanudando: {len(archivos)} pendiente(s), {len(fallidos)} fallido(s) en la corrida anterior")
+        if not archivos:
+            logger.info("✅ No hay archivos pendientes")
+            return
+    else:
+        diario.reiniciar()
+    
+    restricciones = RestriccionesSubtitulos(
+        max_caracteres_linea=args.max_caracteres_linea,
+        caracteres_por_segundo=args.caracteres_por_segundo
     )
     
-    # Procesar archivos
-    if len(archivos) == 1:
-        # Un solo archivo - procesamiento directo
-        resultado = transcriptor.transcribir_archivo(
-            archivos[0], 
-            args.idioma, 
-            args.traducir
-        )
-        resultados = [resultado]
+    # Consultar caché antes de cargar el modelo: los archivos sin cambios no se re-transcriben
+    cache = None if args.sin_cache else CacheTranscripciones(args.directorio_cache, firmas=firmas)
+    # Sin --idioma, el idioma que se detectó y cómo se detectó también forman la clave:
+    # con el pre-paso, el idioma detectado (cacheado por archivo) distingue las entradas
+    if args.idioma:
+        modo_deteccion = None
+    elif deteccion_previa:
+        modo_deteccion = "previa"
     else:
-        # Múltiples archivos - procesamiento paralelo
-        resultados = procesar_archivos_paralelo(
-            transcriptor,
-            archivos,
-            args.idioma,
-            args.traducir,
-            num_workers=args.workers
+        modo_deteccion = "por_archivo" if args.bilingue else "por_ventana"
+    
+    def idioma_clave(archivo, resultado=None):
+        if modo_deteccion != "previa":
+            return args.idioma
+        if resultado is not None:
+            return resultado.get("idioma")
+        return cache.obtener_idioma(archivo, MODEL_ID, args.segundos_deteccion)
+    
+    def opciones_cache_para(traducir, idioma):
+        return CacheTranscripciones.opciones(
+            MODEL_ID,
+            idioma,
+            traducir,
+            chunk_length_s=30,
+            segmentacion="ventanas" if args.planificador == 'lotes' or args.streaming or args.bilingue else "pipeline",
+            vad=args.vad,
+            backend=args.backend,
+            bilingue=args.bilingue,
+            timestamps=args.timestamps,
+            deteccion_idioma=modo_deteccion
         )
+    resultados_por_archivo = {}
+    traductor = None
+    
+    def completar(resultado):
+        """Cachea, guarda la salida y registra en el diario cada resultado en cuanto termina"""
+        nonlocal traductor
+        archivo = resultado["archivo"]
+        resultados_por_archivo[archivo] = resultado
+        try:
+            # Los archivos sin idioma detectado ya vienen traducidos por Whisper (ver abajo)
+            traducido_whisper = resultado.get("traducido") and not traducir_whisper
+            if cache and not resultado.get("desde_cache"):
+                cache.guardar(archivo, opciones_cache_para(traducir_whisper or bool(traducido_whisper),
+                                                           idioma_clave(archivo, resultado)), resultado)
+            if idioma_marian and "error" not in resultado and not traducido_whisper:
+                # La caché guarda la transcripción original; la traducción sale de la memoria de traducción
+                if traductor is None:
+                    from traductor_bidireccional import TraductorBidireccional, traducir_resultado
+                    from memoria_traduccion import MemoriaTraduccion
+                    traductor = TraductorBidireccional(
+                        f"cuda:{args.gpu}" if args.backend != "int8" and cuda_disponible() else "cpu",
+                        memoria=None if args.sin_cache else MemoriaTraduccion()
+                    )
+                resultado = traducir_resultado(traductor, resultado, idioma_marian)
+                resultados_por_archivo[archivo] = resultado
+                # Pares de idiomas que ya no aparecen no retienen memoria en corridas largas
+                traductor.modelos_cache.descargar_ociosos()
+            # Los de caché también: cualquier formato se regenera sin inferencia
+            guardar_resultados([resultado], args.salida, args.formato, restricciones)
+        except Exception as e:
+            logger.error(f"❌ Error guardando {archivo}: {e}")
+            resultado = {"archivo": archivo, "error": str(e)}
+            resultados_por_archivo[archivo] = resultado
+        diario.registrar(resultado)
+    
+    pendientes = archivos
+    if cache:
+        for archivo in archivos:
+            resultado = cache.obtener(archivo, opciones_cache_para(traducir_whisper, idioma_clave(archivo)))
+            if resultado is not None:
+                completar(resultado)
+        pendientes = [a for a in archivos if str(a) not in resultados_por_archivo]
+        logger.info(f"♻️  Caché: {cache.aciertos} sin cambios, {len(pendientes)} por transcribir")
+    
+    if pendientes:
+        # Inicializar transcriptor
+        if args.procesos_modelo:
+            # Réplicas en procesos separados, cada una con su porción de núcleos
+            transcriptor = PoolTranscriptores(
+                MODEL_ID,
+                num_procesos=args.procesos_modelo,
+                batch_por_proceso=args.batch_size or 4
+            )
+        else:
+            transcriptor = TranscriptorGPU(
+                device_id=args.gpu,
+                enable_flash_attention=not args.no_flash_attention,
+                batch_size=args.batch_size,
+                backend=args.backend
+            )
+        
+        # Procesar archivos
+        if args.bilingue:
+            # Transcripción y traducción comparten decodificación, features y encoder
+            for archivo in tqdm(pendientes, desc="🔄 Transcribiendo (nativo + inglés)"):
+                completar(transcriptor.transcribir_y_traducir(archivo, args.idioma))
+        elif args.streaming:
+            # Un archivo a la vez, con salida incremental y memoria constante
+            detector = crear_detector(args.vad) if args.vad else None
+            for archivo in pendientes:
+                completar(transcribir_archivo_streaming(
+                    transcriptor, archivo, args.salida, args.formato[0],
+                    args.idioma, traducir_whisper, vad=detector
+                ))
+        elif args.planificador == 'lotes':
+            grupos = {args.idioma: pendientes}
+            if not args.idioma and not args.sin_deteccion_idioma:
+                # Idioma detectado una vez por archivo: cada grupo corre con generate_kwargs fijos
+                idiomas = detectar_idiomas(transcriptor, pendientes, args.segundos_deteccion, cache=cache)
+                grupos = agrupar_por_idioma(pendientes, idiomas)
+                logger.info("🌐 Idiomas: " + ", ".join(f"{idioma or 'auto'} ({len(grupo)})" for idioma, grupo in grupos.items()))
+            # Ventanas de todos los archivos en lotes de tamaño fijo
+            for idioma, grupo in grupos.items():
+                # Sin idioma de origen MarianMT no puede traducir: ese grupo vuelve a Whisper (inglés)
+                traducir_grupo = traducir_whisper or (idioma_marian is not None and idioma is None)
+                if traducir_grupo and not traducir_whisper:
+                    logger.warning(f"⚠️  {len(grupo)} archivo(s) sin idioma detectado: se traducen al inglés con Whisper")
+                procesar_archivos_lotes(
+                    transcriptor,
+                    grupo,
+                    idioma,
+                    traducir_grupo,
+                    # Con réplicas el lote llena todos los procesos a la vez
+                    batch_size=None if args.procesos_modelo else args.batch_size,
+                    procesos_decodificacion=args.procesos_decodificacion,
+                    vad=args.vad,
+                    timestamps_palabra=args.timestamps == 'palabra',
+                    al_completar=completar
+                )
+        elif len(pendientes) == 1:
+            # Un solo archivo - procesamiento directo
+            completar(transcriptor.transcribir_archivo(
+                pendientes[0], 
+                args.idioma, 
+                traducir_whisper
+            ))
+        else:
+            # Múltiples archivos - procesamiento paralelo por archivo
+            procesar_archivos_paralelo(
+                transcriptor,
+                pendientes,
+                args.idioma,
+                traducir_whisper,
+                num_workers=args.workers,
+                al_completar=completar
+            )
+        
+        if args.procesos_modelo:
+            transcriptor.cerrar()
     
-    # Guardar resultados
-    guardar_resultados(resultados, args.salida, args.formato)
+    resultados = recoger_en_orden(archivos, resultados_por_archivo, diario.registrar)
+    if cache:
+        cache.guardar_indice()
+    diario.cerrar()
     
     # Resumen
     exitosos = sum(1 for r in resultados if "error" not in r)
     logger.info(f"\n✅ Procesados exitosamente: {exitosos}/{len(archivos)}")
+    if traductor is not None:
+        for modelo in traductor.modelos_cache.estadisticas():
+            logger.info(f"🌐 Modelo de traducción {modelo['clave']}: {modelo['hits']} hit(s), "
+                        f"{modelo['mb']:.0f} MB en {modelo['dispositivo']}")
+        logger.info(f"🌐 Modelos de traducción desalojados: {traductor.modelos_cache.desalojos}")
     
     if exitosos < len(archivos):
         errores = [r for r in resultados if "error" in r]
         logger.warning("\n⚠️  Archivos con errores:")
         for error in errores:
             logger.warning(f"  - {error['archivo']}: {error['error']}")
+        logger.warning("💡 Para reintentar solo estos archivos: repetir el comando con --resume")
 
 if __name__ == "__main__":
-    # Configurar para mejor rendimiento en GPU
-    if torch.cuda.is_available():
-        torch.backends.cudnn.benchmark = True
-        torch.backends.cuda.matmul.allow_tf32 = True
-    
     main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Memoria de traducción persistente para Fast PyTranscriptor
+SQLite con clave (idioma origen, idioma destino, modelo, segmento normalizado).
+Intros, outros y frases hechas se repiten entre videos: se traducen una vez
+y las siguientes apariciones salen de la memoria sin pasar por el modelo.
+"""
+
+import re
+import sqlite3
+import threading
+import unicodedata
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+RUTA_MEMORIA_DEFAULT = Path.home() / ".cache" / "fast-pycaptioner" / "memoria_traduccion.sqlite"
+
+def normalizar_segmento(texto):
+    """NFC, sin espacios al inicio/fin y con espacios colapsados (mayúsculas y puntuación se conservan)"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", texto)).strip()
+
+class MemoriaTraduccion:
+    def __init__(self, ruta=None):
+        self.ruta = Path(ruta or RUTA_MEMORIA_DEFAULT)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.aciertos = 0
+        self.fallos = 0
+        # Una sola conexión compartida (el demonio traduce desde su hilo worker)
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+        with self._lock, self._conexion:
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute("""
+                CREATE TABLE IF NOT EXISTS traducciones (
+                    origen TEXT NOT NULL,
+                    destino TEXT NOT NULL,
+                    modelo TEXT NOT NULL,
+                    segmento TEXT NOT NULL,
+                    traduccion TEXT NOT NULL,
+                    PRIMARY KEY (origen, destino, modelo, segmento)
+                )
+            """)
+
+    def buscar(self, origen, destino, modelo, segmentos):
+        """Devuelve {segmento normalizado: traducción} para los segmentos que ya están en memoria"""
+        claves = list({normalizar_segmento(s) for s in segmentos})
+        encontrados = {}
+        with self._lock:
+            # Consultas por bloques: SQLite limita la cantidad de parámetros
+            for inicio in range(0, len(claves), 500):
+                bloque = claves[inicio:inicio + 500]
+                filas = self._conexion.execute(
+                    f"SELECT segmento, traduccion FROM traducciones "
+                    f"WHERE origen = ? AND destino = ? AND modelo = ? "
+                    f"AND segmento IN ({','.join('?' * len(bloque))})",
+                    [origen, destino, modelo, *bloque]
+                )
+                encontrados.update(filas)
+        self.aciertos += len(encontrados)
+        self.fallos += len(claves) - len(encontrados)
+        return encontrados
+
+    def guardar(self, origen, destino, modelo, pares):
+        """Guarda pares (segmento, traducción)"""
+        filas = [(origen, destino, modelo, normalizar_segmento(s), t) for s, t in pares]
+        with self._lock, self._conexion:
+            self._conexion.executemany(
+                "INSERT OR REPLACE INTO traducciones VALUES (?, ?, ?, ?, ?)", filas
+            )
+
+    def tasa_aciertos(self):
+        total = self.aciertos + self.fallos
+        return self.aciertos / total if total else 0.0
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Métricas de calidad para Fast PyTranscriptor
+WER (word error rate) con normalización simple de texto
+"""
+
+import re
+import unicodedata
+
+def normalizar_texto(texto):
+    """Minúsculas, sin puntuación y con espacios colapsados (los acentos se conservan)"""
+    texto = unicodedata.normalize("NFC", texto.lower())
+    texto = re.sub(r"[^\w\s']", " ", texto)
+    return " ".join(texto.split())
+
+def calcular_wer(referencia, hipotesis):
+    """WER = (sustituciones + inserciones + borrados) / palabras de la referencia"""
+    ref = normalizar_texto(referencia).split()
+    hip = normalizar_texto(hipotesis).split()
+    if not ref:
+        return 0.0 if not hip else 1.0
+
+    # Distancia de Levenshtein por palabras, una fila a la vez
+    anterior = list(range(len(hip) + 1))
+    for i, palabra_ref in enumerate(ref, 1):
+        actual = [i] + [0] * len(hip)
+        for j, palabra_hip in enumerate(hip, 1):
+            actual[j] = min(
+                anterior[j] + 1,
+                actual[j - 1] + 1,
+                anterior[j - 1] + (palabra_ref != palabra_hip)
+            )
+        anterior = actual
+    return anterior[-1] / len(ref)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Planificador por lotes para Fast PyTranscriptor
+Decodifica los archivos, los divide en ventanas de 30 s (solapadas 5 s a cada
+lado de cada corte, como el stride del pipeline de HF) y empaqueta ventanas
+de muchos archivos en lotes completos de tamaño fijo para TranscriptorGPU.pipe.
+Después re-ensambla los resultados por archivo con timestamps absolutos.
+La decodificación puede delegarse a un DecodificadorParalelo para que el
+modelo no espere a ffmpeg, y un detector VAD opcional descarta el silencio
+antes de la inferencia.
+"""
+
+import logging
+from audio_utils import (SAMPLE_RATE, DURACION_VENTANA, SOLAPE_VENTANA, decodificar_audio, dividir_en_ventanas,
+                         ventanas_desde_regiones, chunks_absolutos)
+
+logger = logging.getLogger(__name__)
+
+class PlanificadorLotes:
+    def __init__(self, transcriptor, batch_size=None, duracion_ventana=DURACION_VENTANA, decodificador=None, vad=None,
+                 timestamps_palabra=False, solape_ventana=SOLAPE_VENTANA):
+        """Recibe un TranscriptorGPU ya inicializado (se reutiliza su pipeline)"""
+        self.transcriptor = transcriptor
+        self.batch_size = batch_size or transcriptor.batch_size
+        self.duracion_ventana = duracion_ventana
+        self.solape_ventana = solape_ventana
+        self.decodificador = decodificador
+        self.vad = vad
+        # Con timestamps por palabra cada chunk del resultado es una palabra
+        self.timestamps_palabra = timestamps_palabra
+
+    def _generate_kwargs(self, idioma, traducir):
+        generate_kwargs = {}
+        if idioma:
+            generate_kwargs["language"] = idioma
+        if traducir:
+            generate_kwargs["task"] = "translate"
+        return generate_kwargs
+
+    def _decodificados(self, archivos):
+        """Genera (idx, archivo, audio, error), en paralelo si hay decodificador"""
+        if self.decodificador is not None:
+            yield from self.decodificador.iterar(archivos)
+            return
+        for idx, archivo in enumerate(archivos):
+            try:
+                yield idx, archivo, decodificar_audio(archivo), None
+            except Exception as e:
+                yield idx, archivo, None, e
+
+    def _ventanas(self, audio):
+        """Divide el audio en ventanas [(mapa, array, propias), ...]; con VAD solo las regiones con voz"""
+        if self.vad is None:
+            return [([(0.0, offset)], ventana, [propia])
+                    for offset, ventana, propia in dividir_en_ventanas(audio, self.duracion_ventana,
+                                                                       solape_s=self.solape_ventana)]
+
+        regiones = self.vad(audio, SAMPLE_RATE)
+        duracion = len(audio) / SAMPLE_RATE
+        voz = sum(fin - inicio for inicio, fin in regiones)
+        logger.debug(f"VAD: {voz:.1f}s de voz en {duracion:.1f}s ({len(regiones)} regiones)")
+        return ventanas_desde_regiones(audio, regiones, self.duracion_ventana, solape_s=self.solape_ventana)
+
+    def _armar_resultado(self, estado, idioma, traducir):
+        """Une las salidas de todas las ventanas de un archivo en un solo resultado"""
+        if estado.get("error"):
+            return {"archivo": str(estado["archivo"]), "error": estado["error"]}
+
+        textos = []
+        chunks = []
+        for mapa, propias, duracion, salida in sorted(estado["salidas"], key=lambda s: s[0][0][1]):
+            # Solo los chunks del tramo propio: el solape lo transcribe también la ventana vecina
+            texto, chunks_ventana = chunks_absolutos(salida, mapa, propias, duracion)
+            if texto:
+                textos.append(texto)
+            chunks.extend(chunks_ventana)
+
+        return {
+            "archivo": str(estado["archivo"]),
+            "texto": " ".join(textos),
+            "chunks": chunks,
+            "idioma": idioma or "auto",
+            "traducido": traducir,
+            "idioma_destino": "en" if traducir else None,
+            "granularidad": "palabra" if self.timestamps_palabra else "segmento"
+        }
+
+    def _procesar_lote(self, lote, estados, generate_kwargs, idioma, traducir):
+        """Ejecuta un lote en el pipeline y devuelve los resultados de archivos completados"""
+        entradas = [{"raw": v["audio"], "sampling_rate": SAMPLE_RATE} for v in lote]
+        try:
+            # chunk_length_s=0 desactiva el chunking interno: las ventanas ya miden <= 30 s
+            salidas = self.transcriptor.pipe(
+                entradas,
+                batch_size=self.batch_size,
+                chunk_length_s=0,
+                generate_kwargs=generate_kwargs,
+                return_timestamps="word" if self.timestamps_palabra else True
+            )
+        except Exception as e:
+            logger.error(f"❌ Error en lote de {len(lote)} ventanas: {e}")
+            salidas = [None] * len(lote)
+            for ventana in lote:
+                estados[ventana["idx"]]["error"] = str(e)
+
+        completados = []
+        for ventana, salida in zip(lote, salidas):
+            estado = estados[ventana["idx"]]
+            if salida is not None:
+                duracion = len(ventana["audio"]) / SAMPLE_RATE
+                estado["salidas"].append((ventana["mapa"], ventana["propias"], duracion, salida))
+            estado["restantes"] -= 1
+            if estado["restantes"] == 0:
+                completados.append(self._armar_resultado(estados.pop(ventana["idx"]), idioma, traducir))
+        return completados
+
+    def iterar(self, archivos, idioma=None, traducir=False):
+        """Genera los resultados por archivo a medida que se completan todas sus ventanas"""
+        generate_kwargs = self._generate_kwargs(idioma, traducir)
+        estados = {}
+        pendientes = []
+
+        for idx, archivo, audio, error in self._decodificados(archivos):
+            if error is not None:
+                logger.error(f"❌ Error decodificando {archivo}: {error}")
+                yield {"archivo": str(archivo), "error": str(error)}
+                continue
+
+            ventanas = self._ventanas(audio)
+            logger.debug(f"{archivo}: {len(audio) / SAMPLE_RATE:.1f}s -> {len(ventanas)} ventana(s)")
+            estado = {"archivo": archivo, "restantes": len(ventanas), "salidas": []}
+            if not ventanas:
+                # Sin voz detectada: resultado vacío sin pasar por el modelo
+                yield self._armar_resultado(estado, idioma, traducir)
+                continue
+            estados[idx] = estado
+            pendientes.extend({"idx": idx, "mapa": mapa, "propias": propias, "audio": ventana}
+                              for mapa, ventana, propias in ventanas)
+
+            # Solo se envían lotes completos mientras queden archivos por decodificar.
+            # Mientras tanto los procesos decodificadores siguen llenando la cola.
+            while len(pendientes) >= self.batch_size:
+                lote, pendientes = pendientes[:self.batch_size], pendientes[self.batch_size:]
+                yield from self._procesar_lote(lote, estados, generate_kwargs, idioma, traducir)
+
+        # Último lote (posiblemente incompleto)
+        while pendientes:
+            lote, pendientes = pendientes[:self.batch_size], pendientes[self.batch_size:]
+            yield from self._procesar_lote(lote, estados, generate_kwargs, idioma, traducir)
+
+    def transcribir(self, archivos, idioma=None, traducir=False):
+        """Transcribe todos los archivos y devuelve los resultados en el orden de entrada"""
+        por_archivo = {r["archivo"]: r for r in self.iterar(archivos, idioma, traducir)}
+        return [por_archivo[str(archivo)] for archivo in archivos]
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Pool de réplicas del modelo para hosts solo-CPU
+Arranca N procesos, cada uno fijado a un subconjunto de núcleos con
+torch.set_num_threads igual al tamaño del subconjunto, y reparte las ventanas
+de cada lote entre ellos. Los pesos se convierten una sola vez a un
+safetensors float32 local. Cada réplica mapea ese archivo con mmap
+copy-on-write y arma los parámetros con torch.frombuffer sobre el mapeo (sin
+copiarlos): como la inferencia no escribe los pesos, las N réplicas leen las
+mismas páginas del page cache y el modelo ocupa RAM una sola vez.
+
+Expone la misma interfaz que usa el planificador (pipe, batch_size, model_id),
+así que PlanificadorLotes y transcribir_stream funcionan sin cambios.
+"""
+
+import os
+import json
+import mmap
+import queue
+import shutil
+import struct
+import tempfile
+import itertools
+import logging
+import multiprocessing as mp
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_PESOS_DEFAULT = Path.home() / ".cache" / "fast-pycaptioner" / "pesos-float32"
+
+# Cada cuánto se revisa que las réplicas sigan vivas mientras se espera un resultado
+INTERVALO_VIDA_S = 1.0
+
+# Tipos de safetensors -> nombre del dtype de torch
+DTYPES_SAFETENSORS = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool",
+}
+
+def repartir_nucleos(num_procesos, nucleos=None):
+    """Divide los núcleos disponibles en num_procesos subconjuntos contiguos"""
+    if nucleos is None:
+        nucleos = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    num_procesos = max(1, min(num_procesos, len(nucleos)))
+    tamano, resto = divmod(len(nucleos), num_procesos)
+    grupos, inicio = [], 0
+    for i in range(num_procesos):
+        fin = inicio + tamano + (1 if i < resto else 0)
+        grupos.append(nucleos[inicio:fin])
+        inicio = fin
+    return grupos
+
+def _pesos_completos(directorio):
+    """Pesos y archivos del procesador presentes"""
+    return (((directorio / "model.safetensors").exists() or (directorio / "model.safetensors.index.json").exists())
+            and (directorio / "preprocessor_config.json").exists())
+
+def preparar_pesos_compartidos(model_id, directorio=None):
+    """
+    Guarda una copia float32 en safetensors (una sola vez) para abrirla con mmap
+    desde cada proceso. Se escribe en un directorio temporal y se mueve con
+    os.replace al terminar: un guardado interrumpido no deja un directorio a
+    medias que las corridas siguientes tomen por completo.
+    """
+    directorio = Path(directorio or DIRECTORIO_PESOS_DEFAULT) / model_id.replace("/", "--")
+    if _pesos_completos(directorio):
+        return directorio
+    if directorio.exists():
+        # Dejado por una versión anterior que escribía en su lugar
+        logger.warning(f"⚠️  Pesos compartidos incompletos en {directorio}, se vuelven a preparar")
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    import torch
+    from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor
+
+    logger.info(f"📦 Preparando pesos float32 compartidos en {directorio}...")
+    directorio.parent.mkdir(parents=True, exist_ok=True)
+    temporal = Path(tempfile.mkdtemp(prefix=f".{directorio.name}-", dir=directorio.parent))
+    try:
+        modelo = AutoModelForSpeechSeq2Seq.from_pretrained(
+            model_id, dtype=torch.float32, low_cpu_mem_usage=True, use_safetensors=True
+        )
+        modelo.save_pretrained(temporal, safe_serialization=True)
+        AutoProcessor.from_pretrained(model_id).save_pretrained(temporal)
+        del modelo
+        try:
+            os.replace(temporal, directorio)
+        except OSError:
+            # Otro proceso terminó primero: se usa el suyo
+            if not _pesos_completos(directorio):
+                raise
+    finally:
+        shutil.rmtree(temporal, ignore_errors=True)
+    return directorio
+
+def _archivos_safetensors(ruta_modelo):
+    ruta_modelo = Path(ruta_modelo)
+    indice = ruta_modelo / "model.safetensors.index.json"
+    if indice.exists():
+        with open(indice, "r", encoding="utf-8") as f:
+            return [ruta_modelo / nombre for nombre in sorted(set(json.load(f)["weight_map"].values()))]
+    return [ruta_modelo / "model.safetensors"]
+
+def tensores_mmap(ruta):
+    """
+    {nombre: tensor} que apuntan directamente al archivo mapeado (sin copiar).
+    ACCESS_COPY: las páginas se comparten mientras nadie las escriba, y
+    torch.frombuffer recibe un buffer escribible.
+    """
+    import torch
+
+    with open(ruta, "rb") as f:
+        mapeo = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    largo_encabezado = struct.unpack("<Q", mapeo[:8])[0]
+    encabezado = json.loads(mapeo[8:8 + largo_encabezado])
+    base = 8 + largo_encabezado
+    tensores = {}
+    for nombre, info in encabezado.items():
+        if nombre == "__metadata__":
+            continue
+        dtype = getattr(torch, DTYPES_SAFETENSORS[info["dtype"]])
+        inicio, fin = info["data_offsets"]
+        if fin == inicio:
+            tensores[nombre] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        plano = torch.frombuffer(mapeo, dtype=dtype, count=(fin - inicio) // dtype.itemsize, offset=base + inicio)
+        tensores[nombre] = plano.view(info["shape"])
+    return tensores
+
+def cargar_modelo_compartido(ruta_modelo):
+    """
+    Arma el modelo en el dispositivo meta y le asigna los tensores mapeados
+    (load_state_dict(assign=True)): los pesos no se copian a memoria privada.
+    Si algo queda sin asignar (buffers no persistentes, claves distintas) se
+    carga de la forma normal, con una copia privada.
+    """
+    import torch
+    from transformers import AutoConfig, AutoModelForSpeechSeq2Seq, GenerationConfig
+
+    try:
+        configuracion = AutoConfig.from_pretrained(ruta_modelo)
+        with torch.device("meta"):
+            modelo = AutoModelForSpeechSeq2Seq.from_config(configuracion, attn_implementation="eager")
+        # from_config no lee generation_config.json: sin él Whisper no conoce
+        # los tokens de idioma y tarea
+        if (Path(ruta_modelo) / "generation_config.json").exists():
+            modelo.generation_config = GenerationConfig.from_pretrained(ruta_modelo)
+        estado = {}
+        for archivo in _archivos_safetensors(ruta_modelo):
+            estado.update(tensores_mmap(archivo))
+        modelo.load_state_dict(estado, strict=False, assign=True)
+        modelo.tie_weights()
+        sin_asignar = [n for n, t in itertools.chain(modelo.named_parameters(), modelo.named_buffers()) if t.is_meta]
+        if sin_asignar:
+            raise RuntimeError(f"{len(sin_asignar)} tensor(es) sin asignar, p. ej. {sin_asignar[0]}")
+        return modelo.eval()
+    except Exception as e:
+        logger.warning(f"⚠️  Sin pesos compartidos ({e}); cargando una copia privada del modelo")
+        return AutoModelForSpeechSeq2Seq.from_pretrained(
+            ruta_modelo,
+            dtype=torch.float32,
+            low_cpu_mem_usage=True,
+            use_safetensors=True,
+            attn_implementation="eager"
+        )
+
+def _worker(indice, nucleos, ruta_modelo, batch_size, cola_tareas, cola_resultados):
+    """Proceso réplica: fija afinidad e hilos, carga el modelo y atiende sub-lotes"""
+    # Antes de importar torch, para que OpenMP/MKL respeten el límite
+    hilos = str(len(nucleos))
+    os.environ["OMP_NUM_THREADS"] = hilos
+    os.environ["MKL_NUM_THREADS"] = hilos
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, nucleos)
+
+    try:
+        import torch
+        from transformers import AutoProcessor, pipeline
+        from deteccion_idioma import idiomas_encoder
+
+        torch.set_num_threads(len(nucleos))
+        torch.set_num_interop_threads(1)
+
+        modelo = cargar_modelo_compartido(ruta_modelo)
+        procesador = AutoProcessor.from_pretrained(ruta_modelo)
+        pipe = pipeline(
+            "automatic-speech-recognition",
+            model=modelo,
+            tokenizer=procesador.tokenizer,
+            feature_extractor=procesador.feature_extractor,
+            max_new_tokens=128,
+            batch_size=batch_size,
+            dtype=torch.float32,
+            device="cpu",
+        )
+    except Exception as e:
+        cola_resultados.put(("listo", indice, str(e)))
+        return
+
+    cola_resultados.put(("listo", indice, None))
+
+    while True:
+        tarea = cola_tareas.get()
+        if tarea is None:
+            break
+        id_tarea, operacion, entradas, kwargs = tarea
+        try:
+            if operacion == "idioma":
+                salida = idiomas_encoder(modelo, procesador.feature_extractor, entradas)
+            else:
+                with torch.inference_mode():
+                    salida = pipe(entradas, batch_size=batch_size, **kwargs)
+            cola_resultados.put((id_tarea, list(salida), None))
+        except Exception as e:
+            cola_resultados.put((id_tarea, None, str(e)))
+
+class PoolTranscriptores:
+    def __init__(self, model_id, num_procesos=None, batch_por_proceso=4, directorio_pesos=None):
+        """Arranca num_procesos réplicas (default: un proceso cada 8 núcleos)"""
+        grupos = repartir_nucleos(num_procesos or max(1, (os.cpu_count() or 1) // 8))
+        self.model_id = model_id
+        self.device = "cpu"
+        self.num_procesos = len(grupos)
+        self.batch_por_proceso = batch_por_proceso
+        # El planificador arma lotes que llenan todas las réplicas a la vez
+        self.batch_size = self.num_procesos * batch_por_proceso
+        self._ids = itertools.count()
+
+        ruta_modelo = str(preparar_pesos_compartidos(model_id, directorio_pesos))
+
+        # spawn: cada réplica arranca limpia (fork después de importar torch no es seguro)
+        contexto = mp.get_context("spawn")
+        self._tareas = contexto.Queue()
+        self._resultados = contexto.Queue()
+        self._procesos = [
+            contexto.Process(
+                target=_worker,
+                args=(i, nucleos, ruta_modelo, batch_por_proceso, self._tareas, self._resultados),
+                daemon=True
+            )
+            for i, nucleos in enumerate(grupos)
+        ]
+        for proceso in self._procesos:
+            proceso.start()
+
+        logger.info(f"🧩 Arrancando {self.num_procesos} réplica(s): "
+                    + ", ".join(f"{len(g)} núcleos" for g in grupos))
+        for _ in self._procesos:
+            _, indice, error = self._esperar_resultado()
+            if error:
+                self.cerrar()
+                raise RuntimeError(f"La réplica {indice} no pudo cargar el modelo: {error}")
+        logger.info("✅ Réplicas cargadas")
+
+    def _esperar_resultado(self):
+        """
+        Siguiente resultado de la cola, revisando entre esperas que las réplicas
+        sigan vivas: si una muere (OOM, segfault) su tarea nunca vuelve.
+        """
+        while True:
+            try:
+                return self._resultados.get(timeout=INTERVALO_VIDA_S)
+            except queue.Empty:
+                for i, proceso in enumerate(self._procesos):
+                    if not proceso.is_alive():
+                        self.cerrar()
+                        raise RuntimeError(f"La réplica {i} terminó inesperadamente (exitcode {proceso.exitcode})")
+
+    def pipe(self, entradas, batch_size=None, **kwargs):
+        """Reparte las entradas entre las réplicas y devuelve las salidas en orden"""
+        individual = isinstance(entradas, dict)
+        salidas = self._repartir("transcribir", [entradas] if individual else entradas, kwargs)
+        return salidas[0] if individual else salidas
+
+    def detectar_idiomas(self, clips):
+        """Código de idioma por clip, detectado en las réplicas desde la salida del encoder"""
+        return self._repartir("idioma", clips, {})
+
+    def _repartir(self, operacion, entradas, kwargs):
+        # Sub-lotes balanceados: una porción por réplica
+        tamano = max(1, -(-len(entradas) // self.num_procesos))
+        pendientes = {}
+        for inicio in range(0, len(entradas), tamano):
+            id_tarea = next(self._ids)
+            pendientes[id_tarea] = inicio
+            self._tareas.put((id_tarea, operacion, entradas[inicio:inicio + tamano], kwargs))
+
+        salidas = [None] * len(entradas)
+        errores = []
+        while pendientes:
+            id_tarea, salida, error = self._esperar_resultado()
+            inicio = pendientes.pop(id_tarea)
+            if error:
+                errores.append(error)
+            else:
+                salidas[inicio:inicio + len(salida)] = salida
+        if errores:
+            raise RuntimeError(errores[0])
+        return salidas
+
+    def cerrar(self):
+        for _ in self._procesos:
+            self._tareas.put(None)
+        for proceso in self._procesos:
+            proceso.join(timeout=10)
+            if proceso.is_alive():
+                proceso.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
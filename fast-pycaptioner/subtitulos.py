@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Formatos de salida para Fast PyTranscriptor
+- Escritura incremental de TXT/SRT a medida que llegan segmentos (streaming)
+- Render de TXT, SRT, WebVTT, ASS y JSON desde un resultado ya transcrito
+  (o cacheado): las palabras y los subtítulos se calculan una sola vez y
+  todos los formatos salen de ellos, sin volver a correr el modelo.
+
+Los subtítulos se arman palabra por palabra respetando largo de línea, número
+de líneas, duración mínima/máxima y velocidad de lectura (caracteres por
+segundo). Con timestamps por segmento, el tiempo de cada palabra se estima
+repartiendo el del segmento según la cantidad de caracteres.
+"""
+
+import re
+import json
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+FORMATOS = ("txt", "srt", "vtt", "ass", "json")
+
+# Fin de oración: buen lugar para cortar un subtítulo
+FIN_ORACION = re.compile(r"[.!?…。！？]$")
+
+def formato_tiempo_srt(segundos):
+    """Convierte segundos a formato SRT (HH:MM:SS,mmm)"""
+    if segundos is None:
+        return "00:00:00,000"
+    # Redondeo a milisegundos enteros antes de repartir: 59.9996 es 00:01:00,000, no 00:00:60,000
+    milisegundos = int(round(segundos * 1000))
+    horas, milisegundos = divmod(milisegundos, 3600000)
+    minutos, milisegundos = divmod(milisegundos, 60000)
+    secs, milisegundos = divmod(milisegundos, 1000)
+    return f"{horas:02d}:{minutos:02d}:{secs:02d},{milisegundos:03d}"
+
+def formato_tiempo_vtt(segundos):
+    """Convierte segundos a formato WebVTT (HH:MM:SS.mmm)"""
+    return formato_tiempo_srt(segundos).replace(',', '.')
+
+def formato_tiempo_ass(segundos):
+    """Convierte segundos a formato ASS (H:MM:SS.cc)"""
+    centesimas = int(round((segundos or 0.0) * 100))
+    horas, centesimas = divmod(centesimas, 360000)
+    minutos, centesimas = divmod(centesimas, 6000)
+    secs, centesimas = divmod(centesimas, 100)
+    return f"{horas:d}:{minutos:02d}:{secs:02d}.{centesimas:02d}"
+
+def ruta_salida(directorio_salida, archivo, formato):
+    """Ruta del archivo de salida para un archivo de entrada y un formato"""
+    nombre_salida = Path(archivo).stem
+    if formato == 'txt':
+        return Path(directorio_salida) / f"{nombre_salida}_transcripcion.txt"
+    return Path(directorio_salida) / f"{nombre_salida}.{formato}"
+
+class EscritorIncremental:
+    def __init__(self, directorio_salida, archivo, formato='txt', idioma=None, traducido=False):
+        """Abre el archivo de salida y escribe cada segmento en cuanto llega (con flush)"""
+        if formato not in ('txt', 'srt'):
+            raise ValueError(f"Formato no soportado en modo incremental: {formato}")
+        directorio_salida = Path(directorio_salida)
+        directorio_salida.mkdir(parents=True, exist_ok=True)
+        self.formato = formato
+        self.ruta = ruta_salida(directorio_salida, archivo, formato)
+        self.indice = 0
+        self._f = open(self.ruta, 'w', encoding='utf-8')
+
+        if formato == 'txt':
+            self._f.write(f"Archivo: {archivo}\n"
+                          f"Idioma: {idioma or 'auto'}\n"
+                          f"Traducido: {'Sí' if traducido else 'No'}\n"
+                          + "-" * 50 + "\n")
+            self._f.flush()
+
+    def escribir(self, segmento):
+        """Agrega un segmento {'timestamp': (inicio, fin), 'text': str}"""
+        texto = segmento['text'].strip()
+        if not texto:
+            return
+        if self.formato == 'txt':
+            self._f.write(("" if self.indice == 0 else " ") + texto)
+        else:
+            inicio, fin = segmento['timestamp']
+            self._f.write(f"{self.indice + 1}\n"
+                          f"{formato_tiempo_srt(inicio)} --> {formato_tiempo_srt(fin)}\n"
+                          f"{texto}\n\n")
+        self.indice += 1
+        # flush para que otros procesos puedan consumir el archivo mientras crece
+        self._f.flush()
+
+    def cerrar(self):
+        if not self._f.closed:
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+class RestriccionesSubtitulos:
+    def __init__(self, max_caracteres_linea=42, max_lineas=2, duracion_min=1.0, duracion_max=7.0,
+                 caracteres_por_segundo=17.0, pausa_corte=0.6, separacion_min=0.05):
+        """
+        Límites de legibilidad para armar subtítulos:
+        - max_caracteres_linea / max_lineas: tamaño máximo del texto en pantalla
+        - duracion_min / duracion_max: tiempo en pantalla (segundos)
+        - caracteres_por_segundo: velocidad de lectura máxima
+        - pausa_corte: un silencio mayor entre palabras fuerza un subtítulo nuevo
+        - separacion_min: hueco mínimo entre un subtítulo y el siguiente
+        """
+        self.max_caracteres_linea = max_caracteres_linea
+        self.max_lineas = max_lineas
+        self.duracion_min = duracion_min
+        self.duracion_max = duracion_max
+        self.caracteres_por_segundo = caracteres_por_segundo
+        self.pausa_corte = pausa_corte
+        self.separacion_min = separacion_min
+
+def palabras_desde_chunks(chunks, granularidad="segmento"):
+    """
+    Lista de palabras {'inicio', 'fin', 'texto'} con tiempos absolutos.
+    Con granularidad 'palabra' cada chunk ya es una palabra; con 'segmento'
+    el tiempo del chunk se reparte entre sus palabras según su largo.
+    """
+    palabras = []
+    for chunk in chunks:
+        inicio, fin = chunk["timestamp"]
+        inicio = inicio or 0.0
+        fin = fin if fin is not None else inicio
+        partes = chunk["text"].split()
+        if not partes:
+            continue
+        if granularidad == "palabra" or len(partes) == 1:
+            palabras.append({"inicio": inicio, "fin": fin, "texto": " ".join(partes)})
+            continue
+        total = sum(len(p) for p in partes)
+        t = inicio
+        for parte in partes:
+            duracion = (fin - inicio) * len(parte) / total
+            palabras.append({"inicio": t, "fin": t + duracion, "texto": parte})
+            t += duracion
+    return palabras
+
+def _repartir_lineas(textos, max_caracteres, max_lineas):
+    """Reparte palabras en líneas equilibradas; None si no caben"""
+    texto = " ".join(textos)
+    if len(texto) <= max_caracteres:
+        return [texto]
+    if max_lineas < 2:
+        return None
+    # Corte más equilibrado entre dos líneas (más líneas: voraz)
+    mejor = None
+    for i in range(1, len(textos)):
+        a, b = " ".join(textos[:i]), " ".join(textos[i:])
+        if len(a) <= max_caracteres:
+            resto = [b] if len(b) <= max_caracteres else _repartir_lineas(textos[i:], max_caracteres, max_lineas - 1)
+            if resto is not None:
+                lineas = [a] + resto
+                desequilibrio = max(len(l) for l in lineas) - min(len(l) for l in lineas)
+                if mejor is None or desequilibrio < mejor[0]:
+                    mejor = (desequilibrio, lineas)
+    return mejor[1] if mejor else None
+
+def _cabe(palabras, restricciones):
+    return _repartir_lineas([p["texto"] for p in palabras], restricciones.max_caracteres_linea,
+                            restricciones.max_lineas) is not None
+
+def _nuevo_subtitulo(palabras):
+    return {"inicio": palabras[0]["inicio"], "fin": palabras[-1]["fin"], "palabras": list(palabras)}
+
+def construir_subtitulos(palabras, restricciones=None):
+    """
+    Agrupa palabras en subtítulos [{'inicio', 'fin', 'lineas', 'palabras'}]:
+    1. corte voraz por largo de línea, duración máxima, pausas y fin de oración
+    2. fusión de subtítulos demasiado cortos o rápidos de leer con su vecino
+    3. extensión del fin hasta cumplir duración mínima y velocidad de lectura
+    """
+    r = restricciones or RestriccionesSubtitulos()
+    subtitulos = []
+    actual = []
+    for palabra in palabras:
+        if actual:
+            cortar = (
+                not _cabe(actual + [palabra], r)
+                or palabra["fin"] - actual[0]["inicio"] > r.duracion_max
+                or palabra["inicio"] - actual[-1]["fin"] > r.pausa_corte
+                # Fin de oración con tiempo suficiente en pantalla
+                or (FIN_ORACION.search(actual[-1]["texto"]) and actual[-1]["fin"] - actual[0]["inicio"] >= r.duracion_min)
+            )
+            if cortar:
+                subtitulos.append(_nuevo_subtitulo(actual))
+                actual = []
+        actual.append(palabra)
+    if actual:
+        subtitulos.append(_nuevo_subtitulo(actual))
+
+    def caracteres(sub):
+        return len(" ".join(p["texto"] for p in sub["palabras"]))
+
+    def demasiado_rapido(sub):
+        duracion = sub["fin"] - sub["inicio"]
+        return duracion < r.duracion_min or caracteres(sub) > duracion * r.caracteres_por_segundo
+
+    # Fusionar con el siguiente mientras el resultado siga cumpliendo las restricciones
+    fusionados = []
+    for sub in subtitulos:
+        previo = fusionados[-1] if fusionados else None
+        if (previo is not None and demasiado_rapido(previo)
+                and sub["inicio"] - previo["fin"] <= r.pausa_corte
+                and sub["fin"] - previo["inicio"] <= r.duracion_max
+                and _cabe(previo["palabras"] + sub["palabras"], r)):
+            fusionados[-1] = _nuevo_subtitulo(previo["palabras"] + sub["palabras"])
+        else:
+            fusionados.append(sub)
+
+    # Extender el fin dentro del hueco disponible hasta el siguiente subtítulo
+    for i, sub in enumerate(fusionados):
+        necesario = max(r.duracion_min, caracteres(sub) / r.caracteres_por_segundo)
+        limite = sub["inicio"] + r.duracion_max
+        if i + 1 < len(fusionados):
+            limite = min(limite, fusionados[i + 1]["inicio"] - r.separacion_min)
+        sub["fin"] = max(sub["fin"], min(sub["inicio"] + necesario, limite))
+        sub["lineas"] = _repartir_lineas([p["texto"] for p in sub["palabras"]], r.max_caracteres_linea, r.max_lineas) \
+            or [" ".join(p["texto"] for p in sub["palabras"])]
+    return fusionados
+
+def _render_txt(resultado, subtitulos):
+    partes = [
+        f"Archivo: {resultado['archivo']}\n",
+        f"Idioma: {resultado['idioma']}\n",
+        f"Traducido: {'Sí' if resultado['traducido'] else 'No'}\n",
+        "-" * 50 + "\n",
+        resultado['texto'],
+    ]
+    if resultado.get('texto_traducido') is not None:
+        partes += ["\n\n" + "-" * 50 + "\n", f"Traducción ({resultado['idioma_destino']}):\n", resultado['texto_traducido']]
+    return "".join(partes)
+
+def _render_srt(resultado, subtitulos):
+    return "".join(
+        f"{i}\n{formato_tiempo_srt(s['inicio'])} --> {formato_tiempo_srt(s['fin'])}\n" + "\n".join(s["lineas"]) + "\n\n"
+        for i, s in enumerate(subtitulos, 1)
+    )
+
+def _render_vtt(resultado, subtitulos):
+    return "WEBVTT\n\n" + "".join(
+        f"{formato_tiempo_vtt(s['inicio'])} --> {formato_tiempo_vtt(s['fin'])}\n" + "\n".join(s["lineas"]) + "\n\n"
+        for s in subtitulos
+    )
+
+ENCABEZADO_ASS = """[Script Info]
+ScriptType: v4.00+
+PlayResX: 1920
+PlayResY: 1080
+WrapStyle: 2
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,64,&H00FFFFFF,&H000000FF,&H00000000,&H80000000,0,0,0,0,100,100,0,0,1,3,1,2,60,60,50,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+def _texto_ass(linea):
+    # Llaves (bloques de override) y barras invertidas (\N, \h) tienen significado en ASS
+    return linea.replace("\\", "＼").replace("{", "(").replace("}", ")")
+
+def _render_ass(resultado, subtitulos):
+    return ENCABEZADO_ASS + "".join(
+        f"Dialogue: 0,{formato_tiempo_ass(s['inicio'])},{formato_tiempo_ass(s['fin'])},Default,,0,0,0,,"
+        + "\\N".join(_texto_ass(l) for l in s["lineas"]) + "\n"
+        for s in subtitulos
+    )
+
+def _render_json(resultado, subtitulos):
+    redondear = lambda t: round(t, 3)
+    datos = {
+        "archivo": resultado["archivo"],
+        "idioma": resultado["idioma"],
+        "traducido": resultado["traducido"],
+        "idioma_destino": resultado.get("idioma_destino"),
+        "granularidad": resultado.get("granularidad", "segmento"),
+        "texto": resultado["texto"],
+        "subtitulos": [
+            {
+                "inicio": redondear(s["inicio"]),
+                "fin": redondear(s["fin"]),
+                "texto": " ".join(s["lineas"]),
+                "lineas": s["lineas"],
+                "palabras": [
+                    {"inicio": redondear(p["inicio"]), "fin": redondear(p["fin"]), "texto": p["texto"]}
+                    for p in s["palabras"]
+                ],
+            }
+            for s in subtitulos
+        ],
+    }
+    if resultado.get("texto_traducido") is not None:
+        datos["texto_traducido"] = resultado["texto_traducido"]
+    return json.dumps(datos, ensure_ascii=False, indent=2)
+
+RENDERIZADORES = {
+    "txt": _render_txt,
+    "srt": _render_srt,
+    "vtt": _render_vtt,
+    "ass": _render_ass,
+    "json": _render_json,
+}
+
+def renderizar(resultado, formatos, restricciones=None):
+    """Devuelve {formato: contenido}; palabras y subtítulos se calculan una sola vez para todos"""
+    subtitulos = []
+    if any(f != "txt" for f in formatos):
+        palabras = palabras_desde_chunks(resultado.get("chunks", []), resultado.get("granularidad", "segmento"))
+        subtitulos = construir_subtitulos(palabras, restricciones)
+    return {formato: RENDERIZADORES[formato](resultado, subtitulos) for formato in formatos}
+
+def guardar_subtitulos(resultado, directorio_salida, formatos=("txt",), restricciones=None):
+    """Escribe todos los formatos pedidos para un resultado (una escritura por archivo)"""
+    directorio_salida = Path(directorio_salida)
+    directorio_salida.mkdir(parents=True, exist_ok=True)
+    rutas = []
+    for formato, contenido in renderizar(resultado, formatos, restricciones).items():
+        ruta = ruta_salida(directorio_salida, resultado["archivo"], formato)
+        ruta.write_text(contenido, encoding="utf-8")
+        rutas.append(ruta)
+    return rutas
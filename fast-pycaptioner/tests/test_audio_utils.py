@@ -0,0 +1,60 @@
+"""
+Tests de las ventanas de audio de Fast PyTranscriptor
+Las ventanas consecutivas se solapan y cada chunk se conserva una sola vez
+(el de la ventana dueña de su punto medio). Con VAD las regiones con voz se
+concatenan en una ventana: remapear_tiempo lleva los timestamps de Whisper al
+tiempo del archivo original.
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from audio_utils import SAMPLE_RATE, chunks_absolutos, dividir_en_ventanas, remapear_tiempo, ventanas_desde_regiones
+
+
+def _silencio(segundos):
+    return np.zeros(int(segundos * SAMPLE_RATE), dtype=np.float32)
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_remapear_un_tramo():
+    assert remapear_tiempo([(0.0, 12.5)], 0.0) == 12.5
+    assert remapear_tiempo([(0.0, 12.5)], 3.0) == 15.5
+
+
+def test_remapear_regiones_vad():
+    # Voz en 2-5 s y en 40-44 s: una sola ventana con 0.2 s de silencio entre las dos
+    (mapa, ventana, _), = ventanas_desde_regiones(_silencio(60), [(2.0, 5.0), (40.0, 44.0)])
+    assert mapa == [(0.0, 2.0), (pytest.approx(3.2), 40.0)]
+    assert len(ventana) == pytest.approx((3.0 + 0.2 + 4.0) * SAMPLE_RATE)
+
+    assert remapear_tiempo(mapa, 1.0) == pytest.approx(3.0)
+    assert remapear_tiempo(mapa, 3.1) == pytest.approx(5.1)  # en el silencio de separación: sigue la primera región
+    assert remapear_tiempo(mapa, 3.2) == pytest.approx(40.0)
+    assert remapear_tiempo(mapa, 5.0) == pytest.approx(41.8)
+
+
+def test_remapear_antes_del_primer_tramo():
+    mapa = [(0.5, 10.0), (4.0, 30.0)]
+    assert remapear_tiempo(mapa, 0.0) == pytest.approx(9.5)
+
+
+def test_ventanas_solapadas_sin_duplicados():
+    ventanas = dividir_en_ventanas(_silencio(65), duracion_s=30.0, solape_s=5.0)
+    assert [offset for offset, _, _ in ventanas] == [0.0, 20.0, 40.0]
+
+    # La misma palabra en 24-26 s aparece en la primera y en la segunda ventana
+    salidas = [
+        {"text": " hola", "chunks": [{"timestamp": (24.0, 26.0), "text": " hola"}]},
+        {"text": " hola", "chunks": [{"timestamp": (4.0, 6.0), "text": " hola"}]},
+        {"text": "", "chunks": []},
+    ]
+    chunks = []
+    for (offset, ventana, propia), salida in zip(ventanas, salidas):
+        chunks.extend(chunks_absolutos(salida, [(0.0, offset)], [propia], len(ventana) / SAMPLE_RATE)[1])
+
+    assert chunks == [{"timestamp": (24.0, 26.0), "text": " hola"}]
@@ -0,0 +1,49 @@
+"""
+Tests de la grilla del benchmark de Fast PyTranscriptor
+Un dtype que no se puede cargar (p. ej. float16 sin GPU) deja filas de error
+para sus configuraciones y el resto de la grilla sigue corriendo.
+"""
+
+import json
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+benchmark = pytest.importorskip("benchmark")
+
+
+class TranscriptorFalso:
+    def __init__(self, device_id=0, backend="torch", dtype=None):
+        if dtype == "float16":
+            raise RuntimeError("float16 no soportado en CPU")
+        self.dtype = dtype
+
+
+@pytest.fixture
+def grilla_falsa(tmp_path, monkeypatch):
+    monkeypatch.setattr(benchmark, "TranscriptorGPU", TranscriptorFalso)
+    monkeypatch.setattr(benchmark, "cargar_corpus", lambda directorio: [(tmp_path / "a.wav", "hola", 2.0)])
+    monkeypatch.setattr(benchmark, "entorno", lambda: {})
+    monkeypatch.setattr(benchmark, "PlanificadorLotes", lambda transcriptor: SimpleNamespace(transcribir=lambda *a: []))
+    monkeypatch.setattr(benchmark, "medir_configuracion", lambda *a: {
+        "proceso_s": 1.0, "rtf": 0.5, "latencia_primer_archivo_s": 1.0, "rss_pico_mb": 100.0, "wer": 0.0,
+    })
+    return tmp_path / "reporte.json"
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_dtype_sin_soporte_no_aborta_la_grilla(grilla_falsa, tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["benchmark.py", str(tmp_path), "--dtypes", "float16", "float32",
+                                      "--batch-sizes", "4", "8", "--json", str(grilla_falsa)])
+
+    benchmark.main()
+
+    resultados = json.loads(grilla_falsa.read_text(encoding="utf-8"))["resultados"]
+    assert [(r["dtype"], r["batch_size"], "error" in r) for r in resultados] == [
+        ("float16", 4, True), ("float16", 8, True), ("float32", 4, False), ("float32", 8, False),
+    ]
+    assert "float16 no soportado" in resultados[0]["error"]
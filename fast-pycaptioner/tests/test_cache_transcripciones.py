@@ -0,0 +1,109 @@
+"""
+Tests de invalidación de la caché de transcripciones de Fast PyTranscriptor
+La clave combina la huella del contenido con las opciones que cambian el
+resultado: cambiar el audio o cualquiera de esas opciones es un fallo de caché,
+tocar el archivo sin cambiar su contenido no.
+"""
+
+import os
+
+import pytest
+
+from cache_transcripciones import CacheTranscripciones
+
+MODELO = "openai/whisper-large-v3-turbo"
+RESULTADO = {"texto": "hola mundo", "chunks": [{"timestamp": (0.0, 1.5), "text": " hola mundo"}], "idioma": "es"}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CacheTranscripciones(tmp_path / "cache")
+
+
+@pytest.fixture
+def audio(tmp_path):
+    archivo = tmp_path / "clip.wav"
+    archivo.write_bytes(b"RIFF" + bytes(range(256)) * 8)
+    return archivo
+
+
+def _opciones(**cambios):
+    base = dict(idioma="es", traducir=False, segmentacion="ventanas", deteccion_idioma=None)
+    base.update(cambios)
+    return CacheTranscripciones.opciones(MODELO, **base)
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_acierto_con_mismo_contenido_y_opciones(cache, audio):
+    cache.guardar(audio, _opciones(), RESULTADO)
+
+    resultado = cache.obtener(audio, _opciones())
+
+    assert resultado["texto"] == "hola mundo"
+    assert resultado["chunks"][0]["timestamp"] == (0.0, 1.5)
+    assert resultado["desde_cache"] is True
+    assert (cache.aciertos, cache.fallos) == (1, 0)
+
+
+def test_contenido_modificado_invalida(cache, audio):
+    cache.guardar(audio, _opciones(), RESULTADO)
+    with open(audio, "ab") as f:
+        f.write(b"mas audio")
+
+    assert cache.obtener(audio, _opciones()) is None
+
+
+def test_touch_sin_cambios_sigue_acertando(cache, audio):
+    cache.guardar(audio, _opciones(), RESULTADO)
+    st = os.stat(audio)
+    os.utime(audio, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+    assert cache.obtener(audio, _opciones()) is not None
+
+
+@pytest.mark.parametrize("cambio", [
+    {"idioma": "en"},
+    {"traducir": True},
+    {"segmentacion": "pipeline"},
+    {"vad": "silero"},
+    {"backend": "int8"},
+    {"timestamps": "palabra"},
+    {"idioma": None, "deteccion_idioma": "por_ventana"},
+    {"deteccion_idioma": "previa"},
+])
+def test_opcion_distinta_invalida(cache, audio, cambio):
+    cache.guardar(audio, _opciones(), RESULTADO)
+
+    assert cache.obtener(audio, _opciones(**cambio)) is None
+
+
+def test_modo_de_deteccion_separa_entradas(cache, audio):
+    # Con y sin --sin-deteccion-idioma el idioma queda en "auto", pero no comparten entrada
+    cache.guardar(audio, _opciones(idioma=None, deteccion_idioma="previa"), RESULTADO)
+
+    assert cache.obtener(audio, _opciones(idioma=None, deteccion_idioma="por_ventana")) is None
+    assert cache.obtener(audio, _opciones(idioma=None, deteccion_idioma="previa")) is not None
+
+
+def test_errores_no_se_cachean(cache, audio):
+    cache.guardar(audio, _opciones(), {"archivo": str(audio), "error": "ffmpeg"})
+
+    assert cache.obtener(audio, _opciones()) is None
+
+
+def test_archivo_ilegible_es_fallo(cache, tmp_path):
+    desaparecido = tmp_path / "borrado.wav"
+
+    assert cache.obtener(desaparecido, _opciones()) is None
+    assert cache.obtener_idioma(desaparecido, MODELO, 30) is None
+    cache.guardar_idioma(desaparecido, MODELO, 30, "es")
+
+
+def test_idioma_detectado_por_contenido(cache, audio):
+    cache.guardar_idioma(audio, MODELO, 30, "es")
+
+    assert cache.obtener_idioma(audio, MODELO, 30) == "es"
+    assert cache.obtener_idioma(audio, MODELO, 10) is None
@@ -0,0 +1,49 @@
+"""
+Tests del demonio de transcripción de Fast PyTranscriptor
+El demonio y el CLI comparten entradas de caché para el mismo archivo y las
+mismas opciones, y las salidas solo se escriben en directorios permitidos.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+demonio = pytest.importorskip("demonio")
+
+from cache_transcripciones import CacheTranscripciones
+from main import MODEL_ID
+
+
+def _servicio(**atributos):
+    return SimpleNamespace(transcriptor=SimpleNamespace(backend="torch"), **atributos)
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_clave_de_cache_como_el_cli_con_idioma_forzado():
+    trabajo = demonio.Trabajo(["a.wav"], idioma="es")
+
+    opciones = demonio.ServicioTranscripcion._opciones_cache(_servicio(), trabajo)
+
+    # main.py con --idioma es (planificador lotes): sin modo de detección
+    assert opciones == CacheTranscripciones.opciones(MODEL_ID, "es", False, segmentacion="ventanas",
+                                                     deteccion_idioma=None)
+
+
+def test_clave_de_cache_sin_idioma_detecta_por_ventana():
+    trabajo = demonio.Trabajo(["a.wav"])
+
+    opciones = demonio.ServicioTranscripcion._opciones_cache(_servicio(), trabajo)
+
+    assert opciones["deteccion_idioma"] == "por_ventana"
+    assert opciones["idioma"] == "auto"
+
+
+def test_salida_fuera_de_los_permitidos(tmp_path):
+    servicio = _servicio(salidas_permitidas=[tmp_path.resolve()])
+
+    assert demonio.ServicioTranscripcion.validar_salida(servicio, tmp_path / "sub") == str((tmp_path / "sub").resolve())
+    with pytest.raises(ValueError):
+        demonio.ServicioTranscripcion.validar_salida(servicio, tmp_path / ".." / "otro")
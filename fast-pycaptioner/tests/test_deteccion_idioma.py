@@ -0,0 +1,105 @@
+"""
+Tests de la detección de idioma previa de Fast PyTranscriptor
+El idioma sale de los logits de los tokens de idioma tras el encoder, así que
+un clip no inglés siempre recibe un código, también en el camino de ONNX
+Runtime (modelo sin detect_language) que antes dependía del pipeline.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from deteccion_idioma import detectar_idiomas, SEGUNDOS_DETECCION
+
+IDIOMAS = {"<|en|>": 50259, "<|es|>": 50262, "<|fr|>": 50265}
+INICIO = 50258
+
+
+def _modelo_forzado(idioma):
+    """Whisper diminuto cuyo primer paso de decoder siempre prefiere <|idioma|>"""
+    from transformers import GenerationConfig, WhisperConfig, WhisperForConditionalGeneration
+
+    config = WhisperConfig(
+        vocab_size=51865, d_model=16, encoder_layers=1, decoder_layers=1,
+        encoder_attention_heads=2, decoder_attention_heads=2,
+        encoder_ffn_dim=16, decoder_ffn_dim=16, num_mel_bins=80,
+        max_source_positions=1500, max_target_positions=448,
+        decoder_start_token_id=INICIO, tie_word_embeddings=False,
+    )
+    modelo = WhisperForConditionalGeneration(config).eval()
+    modelo.generation_config = GenerationConfig(decoder_start_token_id=INICIO, lang_to_id=IDIOMAS)
+    with torch.no_grad():
+        # Salida del decoder constante: los logits dependen solo de proj_out
+        norma = modelo.model.decoder.layer_norm
+        norma.weight.zero_()
+        norma.bias.fill_(1.0)
+        modelo.proj_out.weight.zero_()
+        for token, token_id in IDIOMAS.items():
+            modelo.proj_out.weight[token_id] = 1.0 if token == f"<|{idioma}|>" else -1.0
+    return modelo
+
+
+class ModeloSinDetectLanguage:
+    """Interfaz de ORTModelForSpeechSeq2Seq: generation_config y __call__, sin detect_language"""
+
+    def __init__(self, modelo):
+        self._modelo = modelo
+        self.generation_config = modelo.generation_config
+
+    def __call__(self, **kwargs):
+        return self._modelo(**kwargs)
+
+
+def _transcriptor(modelo, backend):
+    from transformers import WhisperFeatureExtractor
+
+    return SimpleNamespace(
+        model=modelo,
+        processor=SimpleNamespace(feature_extractor=WhisperFeatureExtractor()),
+        device="cpu",
+        backend=backend,
+        batch_size=2,
+        model_id="whisper-diminuto",
+    )
+
+
+@pytest.fixture
+def clip_espanol(tmp_path, monkeypatch):
+    """Un archivo cuyo audio decodificado es un tono de 2 s (la decodificación no llama a ffmpeg)"""
+    import deteccion_idioma
+
+    tiempo = np.arange(2 * 16000, dtype=np.float32) / 16000
+    audio = (0.1 * np.sin(2 * np.pi * 220 * tiempo)).astype(np.float32)
+    monkeypatch.setattr(deteccion_idioma, "decodificar_audio", lambda archivo, duracion_s=None: audio)
+    archivo = tmp_path / "entrevista_es.wav"
+    archivo.touch()
+    return archivo
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+@pytest.mark.parametrize("backend", ["torch", "onnx"])
+def test_clip_no_ingles_recibe_idioma(clip_espanol, backend):
+    modelo = _modelo_forzado("es")
+    if backend == "onnx":
+        modelo = ModeloSinDetectLanguage(modelo)
+
+    idiomas = detectar_idiomas(_transcriptor(modelo, backend), [clip_espanol], SEGUNDOS_DETECCION)
+
+    assert idiomas == {str(clip_espanol): "es"}
+
+
+def test_lote_con_varios_clips(clip_espanol, tmp_path):
+    otro = tmp_path / "charla_fr.wav"
+    otro.touch()
+    transcriptor = _transcriptor(ModeloSinDetectLanguage(_modelo_forzado("fr")), "onnx")
+
+    idiomas = detectar_idiomas(transcriptor, [clip_espanol, otro])
+
+    assert idiomas == {str(clip_espanol): "fr", str(otro): "fr"}
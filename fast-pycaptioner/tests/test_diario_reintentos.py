@@ -0,0 +1,79 @@
+"""
+Tests del diario de reintentos de Fast PyTranscriptor
+Una corrida interrumpida se reanuda con los archivos fallidos y los que nunca
+terminaron; una línea a medio escribir no rompe la lectura ni el registro.
+Un archivo que nunca devolvió resultado queda como fallido, sin abortar la corrida.
+"""
+
+import pytest
+
+from diario_reintentos import DiarioReintentos
+
+
+def _corrida_interrumpida(directorio):
+    diario = DiarioReintentos(directorio)
+    diario.reiniciar()
+    diario.registrar({"archivo": "a.wav", "texto": "hola"})
+    diario.registrar({"archivo": "b.wav", "error": "ffmpeg no pudo decodificar"})
+    diario.cerrar()
+    return diario
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_reanudar_omite_completados(tmp_path):
+    _corrida_interrumpida(tmp_path)
+
+    diario = DiarioReintentos(tmp_path)
+
+    assert diario.pendientes(["a.wav", "b.wav", "c.wav"]) == ["b.wav", "c.wav"]
+    assert diario.fallidos() == {"b.wav": "ffmpeg no pudo decodificar"}
+
+
+def test_ultimo_estado_gana(tmp_path):
+    _corrida_interrumpida(tmp_path)
+
+    diario = DiarioReintentos(tmp_path)
+    diario.registrar({"archivo": "b.wav", "texto": "ahora sí"})
+    diario.cerrar()
+
+    assert diario.pendientes(["a.wav", "b.wav"]) == []
+    assert diario.fallidos() == {}
+
+
+def test_linea_incompleta_al_caerse(tmp_path):
+    diario = _corrida_interrumpida(tmp_path)
+    with open(diario.ruta, "a", encoding="utf-8") as f:
+        f.write('{"archivo": "c.wav", "est')
+
+    diario = DiarioReintentos(tmp_path)
+    assert diario.pendientes(["a.wav", "c.wav"]) == ["c.wav"]
+
+    diario.registrar({"archivo": "c.wav", "texto": "listo"})
+    diario.cerrar()
+    assert DiarioReintentos(tmp_path).completados() == {"a.wav", "c.wav"}
+
+
+def test_reiniciar_descarta_el_diario(tmp_path):
+    diario = _corrida_interrumpida(tmp_path)
+
+    diario.reiniciar()
+
+    assert not diario.ruta.exists()
+    assert diario.pendientes(["a.wav"]) == ["a.wav"]
+
+
+def test_archivo_sin_resultado_queda_fallido(tmp_path):
+    main = pytest.importorskip("main")
+    diario = DiarioReintentos(tmp_path)
+    # El pool de decodificación se cayó después de entregar a.wav
+    resultados = {"a.wav": {"archivo": "a.wav", "texto": "hola"}}
+    diario.registrar(resultados["a.wav"])
+
+    ordenados = main.recoger_en_orden(["a.wav", "b.wav"], resultados, diario.registrar)
+    diario.cerrar()
+
+    assert ordenados == [{"archivo": "a.wav", "texto": "hola"}, {"archivo": "b.wav", "error": "no procesado"}]
+    assert DiarioReintentos(tmp_path).pendientes(["a.wav", "b.wav"]) == ["b.wav"]
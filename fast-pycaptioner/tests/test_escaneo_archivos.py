@@ -0,0 +1,91 @@
+"""
+Tests del escáner de archivos con índice persistente de Fast PyTranscriptor
+Un directorio sin cambios reutiliza su listado, pero los archivos editados en
+su lugar (que no cambian el mtime del directorio) reportan tamaño y mtime al día.
+Esas firmas alimentan la huella de la caché de transcripciones sin otro stat.
+"""
+
+import os
+
+import pytest
+
+import cache_transcripciones
+from cache_transcripciones import CacheTranscripciones
+from escaneo_archivos import EscanerArchivos
+
+
+@pytest.fixture
+def arbol(tmp_path):
+    raiz = tmp_path / "audios"
+    (raiz / "sub").mkdir(parents=True)
+    (raiz / "a.wav").write_bytes(b"a" * 10)
+    (raiz / "sub" / "b.MP3").write_bytes(b"b" * 20)
+    (raiz / "notas.txt").write_text("no es audio")
+    return raiz
+
+
+def _escanear(raiz, indice):
+    escaner = EscanerArchivos(hilos=2, directorio_indice=indice)
+    return escaner, {ruta.name: (tamano, mtime_ns) for ruta, tamano, mtime_ns in escaner.iterar(raiz)}
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_primer_escaneo(arbol, tmp_path):
+    escaner, archivos = _escanear(arbol, tmp_path / "indice")
+
+    assert {nombre: tamano for nombre, (tamano, _) in archivos.items()} == {"a.wav": 10, "b.MP3": 20}
+    assert (escaner.listados, escaner.reutilizados) == (2, 0)
+
+
+def test_reutiliza_listado_y_ve_ediciones(arbol, tmp_path):
+    _escanear(arbol, tmp_path / "indice")
+    mtime_directorio = os.stat(arbol).st_mtime_ns
+    archivo = arbol / "a.wav"
+    with open(archivo, "ab") as f:
+        f.write(b"editado")
+    st = os.stat(archivo)
+    os.utime(archivo, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert os.stat(arbol).st_mtime_ns == mtime_directorio
+
+    escaner, archivos = _escanear(arbol, tmp_path / "indice")
+
+    assert (escaner.listados, escaner.reutilizados) == (0, 2)
+    assert archivos["a.wav"] == (17, os.stat(archivo).st_mtime_ns)
+
+
+def test_archivo_nuevo_vuelve_a_listar(arbol, tmp_path):
+    _escanear(arbol, tmp_path / "indice")
+    (arbol / "sub" / "c.flac").write_bytes(b"c")
+
+    escaner, archivos = _escanear(arbol, tmp_path / "indice")
+
+    assert "c.flac" in archivos
+    assert (escaner.listados, escaner.reutilizados) == (1, 1)
+
+
+def test_sin_indice_siempre_lista(arbol, tmp_path):
+    EscanerArchivos(directorio_indice=tmp_path / "indice", usar_indice=False).archivos(arbol)
+    escaner = EscanerArchivos(directorio_indice=tmp_path / "indice", usar_indice=False)
+
+    assert [ruta.name for ruta in escaner.archivos(arbol)] == ["a.wav", "b.MP3"]
+    assert escaner.reutilizados == 0
+
+
+def test_firmas_evitan_segundo_stat(arbol, tmp_path, monkeypatch):
+    firmas = {}
+    rutas = EscanerArchivos(directorio_indice=tmp_path / "indice").archivos(arbol, firmas)
+    assert set(firmas) == {str(ruta) for ruta in rutas}
+    cache = CacheTranscripciones(tmp_path / "cache", firmas=firmas)
+    huellas = [cache.huella(ruta) for ruta in rutas]
+    cache.guardar_indice()
+
+    consultados = []
+    stat = os.stat
+    monkeypatch.setattr(cache_transcripciones.os, "stat", lambda ruta, *a, **k: consultados.append(ruta) or stat(ruta, *a, **k))
+    cache = CacheTranscripciones(tmp_path / "cache", firmas=firmas)
+
+    assert [cache.huella(ruta) for ruta in rutas] == huellas
+    assert not any(str(ruta) in map(str, consultados) for ruta in rutas)
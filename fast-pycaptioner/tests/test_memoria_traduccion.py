@@ -0,0 +1,62 @@
+"""
+Tests de la memoria de traducción de Fast PyTranscriptor
+Los segmentos se buscan normalizados (espacios y Unicode) por par de idiomas y
+modelo; lo guardado persiste entre corridas.
+"""
+
+import pytest
+
+from memoria_traduccion import MemoriaTraduccion
+
+MODELO = "Helsinki-NLP/opus-mt-es-en"
+
+
+@pytest.fixture
+def memoria(tmp_path):
+    with MemoriaTraduccion(tmp_path / "memoria.sqlite") as memoria:
+        memoria.guardar("es", "en", MODELO, [("Hola a todos.", "Hello everyone."), ("Gracias.", "Thank you.")])
+        yield memoria
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_acierto_con_segmento_normalizado(memoria):
+    encontrados = memoria.buscar("es", "en", MODELO, ["  Hola   a todos. ", "Gracias."])
+
+    assert encontrados == {"Hola a todos.": "Hello everyone.", "Gracias.": "Thank you."}
+    assert (memoria.aciertos, memoria.fallos) == (2, 0)
+
+
+def test_nfc_y_nfd_son_el_mismo_segmento(memoria):
+    memoria.guardar("es", "en", MODELO, [("Canci\u00f3n", "Song")])
+
+    # "o" + acento combinante (NFD) se normaliza a "ó" (NFC)
+    assert memoria.buscar("es", "en", MODELO, ["Cancio\u0301n"]) == {"Canci\u00f3n": "Song"}
+
+
+def test_fallo_en_segmento_nuevo(memoria):
+    encontrados = memoria.buscar("es", "en", MODELO, ["Hola a todos.", "Nos vemos."])
+
+    assert encontrados == {"Hola a todos.": "Hello everyone."}
+    assert (memoria.aciertos, memoria.fallos) == (1, 1)
+    assert memoria.tasa_aciertos() == 0.5
+
+
+@pytest.mark.parametrize("origen, destino, modelo", [
+    ("es", "fr", MODELO),
+    ("en", "en", MODELO),
+    ("es", "en", "Helsinki-NLP/opus-mt-es-en-v2"),
+])
+def test_otro_par_o_modelo_no_acierta(memoria, origen, destino, modelo):
+    assert memoria.buscar(origen, destino, modelo, ["Hola a todos."]) == {}
+
+
+def test_persiste_entre_corridas(tmp_path):
+    ruta = tmp_path / "memoria.sqlite"
+    with MemoriaTraduccion(ruta) as memoria:
+        memoria.guardar("es", "en", MODELO, [("Buenos días.", "Good morning.")])
+
+    with MemoriaTraduccion(ruta) as memoria:
+        assert memoria.buscar("es", "en", MODELO, ["Buenos días."]) == {"Buenos días.": "Good morning."}
@@ -0,0 +1,91 @@
+"""
+Tests de la preparación de pesos compartidos de Fast PyTranscriptor
+El safetensors float32 se escribe en un directorio temporal y se mueve al
+terminar: un guardado interrumpido no deja un directorio que las corridas
+siguientes tomen por completo.
+"""
+
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from pool_modelos import preparar_pesos_compartidos, repartir_nucleos
+
+
+class ModeloFalso:
+    def save_pretrained(self, directorio, safe_serialization=True):
+        (directorio / "model.safetensors").write_bytes(b"pesos")
+        (directorio / "config.json").write_text("{}")
+
+
+class ProcesadorFalso:
+    def save_pretrained(self, directorio):
+        (directorio / "preprocessor_config.json").write_text("{}")
+
+
+@pytest.fixture
+def transformers_falso(monkeypatch):
+    """torch y transformers mínimos: from_pretrained devuelve objetos que escriben archivos"""
+    estado = {"procesador_falla": False, "cargas": 0}
+
+    def cargar_modelo(model_id, **kwargs):
+        estado["cargas"] += 1
+        return ModeloFalso()
+
+    def cargar_procesador(model_id):
+        if estado["procesador_falla"]:
+            raise OSError("corte de red")
+        return ProcesadorFalso()
+
+    monkeypatch.setitem(sys.modules, "torch", SimpleNamespace(float32="float32"))
+    monkeypatch.setitem(sys.modules, "transformers", SimpleNamespace(
+        AutoModelForSpeechSeq2Seq=SimpleNamespace(from_pretrained=cargar_modelo),
+        AutoProcessor=SimpleNamespace(from_pretrained=cargar_procesador),
+    ))
+    return estado
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_prepara_una_sola_vez(tmp_path, transformers_falso):
+    directorio = preparar_pesos_compartidos("openai/whisper-tiny", tmp_path)
+    assert directorio == tmp_path / "openai--whisper-tiny"
+    assert (directorio / "model.safetensors").exists()
+
+    preparar_pesos_compartidos("openai/whisper-tiny", tmp_path)
+
+    assert transformers_falso["cargas"] == 1
+    assert [p.name for p in tmp_path.iterdir()] == ["openai--whisper-tiny"]
+
+
+def test_guardado_interrumpido_no_queda(tmp_path, transformers_falso):
+    transformers_falso["procesador_falla"] = True
+    with pytest.raises(OSError):
+        preparar_pesos_compartidos("openai/whisper-tiny", tmp_path)
+
+    # Ni el directorio final ni el temporal
+    assert list(tmp_path.iterdir()) == []
+
+    transformers_falso["procesador_falla"] = False
+    directorio = preparar_pesos_compartidos("openai/whisper-tiny", tmp_path)
+    assert (directorio / "preprocessor_config.json").exists()
+
+
+def test_directorio_incompleto_se_rehace(tmp_path, transformers_falso):
+    # Una versión anterior escribía en su lugar y se cortó antes del procesador
+    incompleto = tmp_path / "openai--whisper-tiny"
+    incompleto.mkdir()
+    (incompleto / "model.safetensors").write_bytes(b"a medias")
+
+    directorio = preparar_pesos_compartidos("openai/whisper-tiny", tmp_path)
+
+    assert (directorio / "preprocessor_config.json").exists()
+    assert (directorio / "model.safetensors").read_bytes() == b"pesos"
+
+
+def test_repartir_nucleos():
+    assert repartir_nucleos(3, list(range(8))) == [[0, 1, 2], [3, 4, 5], [6, 7]]
+    assert repartir_nucleos(16, [0, 1]) == [[0], [1]]
@@ -0,0 +1,43 @@
+"""
+Tests del formato de tiempos de subtítulos de Fast PyTranscriptor
+SRT (HH:MM:SS,mmm), WebVTT (HH:MM:SS.mmm) y ASS (H:MM:SS.cc), incluidos los
+redondeos que cruzan el minuto o la hora.
+"""
+
+import pytest
+
+from subtitulos import formato_tiempo_ass, formato_tiempo_srt, formato_tiempo_vtt
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+@pytest.mark.parametrize("segundos, esperado", [
+    (None, "00:00:00,000"),
+    (0, "00:00:00,000"),
+    (1.5, "00:00:01,500"),
+    (61.25, "00:01:01,250"),
+    (3661.007, "01:01:01,007"),
+    (59.9996, "00:01:00,000"),
+    (3599.9999, "01:00:00,000"),
+    (36000.0, "10:00:00,000"),
+])
+def test_formato_srt(segundos, esperado):
+    assert formato_tiempo_srt(segundos) == esperado
+
+
+def test_formato_vtt_usa_punto():
+    assert formato_tiempo_vtt(3661.007) == "01:01:01.007"
+    assert formato_tiempo_vtt(None) == "00:00:00.000"
+
+
+@pytest.mark.parametrize("segundos, esperado", [
+    (None, "0:00:00.00"),
+    (1.5, "0:00:01.50"),
+    (61.254, "0:01:01.25"),
+    (59.996, "0:01:00.00"),
+    (3661.0, "1:01:01.00"),
+])
+def test_formato_ass(segundos, esperado):
+    assert formato_tiempo_ass(segundos) == esperado
@@ -0,0 +1,83 @@
+"""
+Tests de tiempo de arranque de Fast PyTranscriptor
+Importar main, `--help` y una corrida sin archivos no deben cargar torch,
+transformers ni MarianMT (los wrappers de cron llaman al CLI miles de veces).
+"""
+
+import os
+import sys
+import time
+import subprocess
+from pathlib import Path
+
+import pytest
+
+# Dependencias livianas que main sí importa al arrancar
+pytest.importorskip("numpy")
+pytest.importorskip("tqdm")
+
+RAIZ = Path(__file__).parent.parent
+MODULOS_PESADOS = ("torch", "transformers", "sentencepiece", "traductor_bidireccional")
+
+# Márgenes amplios para CI lento: importar torch solo ya tarda varios segundos
+LIMITE_IMPORTACION_S = 1.0
+LIMITE_HELP_S = 3.0
+
+def _python(*args, env=None):
+    return subprocess.run([sys.executable, *args], cwd=RAIZ, capture_output=True, text=True, timeout=120, env=env)
+
+def _modulos_pesados_cargados(codigo, env=None):
+    """Corre `codigo` en un intérprete nuevo y devuelve los módulos pesados que quedaron importados"""
+    script = codigo + f"\nimport sys\nprint(','.join(m for m in {MODULOS_PESADOS!r} if m in sys.modules))"
+    proceso = _python("-c", script, env=env)
+    assert proceso.returncode == 0, proceso.stderr
+    return [m for m in proceso.stdout.strip().splitlines()[-1].split(",") if m] if proceso.stdout.strip() else []
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_importar_main_no_carga_modulos_pesados():
+    assert _modulos_pesados_cargados("import main") == []
+
+
+def test_tiempo_importacion_main():
+    """-X importtime: tiempo acumulado de `import main` (sin el arranque del intérprete)"""
+    proceso = _python("-X", "importtime", "-c", "import main")
+    assert proceso.returncode == 0, proceso.stderr
+
+    acumulado_us = None
+    for linea in proceso.stderr.splitlines():
+        # "import time:      self [us] | cumulative | imported package"
+        partes = [p.strip() for p in linea.removeprefix("import time:").split("|")]
+        if len(partes) == 3 and partes[2] == "main":
+            acumulado_us = int(partes[1])
+    assert acumulado_us is not None, proceso.stderr[-500:]
+    assert acumulado_us / 1e6 < LIMITE_IMPORTACION_S
+
+
+def test_help_rapido():
+    inicio = time.perf_counter()
+    proceso = _python("main.py", "--help")
+    duracion = time.perf_counter() - inicio
+
+    assert proceso.returncode == 0, proceso.stderr
+    assert "--idioma" in proceso.stdout
+    assert duracion < LIMITE_HELP_S
+
+
+def test_directorio_vacio_no_carga_modelos(tmp_path):
+    entrada = tmp_path / "vacio"
+    entrada.mkdir()
+    # HOME temporal: el índice de archivos no toca la caché real
+    env = dict(os.environ, HOME=str(tmp_path))
+    codigo = (
+        "import sys, main\n"
+        f"sys.argv = ['main.py', {str(entrada)!r}, '-o', {str(tmp_path / 'salida')!r}]\n"
+        "try:\n"
+        "    main.main()\n"
+        "except SystemExit:\n"
+        "    pass"
+    )
+    assert _modulos_pesados_cargados(codigo, env=env) == []
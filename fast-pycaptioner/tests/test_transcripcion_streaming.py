@@ -0,0 +1,70 @@
+"""
+Tests de la transcripción en streaming de Fast PyTranscriptor
+Las ventanas armadas a partir de bloques son las mismas que las del
+planificador por lotes (solapadas, con tramo propio), así una palabra que
+cruza el límite entre bloques de 30 s aparece una sola vez.
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import transcripcion_streaming
+from audio_utils import SAMPLE_RATE, dividir_en_ventanas, ventanas_por_bloques
+
+
+def _bloques(audio, segundos):
+    muestras = int(segundos * SAMPLE_RATE)
+    for inicio in range(0, len(audio), muestras):
+        yield inicio / SAMPLE_RATE, audio[inicio:inicio + muestras]
+
+
+class TranscriptorFalso:
+    """Devuelve la palabra "cruce" (58-62 s del archivo) en cada ventana que la contiene"""
+
+    def __init__(self):
+        self.ventanas = []
+
+    def pipe(self, entrada, **kwargs):
+        audio = entrada["raw"]
+        # La ventana se identifica por su primera muestra: el audio es un contador de muestras
+        offset = float(audio[0]) / SAMPLE_RATE
+        self.ventanas.append(offset)
+        duracion = len(audio) / SAMPLE_RATE
+        chunks = []
+        if offset <= 58.0 and 62.0 <= offset + duracion:
+            chunks.append({"timestamp": (58.0 - offset, 62.0 - offset), "text": " cruce"})
+        return {"text": "".join(c["text"] for c in chunks), "chunks": chunks}
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+@pytest.mark.parametrize("segundos_audio", [10, 30, 30 + 1 / SAMPLE_RATE, 65, 95.5])
+@pytest.mark.parametrize("segundos_bloque", [30, 7])
+def test_mismas_ventanas_que_dividir_en_ventanas(segundos_audio, segundos_bloque):
+    audio = np.arange(int(segundos_audio * SAMPLE_RATE), dtype=np.float32)
+
+    esperadas = dividir_en_ventanas(audio)
+    obtenidas = list(ventanas_por_bloques(_bloques(audio, segundos_bloque)))
+
+    assert [(o, p) for o, _, p in obtenidas] == [(o, p) for o, _, p in esperadas]
+    for (_, ventana, _), (_, esperada, _) in zip(obtenidas, esperadas):
+        np.testing.assert_array_equal(ventana, esperada)
+
+
+def _voz_continua(audio, sampling_rate):
+    return [(0.0, len(audio) / sampling_rate)]
+
+
+@pytest.mark.parametrize("vad", [None, _voz_continua])
+def test_palabra_en_el_limite_entre_bloques_una_vez(monkeypatch, vad):
+    audio = np.arange(90 * SAMPLE_RATE, dtype=np.float32)
+    monkeypatch.setattr(transcripcion_streaming, "leer_audio_por_bloques", lambda archivo, duracion: _bloques(audio, 30))
+    transcriptor = TranscriptorFalso()
+
+    segmentos = list(transcripcion_streaming.transcribir_stream(transcriptor, "largo.wav", vad=vad))
+
+    assert transcriptor.ventanas == [0.0, 20.0, 40.0, 60.0]
+    assert segmentos == [{"timestamp": (58.0, 62.0), "text": " cruce"}]
@@ -5,15 +5,157 @@ Usa MarianMT de Helsinki-NLP para traducir entre múltiples idiomas
 """
 
 from transformers import MarianMTModel, MarianTokenizer
+from collections import OrderedDict
+import gc
+import os
+import time
 import torch
 import logging
 
+from memoria_traduccion import MemoriaTraduccion, normalizar_segmento
+
 logger = logging.getLogger(__name__)
 
+# Idioma intermedio cuando no hay modelo directo origen-destino
+IDIOMA_PIVOTE = "en"
+
+class ModeloNoDisponible(Exception):
+    """No existe un modelo Marian para el par de idiomas"""
+
+def repo_inexistente(error):
+    """True si el error (o su causa) indica que el repo no existe en el hub"""
+    from huggingface_hub.utils import RepositoryNotFoundError
+    while error is not None:
+        if isinstance(error, RepositoryNotFoundError):
+            return True
+        # transformers envuelve el 404 en un OSError con este mensaje
+        if isinstance(error, OSError) and "is not a valid model identifier" in str(error):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+def memoria_modelo(model):
+    """Bytes ocupados por parámetros y buffers del modelo"""
+    tensores = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensores)
+
+class CacheModelos:
+    def __init__(self, presupuesto_mb=2048, device="cpu", descargar_inactivos=False, presupuesto_cpu_mb=None):
+        """
+        Caché LRU de modelos de traducción con presupuesto de memoria.
+        - presupuesto_mb: memoria máxima de modelos en `device`
+        - descargar_inactivos: en GPU, los modelos menos usados se mueven a RAM
+          (hasta presupuesto_cpu_mb) en lugar de descartarse
+        """
+        self.presupuesto = presupuesto_mb * 1024 ** 2
+        self.presupuesto_cpu = (presupuesto_cpu_mb if presupuesto_cpu_mb is not None else presupuesto_mb) * 1024 ** 2
+        self.device = device
+        self.descargar_inactivos = descargar_inactivos and device != "cpu"
+        self._entradas = OrderedDict()  # clave -> dict, del menos al más reciente
+        self.desalojos = 0
+
+    def __contains__(self, clave):
+        return clave in self._entradas
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def _en_dispositivo(self, entrada):
+        return entrada["dispositivo"] == self.device
+
+    def _uso(self, en_dispositivo=True):
+        return sum(e["bytes"] for e in self._entradas.values() if self._en_dispositivo(e) == en_dispositivo)
+
+    def _mover(self, entrada, dispositivo):
+        entrada["model"] = entrada["model"].to(dispositivo)
+        entrada["dispositivo"] = dispositivo
+
+    def _liberar(self, necesarios, excepto=None):
+        """Desaloja (o descarga a CPU) modelos LRU hasta que quepan `necesarios` bytes en el dispositivo"""
+        for clave in list(self._entradas):
+            if self._uso() + necesarios <= self.presupuesto:
+                break
+            entrada = self._entradas[clave]
+            if clave == excepto or not self._en_dispositivo(entrada):
+                continue
+            if self.descargar_inactivos and self._uso(en_dispositivo=False) + entrada["bytes"] <= self.presupuesto_cpu:
+                logger.info(f"Descargando modelo inactivo a CPU: {clave}")
+                self._mover(entrada, "cpu")
+            else:
+                logger.info(f"Desalojando modelo de traducción: {clave} ({entrada['bytes'] / 1024 ** 2:.0f} MB)")
+                del self._entradas[clave]
+                self.desalojos += 1
+
+        # Modelos ya descargados a CPU que exceden su propio presupuesto
+        for clave in list(self._entradas):
+            if self._uso(en_dispositivo=False) <= self.presupuesto_cpu or not self.descargar_inactivos:
+                break
+            if not self._en_dispositivo(self._entradas[clave]):
+                del self._entradas[clave]
+                self.desalojos += 1
+
+        gc.collect()
+        if self.device != "cpu" and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def obtener(self, clave, cargador):
+        """
+        Devuelve (tokenizer, model); carga con cargador() solo si no está en caché.
+        cargador() deja el modelo en CPU: se mide, se hace espacio y recién
+        entonces se sube al dispositivo, así nunca conviven de más en la GPU.
+        """
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            tokenizer, model = cargador()
+            tamano = memoria_modelo(model)
+            if tamano > self.presupuesto:
+                logger.warning(f"El modelo {clave} ({tamano / 1024 ** 2:.0f} MB) excede el presupuesto de la caché")
+            self._liberar(tamano)
+            entrada = {"tokenizer": tokenizer, "model": model, "bytes": tamano,
+                       "dispositivo": "cpu", "hits": 0, "ultimo_uso": time.time()}
+            if self.device != "cpu":
+                self._mover(entrada, self.device)
+            self._entradas[clave] = entrada
+        else:
+            entrada["hits"] += 1
+            if not self._en_dispositivo(entrada):
+                # Modelo descargado: hacer espacio y subirlo de nuevo
+                self._liberar(entrada["bytes"], excepto=clave)
+                self._mover(entrada, self.device)
+
+        entrada["ultimo_uso"] = time.time()
+        self._entradas.move_to_end(clave)
+        return entrada["tokenizer"], entrada["model"]
+
+    def descargar_ociosos(self, segundos=300):
+        """Descarga a CPU (o desaloja) los modelos sin uso en los últimos `segundos`"""
+        limite = time.time() - segundos
+        for clave, entrada in list(self._entradas.items()):
+            if entrada["ultimo_uso"] >= limite or not self._en_dispositivo(entrada):
+                continue
+            if self.descargar_inactivos:
+                self._mover(entrada, "cpu")
+            else:
+                del self._entradas[clave]
+                self.desalojos += 1
+        self._liberar(0)
+
+    def estadisticas(self):
+        """Hits y memoria por modelo (del más al menos reciente)"""
+        return [
+            {"clave": clave, "hits": e["hits"], "mb": e["bytes"] / 1024 ** 2, "dispositivo": e["dispositivo"]}
+            for clave, e in reversed(self._entradas.items())
+        ]
+
 class TraductorBidireccional:
-    def __init__(self, device="cpu"):
+    def __init__(self, device="cpu", presupuesto_mb=2048, descargar_inactivos=False, memoria=None):
         self.device = device
-        self.modelos_cache = {}
+        # LRU con presupuesto de memoria: evita OOM al pedir muchos pares de idiomas
+        self.modelos_cache = CacheModelos(presupuesto_mb, device, descargar_inactivos)
+        # Memoria de traducción opcional (MemoriaTraduccion): se consulta antes del modelo
+        self.memoria = memoria
+        # nombre de modelo -> existe (True/False); evita repetir consultas al hub
+        self._existencia_modelos = {}
         
         # Mapeo de códigos de idioma
         self.codigo_marian = {
@@ -37,94 +179,226 @@ class TraductorBidireccional:
         # Crear clave para caché
         clave = f"{origen}-{destino}"
         
-        if clave not in self.modelos_cache:
-            try:
-                # Intentar cargar modelo directo
-                modelo_nombre = f"Helsinki-NLP/opus-mt-{origen}-{destino}"
-                logger.info(f"Cargando modelo de traducción: {modelo_nombre}")
-                
-                tokenizer = MarianTokenizer.from_pretrained(modelo_nombre)
-                model = MarianMTModel.from_pretrained(modelo_nombre)
-                
-                if self.device != "cpu" and torch.cuda.is_available():
-                    model = model.to(self.device)
-                
-                self.modelos_cache[clave] = (tokenizer, model)
-                
-            except Exception as e:
-                # Si no existe modelo directo, intentar multi-idioma
-                logger.warning(f"No se encontró modelo {origen}-{destino}, intentando alternativas...")
-                
-                # Intentar modelos multiidioma
-                alternativas = [
-                    f"Helsinki-NLP/opus-mt-{origen}-en",  # Origen a inglés
-                    f"Helsinki-NLP/opus-mt-en-{destino}", # Inglés a destino
-                    "Helsinki-NLP/opus-mt-en-romance",    # Inglés a lenguas romances
-                    "Helsinki-NLP/opus-mt-romance-en",    # Lenguas romances a inglés
-                ]
-                
-                for alt in alternativas:
-                    try:
-                        tokenizer = MarianTokenizer.from_pretrained(alt)
-                        model = MarianMTModel.from_pretrained(alt)
-                        
-                        if self.device != "cpu" and torch.cuda.is_available():
-                            model = model.to(self.device)
-                            
-                        self.modelos_cache[clave] = (tokenizer, model)
-                        logger.info(f"Usando modelo alternativo: {alt}")
-                        break
-                    except:
-                        continue
-                
-                if clave not in self.modelos_cache:
-                    raise Exception(f"No se pudo cargar modelo de traducción {origen}-{destino}")
+        # La carga es perezosa: solo ocurre si el par no está en caché
+        return self.modelos_cache.obtener(clave, lambda: self._cargar_modelo(origen, destino))
+    
+    def _cargar_modelo(self, origen, destino):
+        """Carga el modelo directo origen-destino en CPU (CacheModelos lo sube al dispositivo)"""
+        modelo_nombre = f"Helsinki-NLP/opus-mt-{origen}-{destino}"
+        try:
+            logger.info(f"Cargando modelo de traducción: {modelo_nombre}")
+            tokenizer = MarianTokenizer.from_pretrained(modelo_nombre)
+            model = MarianMTModel.from_pretrained(modelo_nombre)
+        except Exception as e:
+            # Solo un repo inexistente marca el par como faltante; red caída,
+            # disco lleno o un OOM no deben descartarlo para toda la corrida
+            if not repo_inexistente(e):
+                raise
+            self._existencia_modelos[modelo_nombre] = False
+            raise ModeloNoDisponible(f"No existe el modelo de traducción {origen}-{destino}: {e}")
+        
+        model.eval()
+        self._existencia_modelos[modelo_nombre] = True
+        return tokenizer, model
+    
+    def _existe_modelo(self, idioma_origen, idioma_destino):
+        """
+        True/False si se sabe si existe el modelo directo; None si no se pudo
+        consultar (sin red o HF_HUB_OFFLINE). Se consulta al hub una vez por par:
+        la respuesta, incluso None, queda cacheada hasta que cargar el modelo la precise.
+        """
+        nombre = self._nombre_modelo(idioma_origen, idioma_destino)
+        if nombre not in self._existencia_modelos:
+            existe = None
+            if os.environ.get("HF_HUB_OFFLINE", "").lower() not in ("1", "true", "yes", "on"):
+                try:
+                    from huggingface_hub import file_exists
+                    existe = file_exists(nombre, "config.json")
+                except Exception:
+                    # Sin red el modelo puede estar en la caché local: se sabrá al cargarlo
+                    pass
+            self._existencia_modelos[nombre] = existe
+        return self._existencia_modelos[nombre]
+    
+    def planificar_ruta(self, idioma_origen, idioma_destino):
+        """
+        Tramos [(origen, destino), ...] a traducir: el par directo si existe,
+        si no origen→inglés→destino con dos modelos Marian pequeños
+        """
+        if idioma_origen == idioma_destino:
+            return []
+        if self._existe_modelo(idioma_origen, idioma_destino) is not False:
+            return [(idioma_origen, idioma_destino)]
+        if IDIOMA_PIVOTE in (idioma_origen, idioma_destino):
+            raise ModeloNoDisponible(f"No hay modelo de traducción {idioma_origen}-{idioma_destino}")
+        
+        ruta = [(idioma_origen, IDIOMA_PIVOTE), (IDIOMA_PIVOTE, idioma_destino)]
+        for tramo in ruta:
+            if self._existe_modelo(*tramo) is False:
+                raise ModeloNoDisponible(f"No hay modelo de traducción {tramo[0]}-{tramo[1]} para pivotar")
+        logger.info(f"Sin modelo directo {idioma_origen}-{idioma_destino}, pivotando por {IDIOMA_PIVOTE}")
+        return ruta
+    
+    def estadisticas_cache(self):
+        """Reporte de la caché de modelos: hits y memoria por modelo"""
+        return self.modelos_cache.estadisticas()
+    
+    def _nombre_modelo(self, idioma_origen, idioma_destino):
+        """Identificador del modelo para la memoria de traducción"""
+        origen = self.codigo_marian.get(idioma_origen, idioma_origen)
+        destino = self.codigo_marian.get(idioma_destino, idioma_destino)
+        return f"Helsinki-NLP/opus-mt-{origen}-{destino}"
+    
+    def traducir_lote(self, textos, idioma_origen, idioma_destino, max_length=512, batch_size=16, num_beams=1):
+        """Traduce una lista de textos por la ruta directa o pivotando por inglés"""
+        if not textos:
+            return []
+        opciones = dict(max_length=max_length, batch_size=batch_size, num_beams=num_beams)
+        
+        ruta = self.planificar_ruta(idioma_origen, idioma_destino)
+        try:
+            return self._seguir_ruta(textos, ruta, opciones)
+        except ModeloNoDisponible:
+            # Sin red no se pudo saber de antemano que faltaba el modelo directo:
+            # ahora está marcado como inexistente y la ruta sale pivotando
+            if len(ruta) != 1:
+                raise
+        return self._seguir_ruta(textos, self.planificar_ruta(idioma_origen, idioma_destino), opciones)
+    
+    def _seguir_ruta(self, textos, ruta, opciones):
+        for origen, destino in ruta:
+            textos = self._traducir_tramo(textos, origen, destino, **opciones)
+        return list(textos)
+    
+    def traducir_multiples(self, textos, idioma_origen, idiomas_destino, max_length=512, batch_size=16, num_beams=1):
+        """
+        Traduce los mismos textos a varios idiomas. Los destinos sin modelo
+        directo comparten el tramo a inglés, que se calcula una sola vez.
+        Devuelve {idioma_destino: [traducciones]}
+        """
+        opciones = dict(max_length=max_length, batch_size=batch_size, num_beams=num_beams)
+        resultados = {}
+        intermedio = None
+        
+        def al_pivote():
+            nonlocal intermedio
+            if intermedio is None:
+                if idioma_origen == IDIOMA_PIVOTE:
+                    intermedio = list(textos)
+                else:
+                    intermedio = self.traducir_lote(textos, idioma_origen, IDIOMA_PIVOTE, **opciones)
+            return intermedio
+        
+        for destino in idiomas_destino:
+            if destino == IDIOMA_PIVOTE:
+                resultados[destino] = al_pivote()
+                continue
+            ruta = self.planificar_ruta(idioma_origen, destino)
+            if len(ruta) == 2:
+                resultados[destino] = self._traducir_tramo(al_pivote(), IDIOMA_PIVOTE, destino, **opciones)
+            else:
+                resultados[destino] = self.traducir_lote(textos, idioma_origen, destino, **opciones)
+        return resultados
+    
+    def _traducir_tramo(self, textos, idioma_origen, idioma_destino, max_length=512, batch_size=16, num_beams=1):
+        """Traduce con un solo modelo; solo los textos que no están en la memoria pasan por él"""
+        if not textos:
+            return []
+        
+        # Segmentos repetidos (dentro del lote o ya vistos) se traducen una sola vez
+        segmentos = [normalizar_segmento(t) for t in textos]
+        modelo = self._nombre_modelo(idioma_origen, idioma_destino)
+        conocidos = {}
+        if self.memoria is not None:
+            conocidos = self.memoria.buscar(idioma_origen, idioma_destino, modelo, segmentos)
+        
+        faltantes = [s for s in dict.fromkeys(segmentos) if s not in conocidos]
+        if faltantes:
+            nuevas = self._traducir_con_modelo(
+                faltantes, idioma_origen, idioma_destino,
+                max_length=max_length, batch_size=batch_size, num_beams=num_beams
+            )
+            conocidos.update(zip(faltantes, nuevas))
+            if self.memoria is not None:
+                self.memoria.guardar(idioma_origen, idioma_destino, modelo, zip(faltantes, nuevas))
+        
+        return [conocidos[s] for s in segmentos]
+    
+    def _traducir_con_modelo(self, textos, idioma_origen, idioma_destino, max_length=512, batch_size=16, num_beams=1):
+        """Traduce una lista de textos en lotes con padding, ordenados por longitud"""
+        tokenizer, model = self._get_modelo_traduccion(idioma_origen, idioma_destino)
         
-        return self.modelos_cache[clave]
+        # Tokenizar todo una vez y ordenar por longitud: lotes con poco padding
+        input_ids = tokenizer(textos, truncation=True, max_length=max_length)["input_ids"]
+        orden = sorted(range(len(textos)), key=lambda i: len(input_ids[i]))
+        
+        traducciones = [None] * len(textos)
+        for inicio in range(0, len(orden), batch_size):
+            indices = orden[inicio:inicio + batch_size]
+            inputs = tokenizer.pad({"input_ids": [input_ids[i] for i in indices]}, return_tensors="pt")
+            
+            if self.device != "cpu":
+                inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            
+            # Greedy por defecto (num_beams=1): varias veces más rápido que beam search
+            with torch.inference_mode():
+                translated = model.generate(**inputs, num_beams=num_beams, max_length=max_length)
+            
+            # Restaurar el orden original
+            for i, trad in zip(indices, tokenizer.batch_decode(translated, skip_special_tokens=True)):
+                traducciones[i] = trad
+        
+        return traducciones
     
-    def traducir(self, texto, idioma_origen, idioma_destino, max_length=512):
+    def traducir(self, texto, idioma_origen, idioma_destino, max_length=512, batch_size=16, num_beams=1):
         """Traduce texto de un idioma a otro"""
         if idioma_origen == idioma_destino:
             return texto
             
         try:
-            tokenizer, model = self._get_modelo_traduccion(idioma_origen, idioma_destino)
-            
             # Dividir texto largo en chunks si es necesario
             if len(texto) > max_length * 3:  # Aproximación
                 # Dividir por párrafos o frases
-                partes = texto.split('\n\n')
-                if len(partes) == 1:
-                    partes = texto.split('. ')
-                
-                traducciones = []
-                for parte in partes:
-                    if parte.strip():
-                        inputs = tokenizer(parte, return_tensors="pt", padding=True, truncation=True, max_length=max_length)
-                        
-                        if self.device != "cpu":
-                            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-                        
-                        translated = model.generate(**inputs)
-                        trad = tokenizer.batch_decode(translated, skip_special_tokens=True)[0]
-                        traducciones.append(trad)
-                
-                return '\n\n'.join(traducciones) if '\n\n' in texto else '. '.join(traducciones)
-            
+                separador = '\n\n' if '\n\n' in texto else '. '
+                partes = [parte for parte in texto.split(separador) if parte.strip()]
             else:
                 # Texto corto, traducir directamente
-                inputs = tokenizer(texto, return_tensors="pt", padding=True, truncation=True, max_length=max_length)
-                
-                if self.device != "cpu":
-                    inputs = {k: v.to(self.device) for k, v in inputs.items()}
-                
-                translated = model.generate(**inputs)
-                return tokenizer.batch_decode(translated, skip_special_tokens=True)[0]
+                separador = ''
+                partes = [texto]
+            
+            # Todas las partes en unos pocos lotes en lugar de un generate por parte
+            traducciones = self.traducir_lote(
+                partes, idioma_origen, idioma_destino,
+                max_length=max_length, batch_size=batch_size, num_beams=num_beams
+            )
+            return separador.join(traducciones)
                 
         except Exception as e:
             logger.error(f"Error en traducción {idioma_origen}->{idioma_destino}: {e}")
             return texto  # Devolver texto original si falla
 
+def traducir_resultado(traductor, resultado, idioma_destino):
+    """Traduce texto y chunks de un resultado de transcripción (los timestamps se conservan)"""
+    idioma_origen = resultado.get("idioma")
+    if not idioma_origen or idioma_origen == "auto":
+        raise ValueError("No se conoce el idioma de origen para traducir con MarianMT (usar --idioma)")
+    
+    chunks = resultado.get("chunks", [])
+    # Todos los segmentos del archivo en un solo traducir_lote (memoria + lotes por longitud)
+    textos = [c["text"].strip() for c in chunks] if chunks else [resultado["texto"]]
+    traducciones = traductor.traducir_lote(textos, idioma_origen, idioma_destino)
+    
+    traducido = dict(resultado)
+    traducido["texto_original"] = resultado["texto"]
+    traducido["texto"] = " ".join(t for t in traducciones if t)
+    if chunks:
+        traducido["chunks"] = [{"timestamp": c["timestamp"], "text": " " + t} for c, t in zip(chunks, traducciones)]
+        # Con timestamps por palabra cada chunk es una palabra: la traducción no conserva esa granularidad
+        traducido["granularidad"] = "segmento"
+    traducido["traducido"] = True
+    traducido["idioma_destino"] = idioma_destino
+    return traducido
+
 # Función helper para integrar con el transcriptor principal
 def agregar_traduccion_bidireccional(transcriptor_class):
     """Decorator para agregar traducción bidireccional a la clase TranscriptorGPU"""
@@ -136,13 +410,20 @@ def agregar_traduccion_bidireccional(transcriptor_class):
         # Llamar al init original
         original_init(self, *args, **kwargs)
         # Agregar traductor
-        self.traductor = TraductorBidireccional(self.device)
+        self.traductor = TraductorBidireccional(self.device, memoria=MemoriaTraduccion())
     
     # Guardar transcribir_archivo original
     original_transcribir = transcriptor_class.transcribir_archivo
     
     def nuevo_transcribir(self, archivo_path, idioma_origen=None, traducir=False, idioma_destino='en'):
         """Version mejorada con traducción a cualquier idioma"""
+        # Si Whisper puede traducir directamente a inglés: nativo + inglés en una
+        # sola pasada (mismo audio decodificado, mismas features y estados del encoder)
+        if traducir and idioma_destino == 'en' and idioma_origen != 'en' and hasattr(self, "transcribir_y_traducir"):
+            resultado = self.transcribir_y_traducir(archivo_path, idioma_origen)
+            if "error" not in resultado:
+                return resultado
+        
         # Primero obtener transcripción
         resultado = original_transcribir(self, archivo_path, idioma_origen, traducir=False)
         
@@ -157,14 +438,6 @@ def agregar_traduccion_bidireccional(transcriptor_class):
             if not idioma_origen and "idioma" in resultado:
                 idioma_origen = resultado["idioma"]
             
-            # Si Whisper puede traducir directamente a inglés, usarlo
-            if idioma_destino == 'en' and idioma_origen != 'en':
-                resultado_whisper = original_transcribir(self, archivo_path, idioma_origen, traducir=True)
-                if "error" not in resultado_whisper:
-                    resultado["texto_traducido"] = resultado_whisper["texto"]
-                    resultado["idioma_destino"] = 'en'
-                    return resultado
-            
             # Para otros casos, usar traductor bidireccional
             logger.info(f"Traduciendo de {idioma_origen} a {idioma_destino}...")
             texto_traducido = self.traductor.traducir(
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Transcripción + traducción al inglés en una sola pasada
+El audio se decodifica una vez y se divide en ventanas de 30 s solapadas. Con los
+backends torch/int8 cada lote pasa una sola vez por el feature extractor y el
+encoder de Whisper, y el decoder se ejecuta dos veces sobre los mismos estados
+(task=transcribe y task=translate). Con los demás backends se reutilizan al
+menos el audio decodificado y las ventanas. Sin idioma, se detecta una sola vez
+por archivo y las dos tareas corren con ese idioma fijo.
+"""
+
+import logging
+from audio_utils import SAMPLE_RATE, DURACION_VENTANA, decodificar_audio, dividir_en_ventanas, chunks_absolutos
+from deteccion_idioma import SEGUNDOS_DETECCION, idiomas_de_clips
+
+logger = logging.getLogger(__name__)
+
+TAREAS = ("transcribe", "translate")
+
+def _modelo_base(modelo):
+    """El modelo original detrás de torch.compile (generate no pasa por el grafo compilado)"""
+    return getattr(modelo, "_orig_mod", modelo)
+
+def puede_compartir_encoder(transcriptor):
+    return (
+        getattr(transcriptor, "backend", None) in ("torch", "int8")
+        and getattr(transcriptor, "processor", None) is not None
+        and hasattr(_modelo_base(transcriptor.model), "get_encoder")
+    )
+
+def _decodificar_lote_compartido(transcriptor, audios, idioma):
+    """Un paso de features + encoder para el lote; devuelve {tarea: [salida por ventana]}"""
+    import torch
+    from transformers.modeling_outputs import BaseModelOutput
+
+    modelo = _modelo_base(transcriptor.model)
+    procesador = transcriptor.processor
+    features = procesador.feature_extractor(audios, sampling_rate=SAMPLE_RATE, return_tensors="pt").input_features
+    features = features.to(transcriptor.device, dtype=next(modelo.parameters()).dtype)
+
+    salidas = {}
+    with torch.inference_mode():
+        estados = modelo.get_encoder()(features).last_hidden_state
+        for tarea in TAREAS:
+            generate_kwargs = {"task": tarea, "return_timestamps": True, "max_new_tokens": 128}
+            if idioma:
+                generate_kwargs["language"] = idioma
+            # Un BaseModelOutput nuevo por tarea: generate puede modificar el que recibe
+            secuencias = modelo.generate(encoder_outputs=BaseModelOutput(last_hidden_state=estados), **generate_kwargs)
+            salidas[tarea] = []
+            for secuencia in secuencias:
+                decodificado = procesador.tokenizer.decode(secuencia, skip_special_tokens=True, output_offsets=True)
+                salidas[tarea].append({
+                    "text": decodificado["text"],
+                    "chunks": [{"timestamp": o["timestamp"], "text": o["text"]} for o in decodificado["offsets"]],
+                })
+    return salidas
+
+def _decodificar_lote_pipeline(transcriptor, audios, idioma, batch_size):
+    """Sin acceso al encoder: el pipeline corre dos veces sobre las mismas ventanas ya decodificadas"""
+    entradas = [{"raw": audio, "sampling_rate": SAMPLE_RATE} for audio in audios]
+    salidas = {}
+    for tarea in TAREAS:
+        generate_kwargs = {"task": tarea}
+        if idioma:
+            generate_kwargs["language"] = idioma
+        # El pipeline consume los dicts de entrada: se pasa una copia por tarea
+        salidas[tarea] = transcriptor.pipe(
+            [dict(e) for e in entradas],
+            batch_size=batch_size,
+            chunk_length_s=0,
+            generate_kwargs=generate_kwargs,
+            return_timestamps=True
+        )
+    return salidas
+
+def transcribir_y_traducir(transcriptor, archivo, idioma=None, batch_size=None, duracion_ventana=DURACION_VENTANA):
+    """Devuelve un resultado con el texto nativo (texto/chunks) y en inglés (texto_traducido/chunks_traducidos)"""
+    batch_size = batch_size or transcriptor.batch_size
+    audio = decodificar_audio(archivo)
+    if not idioma:
+        # Una detección para el archivo: si no, generate la repite en cada ventana y en cada tarea
+        try:
+            idioma = idiomas_de_clips(transcriptor, [audio[:int(SEGUNDOS_DETECCION * SAMPLE_RATE)]])[0]
+        except Exception as e:
+            logger.warning(f"⚠️  No se pudo detectar el idioma de {archivo}: {e}")
+    ventanas = dividir_en_ventanas(audio, duracion_ventana)
+    compartir = puede_compartir_encoder(transcriptor)
+    if not compartir:
+        logger.debug(f"Backend {getattr(transcriptor, 'backend', '?')}: se comparte solo el audio decodificado")
+
+    textos = {tarea: [] for tarea in TAREAS}
+    chunks = {tarea: [] for tarea in TAREAS}
+    for inicio in range(0, len(ventanas), batch_size):
+        lote = ventanas[inicio:inicio + batch_size]
+        audios = [ventana for _, ventana, _ in lote]
+        if compartir:
+            salidas = _decodificar_lote_compartido(transcriptor, audios, idioma)
+        else:
+            salidas = _decodificar_lote_pipeline(transcriptor, audios, idioma, batch_size)
+
+        for tarea in TAREAS:
+            for (offset, ventana, propia), salida in zip(lote, salidas[tarea]):
+                # Solo el tramo propio de cada ventana: el solape lo cubre la vecina
+                texto, chunks_ventana = chunks_absolutos(salida, [(0.0, offset)], [propia], len(ventana) / SAMPLE_RATE)
+                if texto:
+                    textos[tarea].append(texto)
+                chunks[tarea].extend(chunks_ventana)
+
+    return {
+        "archivo": str(archivo),
+        "texto": " ".join(textos["transcribe"]),
+        "chunks": chunks["transcribe"],
+        "texto_traducido": " ".join(textos["translate"]),
+        "chunks_traducidos": chunks["translate"],
+        "idioma": idioma or "auto",
+        "traducido": True,
+        "idioma_destino": "en"
+    }
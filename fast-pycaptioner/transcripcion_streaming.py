@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Transcripción en streaming para Fast PyTranscriptor
+Decodifica el audio por bloques de 30 s y genera los segmentos en cuanto cada
+ventana se transcribe. Las ventanas se solapan como en el planificador por
+lotes (se retiene la cola del bloque anterior) y de cada una solo se conservan
+los chunks de su tramo propio, así las palabras del corte no se pierden ni se
+duplican. La memoria se mantiene constante sin importar la duración del
+archivo, y las salidas TXT/SRT se escriben de forma incremental.
+"""
+
+import logging
+from audio_utils import (SAMPLE_RATE, DURACION_VENTANA, leer_audio_por_bloques, ventanas_por_bloques,
+                         ventanas_desde_regiones, chunks_absolutos)
+from subtitulos import EscritorIncremental
+
+logger = logging.getLogger(__name__)
+
+def transcribir_stream(transcriptor, archivo_path, idioma_origen=None, traducir=False, vad=None):
+    """Genera segmentos {'timestamp': (inicio, fin), 'text': str} con tiempos absolutos"""
+    generate_kwargs = {}
+    if idioma_origen:
+        generate_kwargs["language"] = idioma_origen
+    if traducir:
+        generate_kwargs["task"] = "translate"
+
+    bloques = leer_audio_por_bloques(archivo_path, DURACION_VENTANA)
+    for offset, ventana, (propia_inicio, propia_fin) in ventanas_por_bloques(bloques):
+        if vad is None:
+            ventanas = [([(0.0, offset)], ventana, [(propia_inicio, propia_fin)])]
+        else:
+            # VAD sobre la ventana solapada: una región que cruza el corte entre
+            # bloques tiene contexto a ambos lados. Regiones relativas a la ventana
+            # -> tiempos del archivo, y cada tramo propio recortado al de la ventana
+            ventanas = [
+                ([(inicio_ventana, offset + inicio) for inicio_ventana, inicio in mapa], audio,
+                 [(max(offset + a, propia_inicio), min(offset + b, propia_fin)) for a, b in propias])
+                for mapa, audio, propias in ventanas_desde_regiones(ventana, vad(ventana, SAMPLE_RATE))
+            ]
+
+        for mapa, audio, propias in ventanas:
+            salida = transcriptor.pipe(
+                {"raw": audio, "sampling_rate": SAMPLE_RATE},
+                chunk_length_s=0,
+                generate_kwargs=generate_kwargs,
+                return_timestamps=True
+            )
+            _, chunks = chunks_absolutos(salida, mapa, propias, len(audio) / SAMPLE_RATE)
+            yield from chunks
+
+def transcribir_archivo_streaming(transcriptor, archivo_path, directorio_salida, formato='txt',
+                                  idioma_origen=None, traducir=False, vad=None):
+    """Transcribe un archivo escribiendo la salida a medida que llegan los segmentos"""
+    logger.info(f"🎤 Procesando (streaming): {archivo_path}")
+    chunks = []
+    try:
+        with EscritorIncremental(directorio_salida, archivo_path, formato, idioma_origen, traducir) as escritor:
+            for segmento in transcribir_stream(transcriptor, archivo_path, idioma_origen, traducir, vad):
+                escritor.escribir(segmento)
+                # Se retienen los segmentos (texto y timestamps, nunca el audio): la
+                # caché los necesita para regenerar cualquier formato sin inferencia
+                chunks.append(segmento)
+        logger.info(f"💾 Guardado: {escritor.ruta}")
+    except Exception as e:
+        logger.error(f"❌ Error procesando {archivo_path}: {e}")
+        return {"archivo": str(archivo_path), "error": str(e)}
+
+    return {
+        "archivo": str(archivo_path),
+        "texto": " ".join(c["text"].strip() for c in chunks if c["text"].strip()),
+        "chunks": chunks,
+        "idioma": idioma_origen or "auto",
+        "traducido": traducir,
+        "idioma_destino": "en" if traducir else None,
+        "guardado": True
+    }
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Detección de actividad de voz (VAD) para Fast PyTranscriptor
+Encuentra las regiones con voz para que solo esas lleguen a Whisper.
+Un detector es cualquier callable (audio, sampling_rate) -> [(inicio_s, fin_s), ...]
+"""
+
+import numpy as np
+import logging
+from audio_utils import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+class DetectorVozEnergia:
+    def __init__(self, duracion_trama=0.03, margen_db=12.0, umbral_minimo_db=-50.0,
+                 min_voz_s=0.25, min_silencio_s=0.6, relleno_s=0.2):
+        """
+        VAD por energía con umbral adaptativo: piso de ruido (percentil 10 de la
+        energía por trama) + margen_db, nunca por debajo de umbral_minimo_db.
+        """
+        self.duracion_trama = duracion_trama
+        self.margen_db = margen_db
+        self.umbral_minimo_db = umbral_minimo_db
+        self.min_voz_s = min_voz_s
+        self.min_silencio_s = min_silencio_s
+        self.relleno_s = relleno_s
+
+    def __call__(self, audio, sampling_rate=SAMPLE_RATE):
+        muestras_trama = max(1, int(self.duracion_trama * sampling_rate))
+        num_tramas = len(audio) // muestras_trama
+        if num_tramas == 0:
+            return []
+
+        tramas = audio[:num_tramas * muestras_trama].reshape(num_tramas, muestras_trama)
+        rms = np.sqrt(np.mean(np.square(tramas, dtype=np.float64), axis=1))
+        energia_db = 20.0 * np.log10(rms + 1e-10)
+
+        piso_ruido = np.percentile(energia_db, 10)
+        umbral = max(piso_ruido + self.margen_db, self.umbral_minimo_db)
+        voz = energia_db > umbral
+
+        # Tramas con voz -> regiones [inicio, fin) en segundos
+        cambios = np.diff(np.concatenate(([0], voz.astype(np.int8), [0])))
+        inicios = np.flatnonzero(cambios == 1) * self.duracion_trama
+        fines = np.flatnonzero(cambios == -1) * self.duracion_trama
+
+        # Unir regiones separadas por silencios cortos
+        regiones = []
+        for inicio, fin in zip(inicios, fines):
+            if regiones and inicio - regiones[-1][1] < self.min_silencio_s:
+                regiones[-1][1] = fin
+            else:
+                regiones.append([inicio, fin])
+
+        duracion_total = len(audio) / sampling_rate
+        return [
+            (float(max(0.0, inicio - self.relleno_s)), float(min(duracion_total, fin + self.relleno_s)))
+            for inicio, fin in regiones
+            if fin - inicio >= self.min_voz_s
+        ]
+
+class DetectorVozSilero:
+    def __init__(self, umbral=0.5):
+        """VAD con el modelo Silero (torch.hub, se descarga la primera vez)"""
+        import torch
+        self.torch = torch
+        self.modelo, utilidades = torch.hub.load("snakers4/silero-vad", "silero_vad", trust_repo=True)
+        self.get_speech_timestamps = utilidades[0]
+        self.umbral = umbral
+
+    def __call__(self, audio, sampling_rate=SAMPLE_RATE):
+        marcas = self.get_speech_timestamps(
+            self.torch.from_numpy(np.ascontiguousarray(audio)),
+            self.modelo,
+            threshold=self.umbral,
+            sampling_rate=sampling_rate
+        )
+        return [(m["start"] / sampling_rate, m["end"] / sampling_rate) for m in marcas]
+
+DETECTORES = {
+    "energia": DetectorVozEnergia,
+    "silero": DetectorVozSilero,
+}
+
+def crear_detector(nombre):
+    """Crea un detector VAD por nombre ('energia' o 'silero')"""
+    if nombre not in DETECTORES:
+        raise ValueError(f"VAD desconocido: {nombre} (opciones: {', '.join(DETECTORES)})")
+    return DETECTORES[nombre]()
@@ -6,6 +6,7 @@ Funciones principales:
 - integrar_audio_a_video: Incrustar audio en video
 - ajustar_velocidad_audio: Cambiar velocidad sin alterar pitch
 - recortar_segmento: Extraer segmento de video/audio por tiempo
+- planificar_render: Reporte pre-vuelo de un lote antes de lanzar FFmpeg
 """
 
 from .core import (
@@ -14,11 +15,13 @@ from .core import (
     ajustar_velocidad_audio,
     recortar_segmento
 )
+from .preflight import planificar_render
 
 __version__ = "0.3.0"
 __all__ = [
     "unir_archivos",
     "integrar_audio_a_video",
     "ajustar_velocidad_audio",
-    "recortar_segmento"
+    "recortar_segmento",
+    "planificar_render"
 ]
@@ -15,6 +15,7 @@ from .core import (
     ajustar_velocidad_audio,
     recortar_segmento
 )
+from .preflight import planificar_render
 from .utils import configurar_logging, detectar_gpu_nvidia
 
 
@@ -91,6 +92,34 @@ def cmd_recortar(args):
         return 1
 
 
+def cmd_verificar(args):
+    """Comando: reporte pre-vuelo de un lote"""
+    reporte = planificar_render(
+        lista_paths=args.inputs,
+        output_path=args.output,
+        modo=args.modo,
+        verificar_codecs=not args.sin_codecs,
+        max_workers=args.workers
+    )
+
+    print(f"Entradas: {len(reporte['archivos'])}")
+    print(f"Tamaño total: {reporte['tamano_total'] / (1024 * 1024):.1f} MB")
+    print(f"Duración total: {reporte['duracion_total']:.1f}s")
+    print(f"Costo de render estimado ({args.modo}): {reporte['costo_estimado']:.1f}s")
+
+    for advertencia in reporte['advertencias']:
+        print(f"⚠ {advertencia}")
+
+    if reporte['ok']:
+        print("✓ Pre-vuelo sin problemas")
+        return 0
+    else:
+        print(f"✗ {len(reporte['problemas'])} problema(s):", file=sys.stderr)
+        for problema in reporte['problemas']:
+            print(f"   - {problema}", file=sys.stderr)
+        return 1
+
+
 def cmd_info(args):
     """Comando: mostrar información del sistema"""
     print("="*60)
@@ -335,6 +364,52 @@ def main():
 
     parser_recortar.set_defaults(func=cmd_recortar)
 
+    # ========================================================================
+    # Comando: verificar
+    # ========================================================================
+    parser_verificar = subparsers.add_parser(
+        'verificar',
+        help='Reporte pre-vuelo de un lote',
+        description='Valida entradas, codecs y salida sin lanzar FFmpeg'
+    )
+
+    parser_verificar.add_argument(
+        'inputs',
+        nargs='+',
+        metavar='INPUT',
+        help='Archivos de entrada'
+    )
+
+    parser_verificar.add_argument(
+        '-o', '--output',
+        required=True,
+        metavar='FILE',
+        help='Archivo de salida planeado'
+    )
+
+    parser_verificar.add_argument(
+        '-m', '--modo',
+        choices=['copy', 'cpu', 'gpu'],
+        default='copy',
+        help='Modo de render para estimar costo (default: copy)'
+    )
+
+    parser_verificar.add_argument(
+        '--sin-codecs',
+        action='store_true',
+        help='Omitir probe de codecs con ffprobe'
+    )
+
+    parser_verificar.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=16,
+        metavar='N',
+        help='Hilos para stat/probe en paralelo (default: 16)'
+    )
+
+    parser_verificar.set_defaults(func=cmd_verificar)
+
     # ========================================================================
     # Comando: info
     # ========================================================================
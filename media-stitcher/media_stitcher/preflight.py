@@ -0,0 +1,333 @@
+"""
+Planificación pre-vuelo (pre-flight) para Media-Stitcher
+
+Valida un lote completo de entradas ANTES de lanzar cualquier proceso de
+FFmpeg: stat concurrente de todos los archivos, probe de codecs en paralelo,
+permisos de escritura del directorio de salida y estimación del costo de
+render. Devuelve un único reporte con todos los problemas encontrados en
+lugar de detenerse en el primero.
+"""
+
+import json
+import os
+import stat
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Dict, Any
+
+from .utils import logger
+
+# Workers por defecto para stat/probe. Son operaciones dominadas por I/O
+# (NFS, discos de red), así que conviene un pool más grande que nproc.
+MAX_WORKERS_DEFAULT = 16
+
+# Segundos de render estimados por segundo de media, según el modo.
+# Son heurísticas aproximadas (libx264 preset medium ~ tiempo real).
+FACTOR_COSTO_RENDER = {
+    'copy': 0.02,    # concat demuxer / stream copy, solo I/O
+    'cpu': 1.0,      # re-encoding con libx264
+    'gpu': 0.25,     # re-encoding con h264_nvenc
+}
+
+
+def _stat_archivo(file_path: str) -> Dict[str, Any]:
+    """
+    Hace un único os.stat() por archivo (en lugar de exists() + is_file()).
+
+    Returns:
+        dict: {'path', 'ok', 'tamano', 'error'}
+    """
+    resultado = {'path': file_path, 'ok': False, 'tamano': 0, 'error': None}
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        resultado['error'] = f"Archivo no encontrado: {file_path}"
+        return resultado
+    except OSError as e:
+        resultado['error'] = f"No se pudo acceder a {file_path}: {e}"
+        return resultado
+
+    if not stat.S_ISREG(st.st_mode):
+        resultado['error'] = f"La ruta no es un archivo: {file_path}"
+        return resultado
+
+    resultado['ok'] = True
+    resultado['tamano'] = st.st_size
+    return resultado
+
+
+def stat_archivos(file_paths: List[str],
+                  max_workers: int = MAX_WORKERS_DEFAULT) -> List[Dict[str, Any]]:
+    """
+    Ejecuta stat sobre todos los archivos de forma concurrente.
+
+    Args:
+        file_paths: Lista de rutas a archivos
+        max_workers: Número máximo de hilos
+
+    Returns:
+        list: Un dict por archivo (mismo orden que file_paths)
+    """
+    if not file_paths:
+        return []
+    workers = max(1, min(max_workers, len(file_paths)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_stat_archivo, file_paths))
+
+
+def verificar_ffprobe_disponible() -> bool:
+    """
+    Verifica que ffprobe esté instalado y disponible en el PATH.
+
+    Returns:
+        bool: True si ffprobe está disponible, False en caso contrario
+    """
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-version"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=5
+        )
+        return result.returncode == 0
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return False
+    except Exception as e:
+        logger.debug(f"Error verificando ffprobe: {e}")
+        return False
+
+
+def probar_archivo(file_path: str) -> Dict[str, Any]:
+    """
+    Obtiene codecs y duración de un archivo usando ffprobe.
+
+    Args:
+        file_path: Ruta al archivo
+
+    Returns:
+        dict: {
+            'path': str,
+            'ok': bool,
+            'duracion': float,       # segundos (0.0 si desconocida)
+            'video_codec': str|None,
+            'audio_codec': str|None,
+            'error': str|None
+        }
+    """
+    resultado = {
+        'path': file_path,
+        'ok': False,
+        'duracion': 0.0,
+        'video_codec': None,
+        'audio_codec': None,
+        'error': None
+    }
+
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error",
+             "-show_entries", "format=duration:stream=codec_type,codec_name",
+             "-of", "json", file_path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=30
+        )
+    except subprocess.TimeoutExpired:
+        resultado['error'] = f"ffprobe excedió el tiempo límite: {file_path}"
+        return resultado
+    except Exception as e:
+        resultado['error'] = f"Error ejecutando ffprobe en {file_path}: {e}"
+        return resultado
+
+    if result.returncode != 0:
+        error_msg = result.stderr.decode('utf-8', errors='ignore').strip()
+        resultado['error'] = f"ffprobe no pudo leer {file_path}: {error_msg[-200:]}"
+        return resultado
+
+    try:
+        data = json.loads(result.stdout.decode('utf-8', errors='ignore') or '{}')
+    except json.JSONDecodeError as e:
+        resultado['error'] = f"Salida de ffprobe inválida para {file_path}: {e}"
+        return resultado
+
+    for stream in data.get('streams', []):
+        tipo = stream.get('codec_type')
+        if tipo == 'video' and resultado['video_codec'] is None:
+            resultado['video_codec'] = stream.get('codec_name')
+        elif tipo == 'audio' and resultado['audio_codec'] is None:
+            resultado['audio_codec'] = stream.get('codec_name')
+
+    try:
+        resultado['duracion'] = float(data.get('format', {}).get('duration', 0.0))
+    except (TypeError, ValueError):
+        resultado['duracion'] = 0.0
+
+    if resultado['video_codec'] is None and resultado['audio_codec'] is None:
+        resultado['error'] = f"Sin streams de audio/video: {file_path}"
+        return resultado
+
+    resultado['ok'] = True
+    return resultado
+
+
+def probar_archivos(file_paths: List[str],
+                    max_workers: int = MAX_WORKERS_DEFAULT) -> List[Dict[str, Any]]:
+    """
+    Ejecuta ffprobe sobre todos los archivos en paralelo.
+
+    Args:
+        file_paths: Lista de rutas a archivos
+        max_workers: Número máximo de procesos ffprobe simultáneos
+
+    Returns:
+        list: Un dict por archivo (mismo orden que file_paths)
+    """
+    if not file_paths:
+        return []
+    workers = max(1, min(max_workers, len(file_paths)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(probar_archivo, file_paths))
+
+
+def verificar_directorio_escribible(output_path: str) -> Optional[str]:
+    """
+    Verifica que el directorio de salida exista (o pueda crearse) y sea escribible.
+
+    No crea el directorio: el pre-vuelo no debe tener efectos secundarios.
+
+    Args:
+        output_path: Ruta del archivo de salida
+
+    Returns:
+        str: Mensaje de error, o None si el directorio es válido
+    """
+    directorio = Path(output_path).parent
+    if str(directorio) == '':
+        directorio = Path('.')
+
+    # Subir hasta el primer ancestro existente (mkdir parents=True lo crearía)
+    existente = directorio
+    while not existente.exists():
+        if existente.parent == existente:
+            return f"Directorio de salida inválido: {directorio}"
+        existente = existente.parent
+
+    if not existente.is_dir():
+        return f"La ruta de salida no es un directorio: {existente}"
+
+    if not os.access(existente, os.W_OK | os.X_OK):
+        return f"Sin permisos de escritura en directorio de salida: {existente}"
+
+    return None
+
+
+def planificar_render(lista_paths: List[str],
+                      output_path: str,
+                      modo: str = 'copy',
+                      verificar_codecs: bool = True,
+                      max_workers: int = MAX_WORKERS_DEFAULT) -> Dict[str, Any]:
+    """
+    Genera un reporte pre-vuelo completo para una operación de render.
+
+    Hace stat de todas las entradas en paralelo, ejecuta ffprobe en paralelo
+    sobre las que existen, valida el directorio de salida y estima el costo
+    de render. No lanza ningún proceso de FFmpeg.
+
+    Args:
+        lista_paths: Lista de rutas de entrada
+        output_path: Ruta del archivo de salida
+        modo: 'copy' (concat demuxer), 'cpu' o 'gpu' (re-encoding)
+        verificar_codecs: Si True, ejecuta ffprobe sobre cada entrada
+        max_workers: Número máximo de hilos para stat/probe
+
+    Returns:
+        dict: {
+            'ok': bool,                 # True si no hay problemas
+            'problemas': list[str],     # TODOS los problemas encontrados
+            'advertencias': list[str],
+            'archivos': list[dict],     # stat + probe por archivo
+            'tamano_total': int,        # bytes
+            'duracion_total': float,    # segundos de media
+            'costo_estimado': float     # segundos de render estimados
+        }
+
+    Ejemplo:
+        >>> reporte = planificar_render(["a.mp4", "b.mp4"], "out/final.mp4")
+        >>> if not reporte['ok']:
+        ...     for problema in reporte['problemas']:
+        ...         print(problema)
+    """
+    if modo not in FACTOR_COSTO_RENDER:
+        raise ValueError(f"Modo de render inválido: {modo} "
+                         f"(opciones: {', '.join(FACTOR_COSTO_RENDER)})")
+
+    problemas: List[str] = []
+    advertencias: List[str] = []
+
+    stats = stat_archivos(lista_paths, max_workers=max_workers)
+    archivos = [dict(s) for s in stats]
+
+    for info in archivos:
+        if not info['ok']:
+            problemas.append(info['error'])
+
+    error_salida = verificar_directorio_escribible(output_path)
+    if error_salida:
+        problemas.append(error_salida)
+
+    existentes = [info for info in archivos if info['ok']]
+
+    if verificar_codecs and existentes:
+        if verificar_ffprobe_disponible():
+            probes = probar_archivos([info['path'] for info in existentes],
+                                     max_workers=max_workers)
+            for info, probe in zip(existentes, probes):
+                info.update({
+                    'duracion': probe['duracion'],
+                    'video_codec': probe['video_codec'],
+                    'audio_codec': probe['audio_codec'],
+                })
+                if not probe['ok']:
+                    info['ok'] = False
+                    info['error'] = probe['error']
+                    problemas.append(probe['error'])
+
+            # concat demuxer requiere el mismo codec en todas las entradas
+            if modo == 'copy':
+                firmas = {(info.get('video_codec'), info.get('audio_codec'))
+                          for info in existentes if info['ok']}
+                if len(firmas) > 1:
+                    problemas.append(
+                        "Codecs distintos entre entradas, concat demuxer requiere "
+                        f"el mismo formato (encontrados: {sorted(firmas, key=str)}). "
+                        "Usa el modo filter."
+                    )
+        else:
+            advertencias.append("ffprobe no disponible, validación de codecs omitida")
+
+    tamano_total = sum(info.get('tamano', 0) for info in archivos)
+    duracion_total = sum(info.get('duracion', 0.0) for info in archivos)
+    costo_estimado = duracion_total * FACTOR_COSTO_RENDER[modo]
+
+    reporte = {
+        'ok': not problemas,
+        'problemas': problemas,
+        'advertencias': advertencias,
+        'archivos': archivos,
+        'tamano_total': tamano_total,
+        'duracion_total': duracion_total,
+        'costo_estimado': costo_estimado
+    }
+
+    for advertencia in advertencias:
+        logger.warning(advertencia)
+    if problemas:
+        logger.error(f"Pre-vuelo: {len(problemas)} problema(s) en {len(lista_paths)} entradas")
+        for problema in problemas:
+            logger.error(f"  - {problema}")
+    else:
+        logger.info(f"Pre-vuelo OK: {len(lista_paths)} entradas, "
+                    f"{duracion_total:.1f}s de media, costo estimado {costo_estimado:.1f}s")
+
+    return reporte
@@ -141,16 +141,23 @@ def validar_archivos_existen(file_paths: List[str]) -> bool:
     """
     Valida que todos los archivos en una lista existan.
 
+    Hace un único stat por archivo, de forma concurrente, y reporta todos
+    los archivos faltantes (no solo el primero).
+
     Args:
         file_paths: Lista de rutas a archivos
 
     Returns:
         bool: True si todos existen, False si alguno falta
     """
-    for file_path in file_paths:
-        if not validar_archivo_existe(file_path):
-            return False
-    return True
+    from .preflight import stat_archivos
+
+    todos_ok = True
+    for info in stat_archivos(file_paths):
+        if not info['ok']:
+            logger.error(info['error'])
+            todos_ok = False
+    return todos_ok
 
 
 def ejecutar_ffmpeg(args: List[str], descripcion: str = "Operación FFmpeg") -> bool:
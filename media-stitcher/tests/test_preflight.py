@@ -0,0 +1,110 @@
+"""
+Tests unitarios para la planificación pre-vuelo de Media-Stitcher
+"""
+
+import pytest
+from pathlib import Path
+import sys
+
+# Agregar el directorio padre al path para importar media_stitcher
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from media_stitcher import planificar_render
+from media_stitcher import preflight
+from media_stitcher.utils import validar_archivos_existen
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+@pytest.fixture
+def archivos_dummy(tmp_path):
+    """Tres archivos pequeños en un directorio temporal"""
+    paths = []
+    for nombre in ("a.mp4", "b.mp4", "c.mp4"):
+        path = tmp_path / nombre
+        path.write_bytes(b"\x00" * 100)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def sin_ffprobe(monkeypatch):
+    """Simula un sistema sin ffprobe"""
+    monkeypatch.setattr(preflight, "verificar_ffprobe_disponible", lambda: False)
+
+
+# ============================================================================
+# TESTS: stat_archivos() / validar_archivos_existen()
+# ============================================================================
+
+def test_stat_archivos_reporta_todos(archivos_dummy, tmp_path):
+    """Todos los archivos faltantes se reportan, no solo el primero"""
+    paths = ["no_existe_1.mp4", archivos_dummy[0], "no_existe_2.mp4", str(tmp_path)]
+
+    resultados = preflight.stat_archivos(paths)
+
+    assert [r['ok'] for r in resultados] == [False, True, False, False]
+    assert resultados[1]['tamano'] == 100
+    assert "no es un archivo" in resultados[3]['error']
+
+
+def test_validar_archivos_existen(archivos_dummy):
+    """validar_archivos_existen sigue retornando bool"""
+    assert validar_archivos_existen(archivos_dummy) is True
+    assert validar_archivos_existen(archivos_dummy + ["no_existe.mp4"]) is False
+
+
+# ============================================================================
+# TESTS: planificar_render()
+# ============================================================================
+
+def test_planificar_render_ok(archivos_dummy, tmp_path, sin_ffprobe):
+    """Lote válido sin ffprobe: ok con advertencia"""
+    reporte = planificar_render(archivos_dummy, str(tmp_path / "salida" / "final.mp4"))
+
+    assert reporte['ok'] is True
+    assert reporte['problemas'] == []
+    assert reporte['tamano_total'] == 300
+    assert len(reporte['advertencias']) == 1
+
+
+def test_planificar_render_acumula_problemas(archivos_dummy, tmp_path, sin_ffprobe):
+    """Entradas faltantes y salida inválida se reportan juntas"""
+    salida_invalida = archivos_dummy[0] + "/final.mp4"  # padre es un archivo
+
+    reporte = planificar_render(
+        archivos_dummy + ["falta_1.mp4", "falta_2.mp4"],
+        salida_invalida
+    )
+
+    assert reporte['ok'] is False
+    assert len(reporte['problemas']) == 3
+
+
+def test_planificar_render_costo_y_codecs(archivos_dummy, tmp_path, monkeypatch):
+    """Estimación de costo y detección de codecs mezclados en modo copy"""
+    codecs = {archivos_dummy[0]: 'h264', archivos_dummy[1]: 'h264', archivos_dummy[2]: 'hevc'}
+
+    def probe_falso(file_path):
+        return {'path': file_path, 'ok': True, 'duracion': 10.0,
+                'video_codec': codecs[file_path], 'audio_codec': 'aac', 'error': None}
+
+    monkeypatch.setattr(preflight, "verificar_ffprobe_disponible", lambda: True)
+    monkeypatch.setattr(preflight, "probar_archivo", probe_falso)
+
+    reporte = planificar_render(archivos_dummy, str(tmp_path / "final.mp4"), modo='cpu')
+    assert reporte['ok'] is True
+    assert reporte['duracion_total'] == pytest.approx(30.0)
+    assert reporte['costo_estimado'] == pytest.approx(30.0 * preflight.FACTOR_COSTO_RENDER['cpu'])
+
+    reporte = planificar_render(archivos_dummy, str(tmp_path / "final.mp4"), modo='copy')
+    assert reporte['ok'] is False
+    assert "Codecs distintos" in reporte['problemas'][0]
+
+
+def test_planificar_render_modo_invalido(archivos_dummy, tmp_path):
+    """Modo desconocido lanza ValueError"""
+    with pytest.raises(ValueError):
+        planificar_render(archivos_dummy, str(tmp_path / "final.mp4"), modo='turbo')
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Escritura de audio en streaming para TTS-py
+
+Escribe el audio a medida que se genera cada fragmento, en un WAV o FLAC que
+crece en disco o en un WAV por stdout. Así un reproductor (o media_stitcher)
+puede empezar a consumir el audio antes de que termine el guion.
+"""
+
+import struct
+import sys
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+import torch
+
+FORMATOS_STREAMING = ("wav", "flac")
+
+# stdout original, reservado para el audio cuando se transmite por stdout
+_stdout_audio: Optional[BinaryIO] = None
+
+# Tamaño "desconocido" en el encabezado WAV: lo aceptan ffmpeg, sox y la mayoría de reproductores
+_TAMANO_DESCONOCIDO = 0xFFFFFFFF
+
+
+def _encabezado_wav(sample_rate: int, bytes_datos: int) -> bytes:
+    """Encabezado RIFF/WAVE para PCM 16 bits mono."""
+    tamano_riff = _TAMANO_DESCONOCIDO if bytes_datos == _TAMANO_DESCONOCIDO else 36 + bytes_datos
+    return (
+        b"RIFF" + struct.pack("<I", tamano_riff) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+        + b"data" + struct.pack("<I", bytes_datos)
+    )
+
+
+def _a_pcm16(wav: torch.Tensor) -> bytes:
+    """Convierte audio float en [-1, 1] a PCM 16 bits little-endian."""
+    muestras = wav.reshape(-1).clamp(-1.0, 1.0).mul(32767.0).to(torch.int16)
+    return muestras.numpy().astype("<i2").tobytes()
+
+
+class EscritorStreaming:
+    """
+    Escribe audio incrementalmente en un archivo o en stdout.
+
+    WAV en archivo: el encabezado se actualiza tras cada bloque, así el
+    archivo es válido en todo momento. WAV en stdout: encabezado con tamaño
+    desconocido. FLAC: vía soundfile, con flush tras cada bloque.
+    """
+
+    @staticmethod
+    def reservar_stdout():
+        """
+        Reserva stdout para el audio y redirige print() a stderr.
+
+        Por qué existe:
+            Cualquier mensaje impreso en stdout corrompería el WAV transmitido.
+        """
+        global _stdout_audio
+        if _stdout_audio is None:
+            _stdout_audio = sys.stdout.buffer
+            sys.stdout = sys.stderr
+
+    def __init__(self, destino: Path, sample_rate: int, formato: Optional[str] = None):
+        """
+        Args:
+            destino: Archivo de salida, o Path("-") para stdout
+            sample_rate: Frecuencia de muestreo del audio
+            formato: "wav" o "flac"; por defecto según la extensión del destino
+        """
+        self.destino = destino
+        self.sample_rate = sample_rate
+        self.a_stdout = str(destino) == "-"
+        self.formato = formato or ("flac" if destino.suffix.lower() == ".flac" else "wav")
+        self.muestras = 0
+        self._bytes_datos = 0
+        self._archivo: Optional[BinaryIO] = None
+        self._flac = None
+
+        if self.formato not in FORMATOS_STREAMING:
+            raise ValueError(f"Formato de streaming no soportado: {self.formato}")
+        if self.a_stdout and self.formato != "wav":
+            raise ValueError("Por stdout solo se puede transmitir WAV")
+
+        if self.a_stdout:
+            EscritorStreaming.reservar_stdout()
+            self._archivo = _stdout_audio
+            self._archivo.write(_encabezado_wav(sample_rate, _TAMANO_DESCONOCIDO))
+            self._archivo.flush()
+        else:
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            if self.formato == "flac":
+                import soundfile  # Dependencia de librosa (instalada con chatterbox-tts)
+                self._flac = soundfile.SoundFile(str(destino), "w", samplerate=sample_rate, channels=1,
+                                                 format="FLAC", subtype="PCM_16")
+            else:
+                self._archivo = open(destino, "wb")
+                self._archivo.write(_encabezado_wav(sample_rate, 0))
+                self._archivo.flush()
+
+    def escribir(self, wav: torch.Tensor):
+        """
+        Agrega un bloque de audio y lo deja visible para otros lectores.
+
+        Args:
+            wav: Audio float, forma (1, muestras)
+        """
+        if wav.numel() == 0:
+            return
+        self.muestras += wav.numel()
+
+        if self._flac is not None:
+            self._flac.write(wav.reshape(-1).clamp(-1.0, 1.0).numpy())
+            self._flac.flush()
+            return
+
+        datos = _a_pcm16(wav)
+        self._archivo.write(datos)
+        self._bytes_datos += len(datos)
+        if not self.a_stdout:
+            # Tamaños del encabezado al día: el archivo se puede leer mientras crece
+            self._archivo.seek(4)
+            self._archivo.write(struct.pack("<I", 36 + self._bytes_datos))
+            self._archivo.seek(40)
+            self._archivo.write(struct.pack("<I", self._bytes_datos))
+            self._archivo.seek(0, 2)
+        self._archivo.flush()
+
+    @property
+    def duracion(self) -> float:
+        """Segundos de audio escritos."""
+        return self.muestras / self.sample_rate
+
+    def cerrar(self):
+        if self._flac is not None:
+            self._flac.close()
+            self._flac = None
+        elif self._archivo is not None and not self.a_stdout:
+            self._archivo.close()
+        self._archivo = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
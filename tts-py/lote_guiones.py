@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Procesamiento por lotes de guiones para TTS-py
+
+Arma la lista de trabajos desde un directorio de guiones (.txt) o desde un
+manifiesto (JSON o JSONL) con voz, salida y parámetros por ítem, la ordena
+para preparar cada voz una sola vez y escribe los audios en un hilo de
+fondo mientras el modelo genera el siguiente guion.
+
+Manifiesto: una lista de objetos (JSON) o un objeto por línea (JSONL):
+
+    {"script": "guiones/cap01.txt", "voice": "voces/narrador.wav", "output": "cap01.wav"}
+    {"text": "Texto directo", "voice_name": "narrador", "exaggeration": 0.7}
+
+Las rutas relativas se resuelven contra el directorio del manifiesto.
+"""
+
+import json
+import queue
+import threading
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import torch
+
+from sintetizador_guion import ParametrosGeneracion
+
+# Campos de ParametrosGeneracion que un ítem del manifiesto puede sobrescribir
+_CAMPOS_PARAMETROS = ("exaggeration", "cfg_weight", "temperature")
+
+
+@dataclass
+class TrabajoGuion:
+    """Un guion del lote con su voz, su salida y sus parámetros."""
+    salida: Path
+    script: Optional[Path] = None
+    texto: Optional[str] = None
+    voz: Optional[Path] = None
+    voice_name: Optional[str] = None
+    parametros: ParametrosGeneracion = field(default_factory=ParametrosGeneracion)
+
+    @property
+    def nombre(self) -> str:
+        return self.script.name if self.script else self.salida.name
+
+    def leer_texto(self) -> str:
+        """Texto del trabajo; un guion vacío es un error del ítem, no del lote."""
+        texto = self.texto if self.texto is not None else self.script.read_text(encoding="utf-8")
+        texto = texto.strip()
+        if not texto:
+            raise ValueError(f"{self.nombre} está vacío")
+        return texto
+
+
+def _resolver(base: Path, ruta: Optional[str]) -> Optional[Path]:
+    if not ruta:
+        return None
+    ruta = Path(ruta).expanduser()
+    return ruta if ruta.is_absolute() else base / ruta
+
+
+def cargar_manifiesto(
+    ruta: Path,
+    directorio_salida: Path,
+    voz: Optional[Path] = None,
+    voice_name: Optional[str] = None,
+    parametros: Optional[ParametrosGeneracion] = None,
+) -> List[TrabajoGuion]:
+    """
+    Lee un manifiesto JSON/JSONL.
+
+    Args:
+        ruta: Archivo del manifiesto
+        directorio_salida: Directorio para las salidas sin "output" o relativas al lote
+        voz, voice_name, parametros: Valores por defecto para los ítems que no los definen
+
+    Returns:
+        List[TrabajoGuion]: Trabajos en el orden del manifiesto
+
+    Por qué existe:
+        Permite voz, salida y parámetros distintos por guion en una sola corrida.
+    """
+    base = ruta.parent
+    contenido = ruta.read_text(encoding="utf-8")
+    if ruta.suffix.lower() == ".jsonl":
+        items = [json.loads(linea) for linea in contenido.splitlines() if linea.strip()]
+    else:
+        items = json.loads(contenido)
+        if isinstance(items, dict):
+            items = items.get("items", [])
+
+    parametros = parametros or ParametrosGeneracion()
+    trabajos = []
+    for i, item in enumerate(items, 1):
+        script = _resolver(base, item.get("script"))
+        if script is None and item.get("text") is None:
+            raise ValueError(f"Ítem {i} del manifiesto sin 'script' ni 'text'")
+
+        salida = item.get("output")
+        if salida:
+            salida = Path(salida).expanduser()
+            salida = salida if salida.is_absolute() else directorio_salida / salida
+        else:
+            salida = directorio_salida / f"{script.stem if script else f'item_{i:04d}'}.wav"
+
+        trabajos.append(TrabajoGuion(
+            salida=salida,
+            script=script,
+            texto=item.get("text"),
+            voz=_resolver(base, item.get("voice")) or voz,
+            voice_name=item.get("voice_name", voice_name if not item.get("voice") else None),
+            parametros=replace(parametros, **{k: item[k] for k in _CAMPOS_PARAMETROS if k in item}),
+        ))
+    return trabajos
+
+
+def trabajos_desde_directorio(
+    directorio: Path,
+    directorio_salida: Path,
+    voz: Optional[Path] = None,
+    voice_name: Optional[str] = None,
+    parametros: Optional[ParametrosGeneracion] = None,
+) -> List[TrabajoGuion]:
+    """
+    Un trabajo por cada .txt del directorio, todos con la misma voz.
+
+    Returns:
+        List[TrabajoGuion]: Trabajos ordenados por nombre de archivo
+    """
+    parametros = parametros or ParametrosGeneracion()
+    return [
+        TrabajoGuion(salida=directorio_salida / f"{script.stem}.wav", script=script,
+                     voz=voz, voice_name=voice_name, parametros=parametros)
+        for script in sorted(directorio.glob("*.txt"))
+    ]
+
+
+def ordenar_por_voz(trabajos: List[TrabajoGuion], clave_voz: Callable[[TrabajoGuion], str]) -> List[TrabajoGuion]:
+    """
+    Agrupa los trabajos por voz, respetando el orden original dentro de cada grupo.
+
+    Args:
+        trabajos: Trabajos del lote
+        clave_voz: Identificador de la voz de un trabajo (mismo audio y voice_name = misma clave)
+
+    Returns:
+        List[TrabajoGuion]: Trabajos con cada voz contigua (grupos en orden de aparición)
+
+    Por qué existe:
+        Con los trabajos de una voz seguidos, sus condicionales se cargan en el
+        modelo una sola vez por lote en lugar de una vez por guion.
+    """
+    grupos: Dict[str, List[TrabajoGuion]] = {}
+    for trabajo in trabajos:
+        grupos.setdefault(clave_voz(trabajo), []).append(trabajo)
+    return [trabajo for grupo in grupos.values() for trabajo in grupo]
+
+
+class EscritorSegundoPlano:
+    """
+    Guarda audios en un hilo de fondo.
+
+    La cola tiene tamaño acotado: si el disco no da abasto, el hilo principal
+    espera en lugar de acumular audios en memoria.
+    """
+
+    def __init__(self, guardar: Callable[[torch.Tensor, Path], None], max_pendientes: int = 8):
+        """
+        Args:
+            guardar: Función que escribe un audio en una ruta
+            max_pendientes: Audios en cola antes de bloquear al productor
+        """
+        self.guardar = guardar
+        self.escritos = 0
+        self.errores: Dict[Path, str] = {}
+        self._cola: queue.Queue = queue.Queue(maxsize=max_pendientes)
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+
+    def _bucle(self):
+        while True:
+            tarea = self._cola.get()
+            if tarea is None:
+                return
+            wav, ruta = tarea
+            try:
+                ruta.parent.mkdir(parents=True, exist_ok=True)
+                self.guardar(wav, ruta)
+                self.escritos += 1
+            except Exception as e:
+                self.errores[ruta] = str(e)
+
+    def encolar(self, wav: torch.Tensor, ruta: Path):
+        self._cola.put((wav, ruta))
+
+    def cerrar(self) -> Dict[Path, str]:
+        """Espera a que se escriban los audios pendientes y devuelve los errores."""
+        self._cola.put(None)
+        self._hilo.join()
+        return self.errores
@@ -14,11 +14,15 @@ Uso:
 import argparse
 import hashlib
 import json
+import mmap
 import os
 import sys
+import tempfile
+import threading
 import time
+from importlib import metadata
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 import torch
 import torchaudio as ta
 from tqdm import tqdm
@@ -31,12 +35,33 @@ import perth
 if perth.PerthImplicitWatermarker is None:
     perth.PerthImplicitWatermarker = perth.DummyWatermarker
 
-from chatterbox.tts import ChatterboxTTS
+from chatterbox.tts import ChatterboxTTS, Conditionals
+
+from sintetizador_guion import (
+    MODOS_SEGMENTACION,
+    SAMPLE_RATE,
+    OpcionesGuion,
+    ParametrosGeneracion,
+    SintetizadorGuion,
+    segmentar_texto,
+)
+from escritura_streaming import EscritorStreaming
+from lote_guiones import (
+    EscritorSegundoPlano,
+    cargar_manifiesto,
+    ordenar_por_voz,
+    trabajos_desde_directorio,
+)
 
 # Directorio para cache de voces
 VOICE_CACHE_DIR = Path.home() / ".cache" / "tts-py" / "voices"
 VOICE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
+# Índice de huellas: ruta -> (tamaño, mtime_ns, inodo, hash) de cada audio ya hasheado
+FINGERPRINT_INDEX = VOICE_CACHE_DIR / "huellas.json"
+_huellas: Optional[dict] = None
+_huellas_lock = threading.Lock()
+
 
 def detectar_dispositivo() -> str:
     """
@@ -120,9 +145,59 @@ def leer_texto_desde_archivo(ruta: Path) -> str:
         sys.exit(1)
 
 
+def _hash_contenido(ruta_audio: Path) -> str:
+    """
+    Calcula el hash BLAKE2b del contenido de un archivo.
+
+    Args:
+        ruta_audio: Ruta al archivo
+
+    Returns:
+        str: Hash hexadecimal de 16 caracteres
+
+    Por qué existe:
+        BLAKE2b es más rápido que SHA-256 y mmap evita miles de lecturas
+        chicas en grabaciones de referencia largas.
+    """
+    blake = hashlib.blake2b(digest_size=8)
+    with open(ruta_audio, 'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+                blake.update(datos)
+        except (ValueError, OSError):
+            # Archivos vacíos o sistemas de archivos sin mmap: lecturas grandes
+            for chunk in iter(lambda: f.read(4 * 1024 * 1024), b''):
+                blake.update(chunk)
+    return blake.hexdigest()
+
+
+def _cargar_huellas() -> dict:
+    """Carga (una vez por proceso) el índice de huellas desde disco."""
+    global _huellas
+    if _huellas is None:
+        try:
+            with open(FINGERPRINT_INDEX, 'r') as f:
+                _huellas = json.load(f)
+        except Exception:
+            _huellas = {}
+    return _huellas
+
+
+def _guardar_huellas():
+    """Escribe el índice de huellas de forma atómica."""
+    try:
+        temporal = FINGERPRINT_INDEX.with_suffix('.tmp')
+        with open(temporal, 'w') as f:
+            json.dump(_huellas, f)
+        os.replace(temporal, FINGERPRINT_INDEX)
+    except Exception as e:
+        # No es crítico: la próxima vez se vuelve a hashear
+        print(f"⚠ No se pudo guardar el índice de huellas: {e}")
+
+
 def calcular_hash_audio(ruta_audio: Path) -> str:
     """
-    Calcula un hash SHA256 del archivo de audio.
+    Obtiene el hash del archivo de audio, reutilizando el guardado si no cambió.
 
     Args:
         ruta_audio: Ruta al archivo de audio
@@ -132,12 +207,53 @@ def calcular_hash_audio(ruta_audio: Path) -> str:
 
     Por qué existe:
         Identifica de forma única cada archivo de voz de referencia para el cache.
+        Si la firma (tamaño, mtime_ns, inodo) coincide con la del índice no se
+        lee el archivo: un stat en lugar de segundos de hashing por ejecución.
     """
-    sha256 = hashlib.sha256()
-    with open(ruta_audio, 'rb') as f:
-        for chunk in iter(lambda: f.read(8192), b''):
-            sha256.update(chunk)
-    return sha256.hexdigest()[:16]  # Primeros 16 caracteres son suficientes
+    ruta = str(ruta_audio.absolute())
+    info = os.stat(ruta)
+    firma = [info.st_size, info.st_mtime_ns, info.st_ino]
+
+    with _huellas_lock:
+        entrada = _cargar_huellas().get(ruta)
+        if entrada and entrada['firma'] == firma:
+            return entrada['hash']
+
+    audio_hash = _hash_contenido(ruta_audio)
+    with _huellas_lock:
+        _cargar_huellas()[ruta] = {'firma': firma, 'hash': audio_hash}
+        _guardar_huellas()
+    return audio_hash
+
+
+def version_modelo() -> str:
+    """
+    Obtiene la versión instalada de Chatterbox TTS.
+
+    Returns:
+        str: Versión del paquete chatterbox-tts, o "desconocida"
+
+    Por qué existe:
+        Los condicionales cacheados dependen de los pesos del modelo que los
+        calculó. Incluir la versión en la clave invalida el cache al actualizar.
+    """
+    try:
+        return metadata.version("chatterbox-tts")
+    except metadata.PackageNotFoundError:
+        return "desconocida"
+
+
+def ruta_condicionales(audio_hash: str) -> Path:
+    """
+    Ruta del archivo de condicionales para un audio y la versión actual del modelo.
+
+    Args:
+        audio_hash: Hash del audio de referencia
+
+    Returns:
+        Path: Archivo .pt dentro del cache de voces
+    """
+    return VOICE_CACHE_DIR / f"{audio_hash}-{version_modelo()}.pt"
 
 
 def obtener_voz_desde_cache(ruta_audio: Path, voice_name: Optional[str] = None) -> Optional[Tuple[Path, dict]]:
@@ -149,16 +265,18 @@ def obtener_voz_desde_cache(ruta_audio: Path, voice_name: Optional[str] = None)
         voice_name: Nombre opcional de la voz
 
     Returns:
-        Tuple[Path, dict] si está en cache, None si no
+        Tuple[Path, dict] con la ruta de los condicionales y la metadata si
+        está en cache, None si no
 
     Por qué existe:
         Evita reprocesar el mismo audio de referencia múltiples veces.
-        Mejora significativamente el rendimiento para voces usadas frecuentemente.
+        Los condicionales (embedding del hablante, tokens del prompt) se
+        cargan directo al modelo sin volver a procesar el audio.
     """
+    audio_hash = calcular_hash_audio(ruta_audio)
     if voice_name:
         cache_file = VOICE_CACHE_DIR / f"{voice_name}.json"
     else:
-        audio_hash = calcular_hash_audio(ruta_audio)
         cache_file = VOICE_CACHE_DIR / f"{audio_hash}.json"
 
     if cache_file.exists():
@@ -166,28 +284,46 @@ def obtener_voz_desde_cache(ruta_audio: Path, voice_name: Optional[str] = None)
             with open(cache_file, 'r') as f:
                 cache_data = json.load(f)
 
-            # Verificar que el archivo de audio original sigue existiendo y no cambió
-            if Path(cache_data['original_path']).exists():
-                current_hash = calcular_hash_audio(Path(cache_data['original_path']))
-                if current_hash == cache_data['audio_hash']:
-                    print(f"✓ Voz encontrada en cache: {cache_file.stem}")
-                    return ruta_audio, cache_data
+            # El audio no cambió (ni se reasignó el nombre a otro archivo) y
+            # los condicionales son de la versión actual del modelo
+            conds_file = ruta_condicionales(audio_hash)
+            if (cache_data['audio_hash'] == audio_hash
+                    and cache_data.get('model_version') == version_modelo()
+                    and conds_file.exists()):
+                print(f"✓ Voz encontrada en cache: {cache_file.stem}")
+                return conds_file, cache_data
         except Exception:
             pass  # Si hay error leyendo cache, simplemente no lo usamos
 
     return None
 
 
-def guardar_voz_en_cache(ruta_audio: Path, voice_name: Optional[str] = None):
+def cargar_condicionales(modelo: ChatterboxTTS, conds_file: Path):
     """
-    Guarda información de una voz en el cache.
+    Carga condicionales cacheados directamente en el modelo.
 
     Args:
+        modelo: Modelo Chatterbox TTS cargado
+        conds_file: Archivo .pt guardado por guardar_voz_en_cache
+
+    Por qué existe:
+        Con los condicionales en modelo.conds, generate() no necesita
+        audio_prompt_path y la voz clonada no cuesta procesamiento de referencia.
+    """
+    modelo.conds = Conditionals.load(conds_file, map_location="cpu").to(modelo.device)
+
+
+def guardar_voz_en_cache(modelo: ChatterboxTTS, ruta_audio: Path, voice_name: Optional[str] = None):
+    """
+    Guarda los condicionales de una voz y su metadata en el cache.
+
+    Args:
+        modelo: Modelo con los condicionales de la voz ya preparados
         ruta_audio: Ruta al archivo de audio de referencia
         voice_name: Nombre opcional de la voz
 
     Por qué existe:
-        Almacena metadata de voces procesadas para reutilización futura.
+        Almacena el resultado de prepare_conditionals para reutilización futura.
     """
     audio_hash = calcular_hash_audio(ruta_audio)
 
@@ -196,14 +332,21 @@ def guardar_voz_en_cache(ruta_audio: Path, voice_name: Optional[str] = None):
     else:
         cache_file = VOICE_CACHE_DIR / f"{audio_hash}.json"
 
+    conds_file = ruta_condicionales(audio_hash)
     cache_data = {
         'original_path': str(ruta_audio.absolute()),
         'audio_hash': audio_hash,
+        'model_version': version_modelo(),
+        'conds_file': conds_file.name,
         'cached_at': time.time(),
         'voice_name': voice_name
     }
 
     try:
+        # Escritura atómica: un .pt a medio escribir no debe parecer válido
+        temporal = conds_file.with_suffix('.tmp')
+        modelo.conds.save(temporal)
+        os.replace(temporal, conds_file)
         with open(cache_file, 'w') as f:
             json.dump(cache_data, f, indent=2)
         print(f"✓ Voz guardada en cache: {cache_file.stem}")
@@ -212,61 +355,192 @@ def guardar_voz_en_cache(ruta_audio: Path, voice_name: Optional[str] = None):
         print(f"⚠ No se pudo guardar en cache: {e}")
 
 
-def generar_audio(
+def preparar_voz(
     modelo: ChatterboxTTS,
+    ruta_audio_referencia: Path,
+    voice_name: Optional[str] = None,
+):
+    """
+    Deja en modelo.conds los condicionales de la voz de referencia.
+
+    Args:
+        modelo: Modelo Chatterbox TTS cargado
+        ruta_audio_referencia: Ruta al audio de referencia
+        voice_name: Nombre opcional para cachear la voz
+
+    Por qué existe:
+        Desde cache solo se cargan tensores; sin cache se procesa el audio
+        una vez y se guarda para las siguientes ejecuciones.
+    """
+    cache_result = obtener_voz_desde_cache(ruta_audio_referencia, voice_name)
+    if cache_result:
+        print("⚡ Usando voz desde cache (más rápido)")
+        try:
+            cargar_condicionales(modelo, cache_result[0])
+            return
+        except Exception as e:
+            print(f"⚠ Cache de voz inválido, se reprocesará: {e}")
+
+    print(f"Procesando voz de referencia: {ruta_audio_referencia}")
+    modelo.prepare_conditionals(str(ruta_audio_referencia))
+    guardar_voz_en_cache(modelo, ruta_audio_referencia, voice_name)
+
+
+def condicionales_para_workers(
+    ruta_audio_referencia: Path,
+    voice_name: Optional[str],
+    device: str,
+) -> Path:
+    """
+    Archivo de condicionales de la voz, listo para que lo carguen los workers.
+
+    Args:
+        ruta_audio_referencia: Ruta al audio de referencia
+        voice_name: Nombre opcional para cachear la voz
+        device: Dispositivo donde preparar la voz si no está en cache
+
+    Returns:
+        Path: Archivo .pt con los condicionales
+
+    Por qué existe:
+        Con --devices cada worker preparaba la voz por su cuenta: todos
+        corrían prepare_conditionals a la vez y escribían los mismos
+        temporales del cache de voces y del índice de huellas. Se prepara
+        una sola vez aquí, antes de abrir el pool.
+    """
+    cache_result = obtener_voz_desde_cache(ruta_audio_referencia, voice_name)
+    if cache_result:
+        try:
+            Conditionals.load(cache_result[0], map_location="cpu")
+            print("⚡ Usando voz desde cache (más rápido)")
+            return cache_result[0]
+        except Exception as e:
+            print(f"⚠ Cache de voz inválido, se reprocesará: {e}")
+
+    # Modelo temporal solo para preparar la voz; se libera antes de abrir el pool
+    modelo = cargar_modelo(device)
+    try:
+        print(f"Procesando voz de referencia: {ruta_audio_referencia}")
+        modelo.prepare_conditionals(str(ruta_audio_referencia))
+        guardar_voz_en_cache(modelo, ruta_audio_referencia, voice_name)
+        conds_file = ruta_condicionales(calcular_hash_audio(ruta_audio_referencia))
+        if not conds_file.exists():
+            # Sin cache de voces escribible: un archivo temporal para esta ejecución
+            descriptor, temporal = tempfile.mkstemp(suffix=".pt", prefix="tts-py-voz-")
+            os.close(descriptor)
+            conds_file = Path(temporal)
+            modelo.conds.save(conds_file)
+        return conds_file
+    finally:
+        del modelo
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+def identificador_voz(ruta_audio: Path | None) -> str:
+    """
+    Identifica la voz con la que se genera, para la clave del cache de fragmentos.
+
+    Args:
+        ruta_audio: Audio de referencia, o None para la voz por defecto
+
+    Returns:
+        str: Hash del audio (o "default") más la versión del modelo
+    """
+    base = calcular_hash_audio(ruta_audio) if ruta_audio else "default"
+    return f"{base}-{version_modelo()}"
+
+
+def preparar_sintetizador(
+    modelo: ChatterboxTTS | None,
     texto: str,
     ruta_audio_referencia: Path | None = None,
     voice_name: Optional[str] = None,
+    parametros: Optional[ParametrosGeneracion] = None,
+    opciones: Optional[OpcionesGuion] = None,
+    dispositivos: Optional[list] = None,
+) -> Tuple[list, SintetizadorGuion]:
+    """
+    Divide el texto en fragmentos y prepara la voz y el sintetizador.
+
+    Args:
+        (ver generar_audio)
+
+    Returns:
+        Tuple[list, SintetizadorGuion]: Fragmentos del guion y sintetizador listo
+
+    Por qué existe:
+        Paso común a la generación completa y a la generación en streaming.
+    """
+    fragmentos = segmentar_texto(texto, opciones)
+    print(f"✓ Guion dividido en {len(fragmentos)} fragmento(s)")
+
+    # Los condicionales quedan en el modelo; generate() no recibe audio_prompt_path
+    condicionales = None
+    if not ruta_audio_referencia:
+        print("Usando voz por defecto (sin referencia)")
+    elif modelo is not None:
+        preparar_voz(modelo, ruta_audio_referencia, voice_name)
+    else:
+        # Workers: la voz se prepara y guarda una vez aquí; cada worker solo la carga
+        condicionales = condicionales_para_workers(ruta_audio_referencia, voice_name, dispositivos[0])
+
+    sintetizador = SintetizadorGuion(
+        modelo,
+        identificador_voz(ruta_audio_referencia),
+        parametros=parametros,
+        opciones=opciones,
+        dispositivos=dispositivos,
+        condicionales=condicionales,
+    )
+    return fragmentos, sintetizador
+
+
+def generar_audio(
+    modelo: ChatterboxTTS | None,
+    texto: str,
+    ruta_audio_referencia: Path | None = None,
+    voice_name: Optional[str] = None,
+    parametros: Optional[ParametrosGeneracion] = None,
+    opciones: Optional[OpcionesGuion] = None,
+    dispositivos: Optional[list] = None,
 ) -> torch.Tensor:
     """
     Genera audio a partir de texto usando el modelo Chatterbox.
 
     Args:
-        modelo: Modelo Chatterbox TTS cargado
+        modelo: Modelo Chatterbox TTS cargado (None si se generan con workers)
         texto: Texto a sintetizar
         ruta_audio_referencia: Ruta opcional a audio de referencia para clonación
         voice_name: Nombre opcional para cachear la voz
+        parametros: Parámetros de generación (exaggeration, cfg_weight, temperature)
+        opciones: Segmentación del guion, pausas, crossfade y cache de fragmentos
+        dispositivos: Un dispositivo por worker; con dos o más se genera en paralelo
 
     Returns:
         torch.Tensor: Audio generado como tensor
 
     Por qué existe:
         Encapsula la lógica de generación de audio, permitiendo uso con o sin
-        referencia de voz, con soporte de cache.
+        referencia de voz, con soporte de cache. El texto se genera por
+        fragmentos para que los guiones largos no disparen memoria ni latencia.
     """
     print(f"\nGenerando audio...")
     print(f"Texto: '{texto[:100]}{'...' if len(texto) > 100 else ''}'")
 
-    # Verificar cache si hay voz de referencia
-    if ruta_audio_referencia:
-        cache_result = obtener_voz_desde_cache(ruta_audio_referencia, voice_name)
-        if cache_result:
-            print("⚡ Usando voz desde cache (más rápido)")
-        else:
-            print(f"Procesando voz de referencia: {ruta_audio_referencia}")
-
     try:
-        # Estimar duración basada en longitud del texto
-        estimated_seconds = len(texto.split()) * 0.5  # ~0.5s por palabra
+        fragmentos, sintetizador = preparar_sintetizador(
+            modelo, texto, ruta_audio_referencia, voice_name, parametros, opciones, dispositivos
+        )
 
-        print(f"⏳ Tiempo estimado: ~{int(estimated_seconds)}s")
-
-        # Generar con barra de progreso
-        with tqdm(total=100, desc="Generando", bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt}') as pbar:
+        # Generar con barra de progreso (un paso por fragmento)
+        with tqdm(total=len(fragmentos), desc="Generando", unit="frag") as pbar:
             start_time = time.time()
-
-            if ruta_audio_referencia:
-                wav = modelo.generate(texto, audio_prompt_path=str(ruta_audio_referencia))
-                # Guardar en cache para próxima vez
-                if not cache_result:
-                    guardar_voz_en_cache(ruta_audio_referencia, voice_name)
-            else:
-                print("Usando voz por defecto (sin referencia)")
-                wav = modelo.generate(texto)
-
-            pbar.update(100)
+            wav = sintetizador.sintetizar(fragmentos, al_avanzar=lambda _: pbar.update(1))
             elapsed = time.time() - start_time
 
+        if sintetizador.desde_cache:
+            print(f"⚡ {sintetizador.desde_cache} fragmento(s) desde cache, {sintetizador.generados} generado(s)")
         print(f"✓ Audio generado en {elapsed:.1f}s")
         return wav
 
@@ -275,6 +549,54 @@ def generar_audio(
         sys.exit(1)
 
 
+def generar_audio_streaming(
+    modelo: ChatterboxTTS | None,
+    texto: str,
+    ruta_salida: Path,
+    ruta_audio_referencia: Path | None = None,
+    voice_name: Optional[str] = None,
+    parametros: Optional[ParametrosGeneracion] = None,
+    opciones: Optional[OpcionesGuion] = None,
+    dispositivos: Optional[list] = None,
+):
+    """
+    Genera el audio fragmento por fragmento y lo escribe a medida que sale.
+
+    Args:
+        modelo: Modelo Chatterbox TTS cargado (None si se generan con workers)
+        texto: Texto a sintetizar
+        ruta_salida: WAV/FLAC que crece en disco, o Path("-") para WAV por stdout
+        (resto: ver generar_audio)
+
+    Por qué existe:
+        Un reproductor o media_stitcher puede empezar a consumir el audio en
+        cuanto termina la primera oración, sin esperar el guion completo.
+    """
+    print(f"\nGenerando audio en streaming hacia {'stdout' if str(ruta_salida) == '-' else ruta_salida}...")
+
+    try:
+        fragmentos, sintetizador = preparar_sintetizador(
+            modelo, texto, ruta_audio_referencia, voice_name, parametros, opciones, dispositivos
+        )
+
+        with EscritorStreaming(ruta_salida, SAMPLE_RATE) as escritor, \
+                tqdm(total=len(fragmentos), desc="Generando", unit="frag") as pbar:
+            start_time = time.time()
+            primer_audio = None
+            for bloque in sintetizador.transmitir(fragmentos, al_avanzar=lambda _: pbar.update(1)):
+                escritor.escribir(bloque)
+                if primer_audio is None and escritor.muestras:
+                    primer_audio = time.time() - start_time
+                    pbar.write(f"⚡ Primer audio en {primer_audio:.2f}s")
+            elapsed = time.time() - start_time
+
+        print(f"✓ {escritor.duracion:.1f}s de audio generados en {elapsed:.1f}s")
+
+    except Exception as e:
+        print(f"❌ Error durante la generación: {e}")
+        sys.exit(1)
+
+
 def guardar_audio(wav: torch.Tensor, ruta_salida: Path, sample_rate: int):
     """
     Guarda el audio generado en un archivo WAV.
@@ -304,6 +626,104 @@ def guardar_audio(wav: torch.Tensor, ruta_salida: Path, sample_rate: int):
         sys.exit(1)
 
 
+def agregar_opciones_sintesis(parser: argparse.ArgumentParser):
+    """
+    Agrega las opciones de generación, segmentación y dispositivo.
+
+    Args:
+        parser: Parser del modo simple o del subcomando batch
+
+    Por qué existe:
+        Ambos modos comparten estas opciones; definirlas una vez mantiene
+        iguales sus nombres, defaults y ayudas.
+    """
+    # Parámetros de generación
+    parser.add_argument(
+        "--exaggeration",
+        type=float,
+        default=0.5,
+        help="Intensidad emocional de la voz (default: 0.5)"
+    )
+    parser.add_argument(
+        "--cfg-weight",
+        type=float,
+        default=0.5,
+        help="Peso de classifier-free guidance (default: 0.5)"
+    )
+    parser.add_argument(
+        "--temperature",
+        type=float,
+        default=0.8,
+        help="Temperatura de muestreo (default: 0.8)"
+    )
+
+    # Guiones largos
+    parser.add_argument(
+        "--segmentar",
+        choices=MODOS_SEGMENTACION,
+        default="oracion",
+        help="Unidad de generación del guion: oracion o parrafo (default: oracion)"
+    )
+    parser.add_argument(
+        "--max-caracteres",
+        type=int,
+        default=300,
+        help="Largo máximo de cada fragmento; las unidades más largas se dividen (default: 300)"
+    )
+    parser.add_argument(
+        "--pausa-oracion",
+        type=float,
+        default=0.25,
+        help="Silencio en segundos entre oraciones (default: 0.25)"
+    )
+    parser.add_argument(
+        "--pausa-parrafo",
+        type=float,
+        default=0.7,
+        help="Silencio en segundos entre párrafos (default: 0.7)"
+    )
+    parser.add_argument(
+        "--crossfade-ms",
+        type=float,
+        default=20.0,
+        help="Duración del fundido entre fragmentos en milisegundos (default: 20)"
+    )
+    parser.add_argument(
+        "--sin-cache-fragmentos",
+        action="store_true",
+        help="No leer ni guardar fragmentos generados en ~/.cache/tts-py/fragmentos"
+    )
+    # Opciones adicionales
+    parser.add_argument(
+        "--cpu",
+        action="store_true",
+        help="Forzar uso de CPU en lugar de GPU"
+    )
+
+
+def parametros_desde_args(args: argparse.Namespace) -> ParametrosGeneracion:
+    """Parámetros de generación a partir de los argumentos de la CLI."""
+    return ParametrosGeneracion(
+        exaggeration=args.exaggeration,
+        cfg_weight=args.cfg_weight,
+        temperature=args.temperature,
+    )
+
+
+def opciones_desde_args(args: argparse.Namespace, streaming: bool = False) -> OpcionesGuion:
+    """Opciones de segmentación y unión a partir de los argumentos de la CLI."""
+    return OpcionesGuion(
+        modo=args.segmentar,
+        max_caracteres=args.max_caracteres,
+        pausa_oracion=args.pausa_oracion,
+        pausa_parrafo=args.pausa_parrafo,
+        crossfade_ms=args.crossfade_ms,
+        usar_cache=not args.sin_cache_fragmentos,
+        # En streaming el primer fragmento es corto para que el primer audio salga antes
+        max_caracteres_inicial=80 if streaming else None,
+    )
+
+
 def parsear_argumentos() -> argparse.Namespace:
     """
     Procesa los argumentos de línea de comandos.
@@ -330,6 +750,15 @@ Ejemplos de uso:
 
   # Combinar guion y voz de referencia
   uv run main.py --script guion.txt --voice voz.wav --output salida.wav
+
+  # Streaming: reproducir mientras se genera
+  uv run main.py --script guion.txt --stream --output - | ffplay -nodisp -autoexit -
+
+  # Guion largo repartido entre dos GPUs
+  uv run main.py --script guion.txt --voice voz.wav --devices cuda:0 cuda:1
+
+  # Lote de guiones con una sola carga del modelo (ver: main.py batch --help)
+  uv run main.py batch creative-scripts/ --voice voz.wav --output output-dir/
         """
     )
 
@@ -364,19 +793,178 @@ Ejemplos de uso:
         "-o", "--output",
         type=Path,
         default=Path("output-dir/output.wav"),
-        help="Ruta donde guardar el audio generado (default: output-dir/output.wav)"
+        help="Ruta donde guardar el audio generado (default: output-dir/output.wav); con --stream, '-' es stdout"
     )
-
-    # Opciones adicionales
     parser.add_argument(
-        "--cpu",
+        "--stream",
         action="store_true",
-        help="Forzar uso de CPU en lugar de GPU"
+        help="Escribir el audio a medida que se genera cada oración (WAV/FLAC que crece, o '-' para stdout)"
+    )
+
+    agregar_opciones_sintesis(parser)
+
+    parser.add_argument(
+        "--devices",
+        nargs="+",
+        metavar="DEVICE",
+        help="Generar en paralelo con un worker por dispositivo (ej. cuda:0 cuda:1; repetir para varios por GPU)"
     )
 
     return parser.parse_args()
 
 
+def parsear_argumentos_lote(argv: list) -> argparse.Namespace:
+    """
+    Procesa los argumentos del subcomando batch.
+
+    Args:
+        argv: Argumentos después de "batch"
+
+    Returns:
+        argparse.Namespace: Argumentos parseados
+    """
+    parser = argparse.ArgumentParser(
+        prog="main.py batch",
+        description="Genera audio para un directorio de guiones o un manifiesto, cargando el modelo una sola vez",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Ejemplos de uso:
+  # Todos los .txt de un directorio con la misma voz
+  uv run main.py batch creative-scripts/ --voice audio-samples/narrador.wav --output output-dir/
+
+  # Manifiesto con voz, salida y parámetros por guion
+  uv run main.py batch nocturno.jsonl --output output-dir/
+
+Manifiesto (JSON o JSONL), un objeto por guion:
+  {"script": "cap01.txt", "voice": "narrador.wav", "output": "cap01.wav", "exaggeration": 0.6}
+        """
+    )
+    parser.add_argument(
+        "entrada",
+        type=Path,
+        help="Directorio con guiones .txt o manifiesto .json/.jsonl"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=Path,
+        default=Path("output-dir"),
+        help="Directorio de salida (default: output-dir)"
+    )
+    parser.add_argument(
+        "-v", "--voice",
+        type=Path,
+        help="Voz de referencia por defecto para los guiones que no definen una"
+    )
+    parser.add_argument(
+        "--voice-name",
+        type=str,
+        help="Nombre en cache de la voz por defecto"
+    )
+    agregar_opciones_sintesis(parser)
+    return parser.parse_args(argv)
+
+
+def ejecutar_lote(argv: list):
+    """
+    Subcomando batch: genera todos los guiones de un directorio o manifiesto.
+
+    Args:
+        argv: Argumentos después de "batch"
+
+    Por qué existe:
+        Cargar el modelo (~2GB) por guion dominaba las corridas nocturnas.
+        Aquí se carga una vez, los guiones se agrupan por voz para preparar
+        cada voz una sola vez y los audios se escriben en un hilo de fondo
+        mientras se genera el siguiente. Un guion que falla no detiene el lote.
+    """
+    args = parsear_argumentos_lote(argv)
+    parametros = parametros_desde_args(args)
+
+    print("=" * 60)
+    print("TTS-py - Procesamiento por Lotes")
+    print("=" * 60)
+    print()
+
+    if args.voice and not args.voice.exists():
+        print(f"❌ Error: No se encontró el archivo de audio de referencia: {args.voice}")
+        sys.exit(1)
+
+    try:
+        if args.entrada.is_dir():
+            trabajos = trabajos_desde_directorio(args.entrada, args.output, args.voice, args.voice_name, parametros)
+        else:
+            trabajos = cargar_manifiesto(args.entrada, args.output, args.voice, args.voice_name, parametros)
+    except FileNotFoundError:
+        print(f"❌ Error: No se encontró {args.entrada}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Error al leer el manifiesto: {e}")
+        sys.exit(1)
+
+    if not trabajos:
+        print(f"⚠ No se encontraron guiones en {args.entrada}")
+        sys.exit(1)
+
+    # Agrupar por audio de referencia (no por ruta: dos rutas al mismo audio comparten voz)
+    # y por voice_name, que tiene su propia entrada en el cache de voces.
+    # Errores por salida: dos guiones con el mismo nombre en carpetas distintas no se pisan
+    errores: Dict[Path, str] = {}
+    claves_voz = {}
+    for trabajo in trabajos:
+        try:
+            claves_voz[id(trabajo)] = identificador_voz(trabajo.voz)
+        except OSError as e:
+            errores[trabajo.salida] = f"voz de referencia inválida: {e}"
+    grupos_voz = {id(t): f"{claves_voz[id(t)]}|{t.voice_name or ''}" for t in trabajos if id(t) in claves_voz}
+    trabajos = ordenar_por_voz([t for t in trabajos if id(t) in claves_voz], lambda t: grupos_voz[id(t)])
+    print(f"✓ {len(trabajos)} guion(es), {len(set(grupos_voz.values()))} voz(ces) distinta(s)")
+
+    device = "cpu" if args.cpu else detectar_dispositivo()
+    modelo = cargar_modelo(device)
+    conds_default = modelo.conds
+    opciones = opciones_desde_args(args)
+
+    escritor = EscritorSegundoPlano(lambda wav, ruta: ta.save(str(ruta), wav, SAMPLE_RATE))
+    voz_actual = None
+    start_time = time.time()
+
+    for trabajo in tqdm(trabajos, desc="Guiones", unit="guion"):
+        try:
+            texto = trabajo.leer_texto()
+            clave = claves_voz[id(trabajo)]
+            if grupos_voz[id(trabajo)] != voz_actual:
+                if trabajo.voz:
+                    preparar_voz(modelo, trabajo.voz, trabajo.voice_name)
+                else:
+                    modelo.conds = conds_default
+                voz_actual = grupos_voz[id(trabajo)]
+
+            sintetizador = SintetizadorGuion(modelo, clave, parametros=trabajo.parametros, opciones=opciones)
+            wav = sintetizador.sintetizar(segmentar_texto(texto, opciones))
+            escritor.encolar(wav, trabajo.salida)
+        except Exception as e:
+            errores[trabajo.salida] = str(e)
+            tqdm.write(f"❌ {trabajo.script or trabajo.salida}: {e}")
+            # La voz pudo quedar a medio preparar: forzar a prepararla de nuevo
+            voz_actual = None
+
+    for ruta, error in escritor.cerrar().items():
+        errores[ruta] = f"error al guardar: {error}"
+    elapsed = time.time() - start_time
+
+    print()
+    print("=" * 60)
+    print(f"✓ {escritor.escritos} audio(s) guardado(s) en {elapsed:.1f}s")
+    if errores:
+        print(f"❌ {len(errores)} guion(es) con error:")
+        for salida, error in errores.items():
+            print(f"   - {salida}: {error}")
+        print("=" * 60)
+        sys.exit(1)
+    print("✅ Lote completado exitosamente")
+    print("=" * 60)
+
+
 def main():
     """
     Función principal del programa.
@@ -385,23 +973,39 @@ def main():
         Orquesta todo el flujo de trabajo: parsear args, cargar modelo,
         generar audio, y guardar resultado.
     """
+    # Subcomando batch: muchos guiones con una sola carga del modelo
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        ejecutar_lote(sys.argv[2:])
+        return
+
+    # Parsear argumentos
+    args = parsear_argumentos()
+
+    if str(args.output) == "-":
+        if not args.stream:
+            print("❌ Error: --output - (stdout) requiere --stream")
+            sys.exit(1)
+        # stdout lleva el audio: los mensajes van a stderr
+        EscritorStreaming.reservar_stdout()
+
     print("=" * 60)
     print("TTS-py - Text to Speech con Clonación de Voz")
     print("=" * 60)
     print()
 
-    # Parsear argumentos
-    args = parsear_argumentos()
-
     # Detectar dispositivo
-    if args.cpu:
+    if args.devices:
+        device = args.devices[0]
+        print(f"✓ Dispositivos: {', '.join(args.devices)}")
+    elif args.cpu:
         device = "cpu"
         print("✓ Forzando uso de CPU (según parámetro --cpu)")
     else:
         device = detectar_dispositivo()
 
-    # Cargar modelo
-    modelo = cargar_modelo(device)
+    # Cargar modelo (con varios dispositivos cada worker carga el suyo)
+    dispositivos = args.devices if args.devices and len(args.devices) > 1 else None
+    modelo = None if dispositivos else cargar_modelo(device)
 
     # Obtener texto
     if args.script:
@@ -419,11 +1023,18 @@ def main():
         print("⚠ Advertencia: --voice-name solo funciona con --voice, se ignorará")
         args.voice_name = None
 
-    # Generar audio
-    wav = generar_audio(modelo, texto, args.voice, args.voice_name)
+    parametros = parametros_desde_args(args)
+    opciones = opciones_desde_args(args, streaming=args.stream)
+
+    if args.stream:
+        generar_audio_streaming(modelo, texto, args.output, args.voice, args.voice_name,
+                                parametros, opciones, dispositivos)
+    else:
+        # Generar audio
+        wav = generar_audio(modelo, texto, args.voice, args.voice_name, parametros, opciones, dispositivos)
 
-    # Guardar audio
-    guardar_audio(wav, args.output, modelo.sr)
+        # Guardar audio
+        guardar_audio(wav, args.output, SAMPLE_RATE)
 
     print()
     print("=" * 60)
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Síntesis de guiones largos por fragmentos para TTS-py
+
+Divide el guion en oraciones (o párrafos), genera cada fragmento por separado
+y los une con crossfades y pausas configurables. Cada fragmento se cachea en
+disco por (texto, voz, parámetros): editar una oración del guion solo vuelve
+a sintetizar esa oración, y una corrida interrumpida retoma donde quedó.
+
+Con más de un worker, los fragmentos se reparten entre procesos que cargan
+su propia copia del modelo (uno por dispositivo, o varios en la misma GPU).
+Los condicionales de la voz se preparan una sola vez antes de abrir el pool;
+los workers solo los cargan, sin escribir en el cache de voces.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import torch
+from chatterbox.models.s3gen import S3GEN_SR
+
+# Frecuencia de muestreo del audio generado por Chatterbox (ChatterboxTTS.sr)
+SAMPLE_RATE = S3GEN_SR
+
+# Directorio para cache de fragmentos generados
+CHUNK_CACHE_DIR = Path.home() / ".cache" / "tts-py" / "fragmentos"
+
+MODOS_SEGMENTACION = ("oracion", "parrafo")
+
+# Fin de oración: puntuación final seguida de espacio (las comillas/paréntesis de cierre quedan con la oración)
+_FIN_ORACION = re.compile(r'(?:(?<=[.!?…])|(?<=[.!?…]["»”)\]]))\s+')
+_CORTE_SECUNDARIO = re.compile(r'(?<=[,;:])\s+')
+
+
+@dataclass
+class ParametrosGeneracion:
+    """Parámetros de ChatterboxTTS.generate que cambian el audio (forman parte de la clave de cache)."""
+    exaggeration: float = 0.5
+    cfg_weight: float = 0.5
+    temperature: float = 0.8
+
+
+@dataclass
+class OpcionesGuion:
+    """Cómo se divide el guion y cómo se unen los fragmentos."""
+    modo: str = "oracion"
+    max_caracteres: int = 300
+    pausa_oracion: float = 0.25
+    pausa_parrafo: float = 0.7
+    crossfade_ms: float = 20.0
+    usar_cache: bool = True
+    # Largo máximo del primer fragmento (streaming: el primer audio sale antes)
+    max_caracteres_inicial: Optional[int] = None
+
+
+@dataclass
+class Fragmento:
+    """Unidad de síntesis: texto y silencio (en segundos) que va después."""
+    texto: str
+    pausa: float
+
+
+def _partir_largo(unidad: str, max_caracteres: int) -> List[str]:
+    """
+    Divide una unidad que excede max_caracteres en comas/punto y coma y,
+    si aún no alcanza, entre palabras.
+
+    Por qué existe:
+        Chatterbox limita los tokens de voz por llamada; una oración muy
+        larga se cortaría a la mitad en lugar de generarse completa.
+    """
+    if len(unidad) <= max_caracteres:
+        return [unidad]
+
+    piezas = []
+    for pieza in _CORTE_SECUNDARIO.split(unidad):
+        if len(pieza) <= max_caracteres:
+            piezas.append(pieza)
+        else:
+            piezas.extend(pieza.split())
+
+    partes = []
+    actual = ""
+    for pieza in piezas:
+        candidato = f"{actual} {pieza}" if actual else pieza
+        if actual and len(candidato) > max_caracteres:
+            partes.append(actual)
+            actual = pieza
+        else:
+            actual = candidato
+    if actual:
+        partes.append(actual)
+    return partes
+
+
+def segmentar_texto(texto: str, opciones: Optional[OpcionesGuion] = None) -> List[Fragmento]:
+    """
+    Divide un guion en fragmentos para sintetizar por separado.
+
+    Args:
+        texto: Guion completo (los párrafos se separan con una línea en blanco)
+        opciones: Modo de segmentación, largo máximo y pausas
+
+    Returns:
+        List[Fragmento]: Fragmentos en orden, con la pausa que sigue a cada uno
+
+    Por qué existe:
+        Generar el guion entero en una sola llamada dispara memoria y latencia,
+        no se puede paralelizar y un cambio mínimo obliga a regenerarlo todo.
+    """
+    opciones = opciones or OpcionesGuion()
+    if opciones.modo not in MODOS_SEGMENTACION:
+        raise ValueError(f"Modo de segmentación inválido: {opciones.modo}")
+
+    fragmentos = []
+    for parrafo in re.split(r'\n\s*\n', texto):
+        parrafo = " ".join(parrafo.split())
+        if not parrafo:
+            continue
+
+        unidades = [parrafo] if opciones.modo == "parrafo" else _FIN_ORACION.split(parrafo)
+        for unidad in unidades:
+            if not unidad.strip():
+                continue
+            maximo = opciones.max_caracteres
+            if not fragmentos and opciones.max_caracteres_inicial:
+                maximo = min(maximo, opciones.max_caracteres_inicial)
+            # Los cortes dentro de una oración se unen con crossfade, sin pausa
+            partes = _partir_largo(unidad.strip(), maximo)
+            primera, resto = partes[0], " ".join(partes[1:])
+            if resto and maximo < opciones.max_caracteres:
+                partes = [primera] + _partir_largo(resto, opciones.max_caracteres)
+            fragmentos.extend(Fragmento(parte, 0.0) for parte in partes)
+            fragmentos[-1].pausa = opciones.pausa_oracion
+        if fragmentos:
+            fragmentos[-1].pausa = opciones.pausa_parrafo
+
+    if fragmentos:
+        fragmentos[-1].pausa = 0.0
+    return fragmentos
+
+
+class UnionFragmentos:
+    """
+    Une fragmentos de audio de forma incremental.
+
+    agregar() devuelve el audio que ya es definitivo y retiene solo la cola
+    del último fragmento (la que participa del crossfade con el siguiente);
+    cerrar() entrega esa cola al terminar.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, crossfade_ms: float = 20.0):
+        self.sample_rate = sample_rate
+        self.n_fade = max(0, int(sample_rate * crossfade_ms / 1000))
+        self._cola: Optional[torch.Tensor] = None
+        self._pausa = 0.0
+
+    def _rampa(self, n: int, subida: bool) -> torch.Tensor:
+        rampa = torch.linspace(0.0, 1.0, n) if subida else torch.linspace(1.0, 0.0, n)
+        return rampa.unsqueeze(0)
+
+    def _separar_cola(self, wav: torch.Tensor) -> torch.Tensor:
+        corte = max(0, wav.shape[1] - self.n_fade)
+        self._cola = wav[:, corte:]
+        return wav[:, :corte]
+
+    def agregar(self, wav: torch.Tensor, pausa: float) -> torch.Tensor:
+        """
+        Agrega un fragmento.
+
+        Args:
+            wav: Audio del fragmento, forma (1, muestras)
+            pausa: Silencio en segundos entre este fragmento y el siguiente
+
+        Returns:
+            torch.Tensor: Audio listo para escribir, forma (1, muestras)
+        """
+        wav = wav.reshape(1, -1).float().cpu()
+        listo = []
+
+        if self._cola is not None:
+            cola = self._cola
+            if self._pausa > 0:
+                # Fundido corto hacia y desde el silencio para evitar clics
+                listo.append(cola * self._rampa(cola.shape[1], subida=False))
+                listo.append(torch.zeros(1, int(self._pausa * self.sample_rate)))
+                n = min(self.n_fade, wav.shape[1])
+                wav = torch.cat([wav[:, :n] * self._rampa(n, subida=True), wav[:, n:]], dim=1)
+            else:
+                # Crossfade lineal entre la cola anterior y el inicio del nuevo
+                n = min(cola.shape[1], wav.shape[1])
+                listo.append(cola[:, :cola.shape[1] - n])
+                mezcla = (cola[:, cola.shape[1] - n:] * self._rampa(n, subida=False)
+                          + wav[:, :n] * self._rampa(n, subida=True))
+                listo.append(mezcla)
+                wav = wav[:, n:]
+
+        listo.append(self._separar_cola(wav))
+        self._pausa = pausa
+        return torch.cat(listo, dim=1)
+
+    def cerrar(self) -> torch.Tensor:
+        """Devuelve el audio retenido del último fragmento."""
+        cola = self._cola if self._cola is not None else torch.zeros(1, 0)
+        self._cola = None
+        return cola
+
+
+def clave_fragmento(texto: str, id_voz: str, parametros: ParametrosGeneracion) -> str:
+    """
+    Clave de cache de un fragmento.
+
+    Args:
+        texto: Texto del fragmento
+        id_voz: Identificador de la voz (hash del audio + versión del modelo)
+        parametros: Parámetros de generación
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    datos = json.dumps({"texto": texto, "voz": id_voz, "parametros": asdict(parametros)},
+                       sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(datos.encode('utf-8')).hexdigest()[:32]
+
+
+def _generar(modelo, texto: str, parametros: ParametrosGeneracion) -> torch.Tensor:
+    """Genera un fragmento con los condicionales que ya tiene el modelo."""
+    return modelo.generate(texto, **asdict(parametros)).cpu()
+
+
+# Estado de cada proceso worker (se inicializa una vez por proceso)
+_modelo_worker = None
+
+
+def _iniciar_worker(dispositivos, condicionales: Optional[Path]):
+    """
+    Carga el modelo y los condicionales de la voz en un proceso worker.
+
+    Por qué existe:
+        Cada worker toma un dispositivo de la cola y mantiene su modelo
+        cargado para todos los fragmentos que le toquen. Solo lee los
+        condicionales ya guardados: si cada worker los preparara, todos
+        escribirían a la vez los mismos archivos del cache de voces.
+    """
+    global _modelo_worker
+    import main  # Import diferido: main importa este módulo
+
+    # Los mensajes del worker van a stderr: stdout puede estar transmitiendo audio
+    sys.stdout = sys.stderr
+    dispositivo = dispositivos.get()
+    _modelo_worker = main.cargar_modelo(dispositivo)
+    if condicionales:
+        main.cargar_condicionales(_modelo_worker, condicionales)
+
+
+def _generar_en_worker(texto: str, parametros: ParametrosGeneracion) -> torch.Tensor:
+    return _generar(_modelo_worker, texto, parametros)
+
+
+class SintetizadorGuion:
+    """
+    Genera los fragmentos de un guion, desde cache o con uno o más modelos.
+
+    Con workers=1 usa el modelo ya cargado (con la voz preparada). Con más,
+    abre un pool de procesos; en ese caso `modelo` puede ser None.
+    """
+
+    def __init__(
+        self,
+        modelo,
+        id_voz: str,
+        parametros: Optional[ParametrosGeneracion] = None,
+        opciones: Optional[OpcionesGuion] = None,
+        dispositivos: Optional[List[str]] = None,
+        condicionales: Optional[Path] = None,
+        directorio_cache: Optional[Path] = None,
+    ):
+        """
+        Args:
+            modelo: Modelo cargado con la voz preparada (None si se usan workers)
+            id_voz: Identificador de la voz para la clave de cache
+            parametros: Parámetros de generación
+            opciones: Segmentación, pausas, crossfade y cache
+            dispositivos: Un dispositivo por worker (más de uno abre el pool)
+            condicionales: Condicionales de la voz (.pt) que cargan los workers (None = voz por defecto)
+            directorio_cache: Directorio del cache de fragmentos
+        """
+        self.modelo = modelo
+        self.id_voz = id_voz
+        self.parametros = parametros or ParametrosGeneracion()
+        self.opciones = opciones or OpcionesGuion()
+        self.dispositivos = dispositivos or []
+        self.condicionales = condicionales
+        self.directorio_cache = Path(directorio_cache or CHUNK_CACHE_DIR)
+        self.desde_cache = 0
+        self.generados = 0
+
+        if self.modelo is None and len(self.dispositivos) < 2:
+            raise ValueError("Sin modelo cargado se necesitan al menos dos dispositivos para los workers")
+
+    def _ruta_cache(self, fragmento: Fragmento) -> Path:
+        return self.directorio_cache / f"{clave_fragmento(fragmento.texto, self.id_voz, self.parametros)}.pt"
+
+    def _leer_cache(self, fragmento: Fragmento) -> Optional[torch.Tensor]:
+        if not self.opciones.usar_cache:
+            return None
+        try:
+            return torch.load(self._ruta_cache(fragmento), weights_only=True)
+        except Exception:
+            return None
+
+    def _guardar_cache(self, fragmento: Fragmento, wav: torch.Tensor):
+        if not self.opciones.usar_cache:
+            return
+        ruta = self._ruta_cache(fragmento)
+        try:
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            temporal = ruta.with_suffix('.tmp')
+            torch.save(wav, temporal)
+            os.replace(temporal, ruta)
+        except Exception as e:
+            # No es crítico si falla el cache
+            print(f"⚠ No se pudo guardar el fragmento en cache: {e}")
+
+    def _abrir_pool(self, pendientes: int) -> ProcessPoolExecutor:
+        # spawn: CUDA no se puede reinicializar en un proceso hecho con fork
+        contexto = multiprocessing.get_context("spawn")
+        n_workers = min(len(self.dispositivos), pendientes)
+        cola = contexto.Queue()
+        for dispositivo in self.dispositivos[:n_workers]:
+            cola.put(dispositivo)
+        return ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=contexto,
+            initializer=_iniciar_worker,
+            initargs=(cola, self.condicionales),
+        )
+
+    def iterar(self, fragmentos: List[Fragmento]) -> Iterator[Tuple[Fragmento, torch.Tensor]]:
+        """
+        Genera (fragmento, audio) en el orden del guion.
+
+        Los fragmentos en cache salen sin generar nada; los demás se generan
+        secuencialmente con el modelo local o en paralelo en el pool.
+        """
+        cacheados = [self._leer_cache(f) for f in fragmentos]
+        pendientes = [i for i, wav in enumerate(cacheados) if wav is None]
+        self.desde_cache = len(fragmentos) - len(pendientes)
+
+        usar_pool = len(self.dispositivos) > 1 and (self.modelo is None or len(pendientes) > 1)
+        pool = self._abrir_pool(len(pendientes)) if usar_pool and pendientes else None
+        try:
+            futuros = {}
+            if pool:
+                futuros = {i: pool.submit(_generar_en_worker, fragmentos[i].texto, self.parametros)
+                           for i in pendientes}
+
+            for i, fragmento in enumerate(fragmentos):
+                wav = cacheados[i]
+                if wav is None:
+                    if pool:
+                        wav = futuros[i].result()
+                    else:
+                        wav = _generar(self.modelo, fragmento.texto, self.parametros)
+                    self._guardar_cache(fragmento, wav)
+                    self.generados += 1
+                yield fragmento, wav
+        finally:
+            if pool:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    def transmitir(
+        self,
+        fragmentos: List[Fragmento],
+        al_avanzar: Optional[Callable[[Fragmento], None]] = None,
+    ) -> Iterator[torch.Tensor]:
+        """
+        Genera los fragmentos y entrega el audio ya unido a medida que sale.
+
+        Args:
+            fragmentos: Fragmentos del guion (ver segmentar_texto)
+            al_avanzar: Callback opcional llamado tras cada fragmento
+
+        Returns:
+            Iterator[torch.Tensor]: Bloques de audio consecutivos, forma (1, muestras)
+        """
+        union = UnionFragmentos(SAMPLE_RATE, self.opciones.crossfade_ms)
+        for fragmento, wav in self.iterar(fragmentos):
+            yield union.agregar(wav, fragmento.pausa)
+            if al_avanzar:
+                al_avanzar(fragmento)
+        yield union.cerrar()
+
+    def sintetizar(
+        self,
+        fragmentos: List[Fragmento],
+        al_avanzar: Optional[Callable[[Fragmento], None]] = None,
+    ) -> torch.Tensor:
+        """
+        Genera y une todos los fragmentos.
+
+        Args:
+            fragmentos: Fragmentos del guion (ver segmentar_texto)
+            al_avanzar: Callback opcional llamado tras cada fragmento
+
+        Returns:
+            torch.Tensor: Audio completo, forma (1, muestras)
+        """
+        return torch.cat(list(self.transmitir(fragmentos, al_avanzar)), dim=1)
@@ -0,0 +1,6 @@
+"""Los módulos de TTS-py se importan desde la raíz del proyecto (sin paquete)"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
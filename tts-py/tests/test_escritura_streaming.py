@@ -0,0 +1,77 @@
+"""
+Tests de escritura en streaming de TTS-py
+El WAV en disco es válido después de cada bloque (encabezado al día); por
+stdout el encabezado declara tamaño desconocido.
+"""
+
+import io
+import struct
+import sys
+import wave
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+escritura_streaming = pytest.importorskip("escritura_streaming")
+
+from escritura_streaming import EscritorStreaming  # noqa: E402
+
+SAMPLE_RATE = 8000
+
+
+def _tamanos(ruta):
+    encabezado = ruta.read_bytes()[:44]
+    return struct.unpack("<I", encabezado[4:8])[0], struct.unpack("<I", encabezado[40:44])[0]
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_encabezado_al_dia_tras_cada_bloque(tmp_path):
+    ruta = tmp_path / "salida.wav"
+    bloque = torch.linspace(-0.5, 0.5, 100).unsqueeze(0)
+
+    with EscritorStreaming(ruta, SAMPLE_RATE) as escritor:
+        assert _tamanos(ruta) == (36, 0)
+        for n in (1, 2):
+            escritor.escribir(bloque)
+            # Legible mientras crece, antes de cerrar
+            assert _tamanos(ruta) == (36 + 200 * n, 200 * n)
+            with wave.open(str(ruta), "rb") as w:
+                assert w.getframerate() == SAMPLE_RATE
+                assert w.getsampwidth() == 2
+                assert w.getnframes() == 100 * n
+        escritor.escribir(torch.zeros(1, 0))
+
+    assert escritor.muestras == 200
+    assert escritor.duracion == pytest.approx(200 / SAMPLE_RATE)
+    with wave.open(str(ruta), "rb") as w:
+        muestras = struct.unpack("<100h", w.readframes(100))
+    assert (muestras[0], muestras[-1]) == (-16383, 16383)
+
+
+def test_stdout_tamano_desconocido(monkeypatch):
+    salida = io.BytesIO()
+    monkeypatch.setattr(sys, "stdout", SimpleNamespace(buffer=salida))
+    monkeypatch.setattr(escritura_streaming, "_stdout_audio", None)
+
+    escritor = EscritorStreaming(escritura_streaming.Path("-"), SAMPLE_RATE)
+    escritor.escribir(torch.zeros(1, 50))
+    escritor.cerrar()
+
+    datos = salida.getvalue()
+    assert datos[:4] == b"RIFF"
+    assert struct.unpack("<I", datos[4:8])[0] == 0xFFFFFFFF
+    assert struct.unpack("<I", datos[40:44])[0] == 0xFFFFFFFF
+    assert len(datos) == 44 + 100
+    # print() ya no escribe en el stdout reservado para el audio
+    assert sys.stdout is sys.stderr
+
+
+def test_stdout_solo_wav(tmp_path):
+    with pytest.raises(ValueError):
+        EscritorStreaming(escritura_streaming.Path("-"), SAMPLE_RATE, formato="flac")
+    with pytest.raises(ValueError):
+        EscritorStreaming(tmp_path / "salida.mp3", SAMPLE_RATE, formato="mp3")
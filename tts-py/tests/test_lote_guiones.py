@@ -0,0 +1,126 @@
+"""
+Tests del procesamiento por lotes de TTS-py
+El manifiesto resuelve rutas relativas y aplica los valores por defecto del
+lote; los trabajos se agrupan por voz y los errores de escritura se reportan
+por archivo de salida.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+lote_guiones = pytest.importorskip("lote_guiones")
+
+from lote_guiones import (  # noqa: E402
+    EscritorSegundoPlano,
+    TrabajoGuion,
+    cargar_manifiesto,
+    ordenar_por_voz,
+)
+from sintetizador_guion import ParametrosGeneracion  # noqa: E402
+
+
+def _manifiesto(directorio, items, nombre="lote.jsonl"):
+    ruta = directorio / nombre
+    if ruta.suffix == ".jsonl":
+        ruta.write_text("\n".join(json.dumps(item) for item in items) + "\n\n", encoding="utf-8")
+    else:
+        ruta.write_text(json.dumps(items), encoding="utf-8")
+    return ruta
+
+
+def _clave_voz(trabajo):
+    # Igual que ejecutar_lote: audio de referencia + voice_name
+    return f"{trabajo.voz}|{trabajo.voice_name or ''}"
+
+
+# ============================================================================
+# MANIFIESTO
+# ============================================================================
+
+def test_rutas_relativas_al_manifiesto(tmp_path):
+    ruta = _manifiesto(tmp_path, [
+        {"script": "guiones/cap01.txt", "voice": "voces/narrador.wav", "output": "audio/cap01.wav"},
+        {"script": "/abs/cap02.txt", "output": "/abs/salida.wav"},
+        {"text": "Texto directo"},
+    ])
+    salida = tmp_path / "out"
+
+    trabajos = cargar_manifiesto(ruta, salida)
+
+    assert trabajos[0].script == tmp_path / "guiones" / "cap01.txt"
+    assert trabajos[0].voz == tmp_path / "voces" / "narrador.wav"
+    assert trabajos[0].salida == salida / "audio" / "cap01.wav"
+    assert (trabajos[1].script, trabajos[1].salida) == (Path("/abs/cap02.txt"), Path("/abs/salida.wav"))
+    # Sin "output": el nombre del guion, o item_NNNN para texto directo
+    assert trabajos[2].salida == salida / "item_0003.wav"
+    assert trabajos[2].leer_texto() == "Texto directo"
+
+
+def test_valores_por_defecto_y_sobrescritos(tmp_path):
+    ruta = _manifiesto(tmp_path, [
+        {"text": "a"},
+        {"text": "b", "voice": "otra.wav"},
+        {"text": "c", "voice_name": "locutora", "exaggeration": 0.9},
+    ], nombre="lote.json")
+    voz = tmp_path / "narrador.wav"
+    parametros = ParametrosGeneracion(exaggeration=0.4, temperature=0.6)
+
+    a, b, c = cargar_manifiesto(ruta, tmp_path, voz=voz, voice_name="narrador", parametros=parametros)
+
+    assert (a.voz, a.voice_name, a.parametros) == (voz, "narrador", parametros)
+    # Una voz propia no hereda el voice_name del lote
+    assert (b.voz, b.voice_name) == (tmp_path / "otra.wav", None)
+    assert (c.voz, c.voice_name) == (voz, "locutora")
+    assert c.parametros == ParametrosGeneracion(exaggeration=0.9, temperature=0.6)
+
+
+def test_item_sin_texto_ni_script(tmp_path):
+    ruta = _manifiesto(tmp_path, [{"text": "ok"}, {"voice": "a.wav"}])
+
+    with pytest.raises(ValueError, match="Ítem 2"):
+        cargar_manifiesto(ruta, tmp_path)
+
+
+# ============================================================================
+# AGRUPACIÓN Y ESCRITURA
+# ============================================================================
+
+def test_ordenar_por_voz_y_voice_name(tmp_path):
+    def trabajo(nombre, voz, voice_name=None):
+        return TrabajoGuion(salida=tmp_path / nombre, voz=Path(voz), voice_name=voice_name)
+
+    trabajos = [
+        trabajo("1", "a.wav"),
+        trabajo("2", "b.wav"),
+        trabajo("3", "a.wav", "narrador"),
+        trabajo("4", "a.wav"),
+        trabajo("5", "b.wav"),
+        trabajo("6", "a.wav", "narrador"),
+    ]
+
+    ordenados = ordenar_por_voz(trabajos, _clave_voz)
+
+    # Grupos en orden de aparición; mismo audio con otro voice_name es otro grupo
+    assert [t.salida.name for t in ordenados] == ["1", "4", "2", "5", "3", "6"]
+
+
+def test_escritor_reporta_errores_por_salida(tmp_path):
+    escritos = []
+
+    def guardar(wav, ruta):
+        if ruta.name == "falla.wav":
+            raise OSError("disco lleno")
+        escritos.append((ruta, wav.shape[1]))
+
+    escritor = EscritorSegundoPlano(guardar, max_pendientes=1)
+    for nombre in ("a.wav", "falla.wav", "sub/b.wav"):
+        escritor.encolar(torch.zeros(1, 10), tmp_path / nombre)
+    errores = escritor.cerrar()
+
+    assert errores == {tmp_path / "falla.wav": "disco lleno"}
+    assert escritor.escritos == 2
+    assert escritos == [(tmp_path / "a.wav", 10), (tmp_path / "sub" / "b.wav", 10)]
+    assert (tmp_path / "sub").is_dir()
@@ -0,0 +1,139 @@
+"""
+Tests de segmentación, unión y cache de fragmentos de TTS-py
+Un guion se divide en oraciones y párrafos con la pausa que sigue a cada
+fragmento; los cortes dentro de una oración se unen con crossfade, sin pausa.
+"""
+
+import pytest
+
+torch = pytest.importorskip("torch")
+sintetizador_guion = pytest.importorskip("sintetizador_guion")
+
+from sintetizador_guion import (  # noqa: E402
+    OpcionesGuion,
+    ParametrosGeneracion,
+    UnionFragmentos,
+    _partir_largo,
+    clave_fragmento,
+    segmentar_texto,
+)
+
+SAMPLE_RATE = 1000  # 20 ms de crossfade = 20 muestras
+
+
+def _pausas(fragmentos):
+    return [(f.texto, f.pausa) for f in fragmentos]
+
+
+# ============================================================================
+# SEGMENTACIÓN
+# ============================================================================
+
+def test_oraciones_y_parrafos():
+    opciones = OpcionesGuion(pausa_oracion=0.25, pausa_parrafo=0.7)
+
+    fragmentos = segmentar_texto("Hola. ¿Cómo estás?\n\nBien,   gracias.\nChau!", opciones)
+
+    assert _pausas(fragmentos) == [
+        ("Hola.", 0.25),
+        ("¿Cómo estás?", 0.7),
+        ("Bien, gracias.", 0.25),
+        ("Chau!", 0.0),
+    ]
+
+
+def test_modo_parrafo():
+    fragmentos = segmentar_texto("Uno. Dos.\n\nTres.", OpcionesGuion(modo="parrafo"))
+
+    assert _pausas(fragmentos) == [("Uno. Dos.", 0.7), ("Tres.", 0.0)]
+
+
+def test_oracion_larga_se_une_sin_pausa():
+    opciones = OpcionesGuion(max_caracteres=20, pausa_oracion=0.25)
+
+    fragmentos = segmentar_texto("Primera parte larga, segunda parte larga. Fin.", opciones)
+
+    assert _pausas(fragmentos) == [
+        ("Primera parte larga,", 0.0),
+        ("segunda parte larga.", 0.25),
+        ("Fin.", 0.0),
+    ]
+
+
+def test_primer_fragmento_corto_en_streaming():
+    opciones = OpcionesGuion(max_caracteres_inicial=13, pausa_oracion=0.25)
+
+    fragmentos = segmentar_texto("Hola a todos, bienvenidos al programa de hoy. Fin.", opciones)
+
+    # Solo el primero se acorta; el resto de la oración vuelve al largo normal
+    assert _pausas(fragmentos) == [
+        ("Hola a todos,", 0.0),
+        ("bienvenidos al programa de hoy.", 0.25),
+        ("Fin.", 0.0),
+    ]
+
+
+def test_texto_vacio_y_modo_invalido():
+    assert segmentar_texto("  \n\n  ") == []
+    with pytest.raises(ValueError):
+        segmentar_texto("Hola.", OpcionesGuion(modo="palabra"))
+
+
+def test_partir_largo():
+    assert _partir_largo("corta", 10) == ["corta"]
+    # Primero en comas; la pieza que aún excede se parte entre palabras
+    assert _partir_largo("uno dos, tres cuatro cinco seis", 12) == ["uno dos,", "tres cuatro", "cinco seis"]
+    assert all(len(p) <= 12 for p in _partir_largo("palabra " * 10, 12))
+
+
+# ============================================================================
+# UNIÓN
+# ============================================================================
+
+def _unir(fragmentos, crossfade_ms=20.0):
+    union = UnionFragmentos(SAMPLE_RATE, crossfade_ms)
+    partes = [union.agregar(wav, pausa) for wav, pausa in fragmentos]
+    partes.append(union.cerrar())
+    return torch.cat(partes, dim=1)
+
+
+def test_crossfade_solapa_n_fade_muestras():
+    a, b = torch.ones(1, 100), torch.ones(1, 80)
+
+    audio = _unir([(a, 0.0), (b, 0.0)])
+
+    assert audio.shape[1] == 100 + 80 - 20
+    # Dos señales constantes iguales: la mezcla lineal no cambia la amplitud
+    assert torch.allclose(audio, torch.ones_like(audio))
+
+
+def test_pausa_agrega_silencio():
+    a, b = torch.ones(1, 100), torch.ones(1, 80)
+
+    audio = _unir([(a, 0.5), (b, 0.0)])
+
+    assert audio.shape[1] == 100 + 500 + 80
+    assert torch.count_nonzero(audio[0, 100:600]) == 0
+
+
+def test_agregar_retiene_solo_la_cola():
+    union = UnionFragmentos(SAMPLE_RATE, 20.0)
+
+    listo = union.agregar(torch.ones(1, 100), 0.0)
+
+    assert listo.shape[1] == 80
+    assert union.cerrar().shape[1] == 20
+    assert union.cerrar().shape[1] == 0
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+def test_clave_fragmento():
+    base = clave_fragmento("Hola.", "voz-1", ParametrosGeneracion())
+
+    assert clave_fragmento("Hola.", "voz-1", ParametrosGeneracion()) == base
+    assert clave_fragmento("Hola!", "voz-1", ParametrosGeneracion()) != base
+    assert clave_fragmento("Hola.", "voz-2", ParametrosGeneracion()) != base
+    assert clave_fragmento("Hola.", "voz-1", ParametrosGeneracion(exaggeration=0.7)) != base